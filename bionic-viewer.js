@@ -24,6 +24,8 @@
         let currentHighlight = null;
         let currentMode = 'summarize';
         let writingSample = '';
+        let styleId = '';
+        let currentDocId = '';
         let readingAssistEnabled = false;
 
         function applyReadingAssistState() {
@@ -155,6 +157,38 @@
             }
         });
 
+        async function registerWritingStyle() {
+            styleId = '';
+            if (!writingSample) return;
+            try {
+                const response = await fetch(`${API_BASE}/register-style`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ writingSample })
+                });
+                const data = await response.json();
+                styleId = data.styleId || '';
+            } catch (err) {
+                console.error('Style registration error:', err);
+            }
+        }
+
+        // Rephrase with the registered style id, re-registering once if the server has forgotten it.
+        async function postRephrase(text, retried = false) {
+            const body = styleId ? { text, styleId } : { text, writingSample };
+            const response = await fetch(`${API_BASE}/rephrase`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(body)
+            });
+            const data = await response.json();
+            if (data.styleExpired && !retried) {
+                await registerWritingStyle();
+                return postRephrase(text, true);
+            }
+            return data;
+        }
+
         async function summarizeParagraph(para) {
             const originalHtml = para.innerHTML;
             const originalText = para.textContent;
@@ -231,16 +265,7 @@
             para.innerHTML = `<div class="para-content">${currentContent}</div>`;
 
             try {
-                const response = await fetch(`${API_BASE}/rephrase`, {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        text: originalText,
-                        writingSample: writingSample
-                    })
-                });
-
-                const data = await response.json();
+                const data = await postRephrase(originalText);
 
                 if (data.error) {
                     para.classList.remove('loading');
@@ -370,18 +395,17 @@
             item.innerHTML = `<div class="para-content">${originalHtml}</div>`;
 
             try {
-                const endpoint = currentMode === 'summarize' ? '/summarize' : '/rephrase';
-                const body = currentMode === 'summarize'
-                    ? { text: textToProcess }
-                    : { text: textToProcess, writingSample };
-
-                const response = await fetch(`${API_BASE}${endpoint}`, {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(body)
-                });
-
-                const data = await response.json();
+                let data;
+                if (currentMode === 'summarize') {
+                    const response = await fetch(`${API_BASE}/summarize`, {
+                        method: 'POST',
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify({ text: textToProcess })
+                    });
+                    data = await response.json();
+                } else {
+                    data = await postRephrase(textToProcess);
+                }
 
                 if (data.error) {
                     item.classList.remove('loading');
@@ -464,7 +488,7 @@
                 const response = await fetch(`${API_BASE}/describe-image`, {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ imageId })
+                    body: JSON.stringify(currentDocId ? { imageId, docId: currentDocId } : { imageId })
                 });
 
                 const data = await response.json();
@@ -647,6 +671,7 @@
                 }
 
                 writingSample = data.text;
+                await registerWritingStyle();
                 styleUploadLabel.textContent = data.filename;
                 styleUploadZone.classList.add('has-file');
                 styleIndicator.textContent = data.filename;
@@ -661,6 +686,7 @@
 
         function clearWritingStyle() {
             writingSample = '';
+            styleId = '';
             styleFileInput.value = '';
             styleUploadLabel.textContent = 'Click to upload DOCX';
             styleUploadZone.classList.remove('has-file');
@@ -721,31 +747,95 @@
             const formData = new FormData();
             formData.append('file', file);
 
-            fetch(`${API_BASE}/convert`, {
+            convertDocumentStream(formData).catch(() => {
+                closeViewer();
+                loading.classList.remove('visible');
+                showError('Failed to process document.');
+            });
+        }
+
+        // Renders the document chunk by chunk from /convert-stream (NDJSON)
+        // so the first screen appears before the whole file is converted.
+        async function convertDocumentStream(formData) {
+            const response = await fetch(`${API_BASE}/convert-stream?format=ndjson`, {
                 method: 'POST',
                 body: formData
-            })
-            .then(res => res.json())
-            .then(data => {
+            });
+
+            if (!response.ok || !response.body) {
+                const data = await response.json().catch(() => ({}));
                 loading.classList.remove('visible');
+                showError(data.error || 'Failed to process document.');
+                return;
+            }
 
-                if (data.error) {
-                    showError(data.error);
-                    return;
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffered = '';
+            let finished = false;
+
+            const handleEvent = (event) => {
+                if (event.type === 'start') {
+                    closeServerDocument();
+                    currentDocId = event.docId || '';
+                    filename.textContent = event.filename;
+                    documentContent.innerHTML = '';
+                } else if (event.type === 'chunk') {
+                    if (event.index > 0) {
+                        documentContent.insertAdjacentHTML('beforeend', '\n');
+                    }
+                    documentContent.insertAdjacentHTML('beforeend', event.html);
+                    if (!viewer.classList.contains('visible')) {
+                        loading.classList.remove('visible');
+                        uploadScreen.classList.add('hidden');
+                        viewer.classList.add('visible');
+                    }
+                } else if (event.type === 'done') {
+                    finished = true;
+                    loading.classList.remove('visible');
+                    uploadScreen.classList.add('hidden');
+                    viewer.classList.add('visible');
+                } else if (event.type === 'error') {
+                    finished = true;
+                    closeViewer();
+                    loading.classList.remove('visible');
+                    showError(event.error || 'Failed to process document.');
                 }
+            };
+
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffered += decoder.decode(value, { stream: true });
+                let newline;
+                while ((newline = buffered.indexOf('\n')) >= 0) {
+                    const line = buffered.slice(0, newline).trim();
+                    buffered = buffered.slice(newline + 1);
+                    if (line) handleEvent(JSON.parse(line));
+                }
+            }
+            if (buffered.trim()) handleEvent(JSON.parse(buffered));
+            if (!finished) {
+                throw new Error('Conversion stream ended early');
+            }
+        }
 
-                filename.textContent = data.filename;
-                documentContent.innerHTML = data.html;
-                uploadScreen.classList.add('hidden');
-                viewer.classList.add('visible');
-            })
-            .catch(() => {
-                loading.classList.remove('visible');
-                showError('Failed to process document.');
-            });
+        // Lets the server drop the document and cancel any background summary job.
+        function closeServerDocument() {
+            if (!currentDocId) return;
+            fetch(`${API_BASE}/close-document`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ docId: currentDocId }),
+                keepalive: true
+            }).catch(() => {});
+            currentDocId = '';
         }
 
+        window.addEventListener('pagehide', closeServerDocument);
+
         function closeViewer() {
+            closeServerDocument();
             viewer.classList.remove('visible');
             uploadScreen.classList.remove('hidden');
             documentContent.innerHTML = '';
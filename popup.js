@@ -1349,6 +1349,9 @@ function bindEvents() {
 
     const formData = new FormData();
     formData.append("file", file);
+    // The HTML is saved in chrome.storage, so images are embedded rather than
+    // linked to /doc-image URLs that expire with the server-side document.
+    formData.append("inlineImages", "1");
 
     try {
       const response = await fetch(`${DOC_SERVER_BASE}/convert`, {
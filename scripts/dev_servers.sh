@@ -23,6 +23,7 @@ Environment overrides:
   RING_OPEN_RETRY_SEC               default: 1
   RING_MONITOR_VERBOSE              default: 0 (set to 1 for --verbose)
   RING_DEBUG                        default: 0 (set to 1 for ring debug mode)
+  BIONIC_SERVER_MODE                default: flask (set to asgi for the uvicorn server)
 EOF
 }
 
@@ -148,9 +149,14 @@ start_all() {
     echo "[debug] RING_DEBUG=1 -> poll access logs ON, ring monitor verbose ON"
   fi
 
+  local bionic_entry="servers/bionic/app.py"
+  if [[ "${BIONIC_SERVER_MODE:-flask}" == "asgi" ]]; then
+    bionic_entry="servers/bionic/asgi.py"
+  fi
+
   start_service \
     "bionic" \
-    env SUPPRESS_RING_POLL_REQUEST_LOGS="$suppress_ring_poll_logs" RING_POLL_DEBUG="${RING_DEBUG:-0}" python3 servers/bionic/app.py
+    env SUPPRESS_RING_POLL_REQUEST_LOGS="$suppress_ring_poll_logs" RING_POLL_DEBUG="${RING_DEBUG:-0}" python3 "$bionic_entry"
 
   start_service \
     "audio" \
@@ -183,6 +189,7 @@ stop_all() {
   kill_matching_pattern "servers/bionic/ring_monitor.py" "ring_monitor"
   kill_matching_pattern "servers/audio/server.py" "audio"
   kill_matching_pattern "servers/bionic/app.py" "bionic"
+  kill_matching_pattern "servers/bionic/asgi.py" "bionic"
 
   echo "All services stopped."
 }
@@ -1,9 +1,16 @@
 from flask import Flask, request, jsonify, render_template, Response
 from werkzeug.utils import secure_filename
 from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.oxml.parser import element_class_lookup as docx_element_class_lookup, parse_xml as parse_docx_xml
+from docx.oxml.simpletypes import ST_HexColorAuto
+from docx.parts.styles import StylesPart
+from docx.styles.styles import Styles
+from docx.table import Table
+from docx.text.paragraph import Paragraph
 from docx.shared import Pt
-from docx.oxml.ns import nsmap
+from docx.oxml.ns import nsmap, qn
 import re
 import io
 import html
@@ -15,19 +22,32 @@ import time
 import uuid
 import urllib.parse
 import hashlib
+import random
 import logging
-from threading import Lock
+import atexit
+import queue as thread_queue
+from threading import Lock, Thread
 from pathlib import Path
-from collections import deque
+import os
+import posixpath
+import zipfile
+from collections import deque, OrderedDict
 import httpx
 from google import genai
 from google.genai import types
-from lxml import html as lxml_html
+from lxml import etree, html as lxml_html
+
+try:
+    from PIL import Image, ImageOps, features as pil_features
+except ImportError:
+    Image = None
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from servers.bionic import bionic_text
+from servers.bionic.cpu_pool import CpuJobTimeout, CpuWorkerPool
 from servers.config import get_env
 
 app = Flask(__name__)
@@ -101,29 +121,388 @@ def _get_env_float(name: str, default: float, minimum=None, maximum=None) -> flo
 GEMINI_LIVE_THINKING_BUDGET = _get_env_int("GEMINI_LIVE_THINKING_BUDGET", 0, minimum=0, maximum=32768)
 GEMINI_LIVE_MAX_OUTPUT_TOKENS = _get_env_int("GEMINI_LIVE_MAX_OUTPUT_TOKENS", 160, minimum=32, maximum=2048)
 GEMINI_LIVE_TEMPERATURE = _get_env_float("GEMINI_LIVE_TEMPERATURE", 0.1, minimum=0.0, maximum=2.0)
+GEMINI_STREAM_EARLY_STOP = str(get_env("GEMINI_STREAM_EARLY_STOP", "1")).strip().lower() in ("1", "true", "yes", "on")
+# Fraction of streamed requests read to the end anyway, to measure what early stop saves.
+GEMINI_STREAM_EARLY_STOP_SAMPLE_RATE = _get_env_float("GEMINI_STREAM_EARLY_STOP_SAMPLE_RATE", 0.05, minimum=0.0, maximum=1.0)
+GEMINI_ROUTER_EWMA_ALPHA = _get_env_float("GEMINI_ROUTER_EWMA_ALPHA", 0.3, minimum=0.01, maximum=1.0)
+GEMINI_ROUTER_FAILURE_THRESHOLD = _get_env_int("GEMINI_ROUTER_FAILURE_THRESHOLD", 3, minimum=1, maximum=50)
+GEMINI_ROUTER_ERROR_RATE_THRESHOLD = _get_env_float("GEMINI_ROUTER_ERROR_RATE_THRESHOLD", 0.6, minimum=0.05, maximum=1.0)
+GEMINI_ROUTER_MIN_SAMPLES = _get_env_int("GEMINI_ROUTER_MIN_SAMPLES", 5, minimum=1, maximum=500)
+GEMINI_ROUTER_OPEN_SECONDS = _get_env_float("GEMINI_ROUTER_OPEN_SECONDS", 30.0, minimum=1.0, maximum=3600.0)
+GEMINI_ROUTER_MAX_OPEN_SECONDS = _get_env_float("GEMINI_ROUTER_MAX_OPEN_SECONDS", 600.0, minimum=1.0, maximum=86400.0)
+GEMINI_ROUTER_ORDER_BIAS_MS = _get_env_float("GEMINI_ROUTER_ORDER_BIAS_MS", 1500.0, minimum=0.0, maximum=60000.0)
+GEMINI_LIVE_HEDGE_ENABLED = str(get_env("GEMINI_LIVE_HEDGE_ENABLED", "1")).strip().lower() in ("1", "true", "yes", "on")
+GEMINI_LIVE_HEDGE_PERCENTILE = _get_env_float("GEMINI_LIVE_HEDGE_PERCENTILE", 95.0, minimum=50.0, maximum=99.9)
+GEMINI_LIVE_HEDGE_DEFAULT_DELAY_MS = _get_env_float("GEMINI_LIVE_HEDGE_DEFAULT_DELAY_MS", 2500.0, minimum=100.0, maximum=30000.0)
+GEMINI_LIVE_HEDGE_MIN_DELAY_MS = _get_env_float("GEMINI_LIVE_HEDGE_MIN_DELAY_MS", 800.0, minimum=0.0, maximum=30000.0)
+GEMINI_LIVE_HEDGE_MAX_DELAY_MS = _get_env_float("GEMINI_LIVE_HEDGE_MAX_DELAY_MS", 6000.0, minimum=100.0, maximum=60000.0)
+GEMINI_LIVE_HEDGE_MIN_SAMPLES = _get_env_int("GEMINI_LIVE_HEDGE_MIN_SAMPLES", 5, minimum=1, maximum=500)
+GEMINI_LIVE_POOL_SIZE = _get_env_int("GEMINI_LIVE_POOL_SIZE", 0, minimum=0, maximum=8)
+# Live connections are capped server-side at roughly ten minutes; recycle well before that.
+GEMINI_LIVE_POOL_MAX_AGE_SECONDS = _get_env_float("GEMINI_LIVE_POOL_MAX_AGE_SECONDS", 240.0, minimum=10.0, maximum=540.0)
+GEMINI_LIVE_POOL_REFILL_INTERVAL_SECONDS = _get_env_float("GEMINI_LIVE_POOL_REFILL_INTERVAL_SECONDS", 5.0, minimum=0.5, maximum=60.0)
 GEMINI_READING_MODE_HTML_CHAR_LIMIT = _get_env_int("GEMINI_READING_MODE_HTML_CHAR_LIMIT", 450000, minimum=20000, maximum=1200000)
 GEMINI_READING_MODE_MAX_OUTPUT_TOKENS = _get_env_int("GEMINI_READING_MODE_MAX_OUTPUT_TOKENS", 900, minimum=128, maximum=4096)
 READING_MODE_DISABLE_SELECTOR_CAP = str(get_env("READING_MODE_DISABLE_SELECTOR_CAP", "0")).strip().lower() in ("1", "true", "yes", "on")
 READING_MODE_URL_CACHE_ENABLED = str(get_env("READING_MODE_URL_CACHE_ENABLED", "1")).strip().lower() in ("1", "true", "yes", "on")
 READING_MODE_URL_CACHE_MAX_ENTRIES = _get_env_int("READING_MODE_URL_CACHE_MAX_ENTRIES", 5000, minimum=100, maximum=50000)
 READING_MODE_URL_CACHE_FILE = PROJECT_ROOT / ".run" / "reading_mode_url_cache.json"
+IMAGE_DESCRIPTION_CACHE_ENABLED = str(get_env("IMAGE_DESCRIPTION_CACHE_ENABLED", "1")).strip().lower() in ("1", "true", "yes", "on")
+IMAGE_DESCRIPTION_CACHE_MAX_ENTRIES = _get_env_int("IMAGE_DESCRIPTION_CACHE_MAX_ENTRIES", 20000, minimum=10, maximum=1000000)
+IMAGE_DESCRIPTION_CACHE_MAX_MB = _get_env_int("IMAGE_DESCRIPTION_CACHE_MAX_MB", 64, minimum=1, maximum=10240)
+IMAGE_DESCRIPTION_URL_REVALIDATE_SECONDS = _get_env_float("IMAGE_DESCRIPTION_URL_REVALIDATE_SECONDS", 3600.0, minimum=0.0, maximum=30 * 86400.0)
+IMAGE_DESCRIPTION_CACHE_DIR = PROJECT_ROOT / ".run" / "image_description_cache"
+# Document images live in a shared on-disk store so every worker can serve them.
+ARTIFACT_STORE_DIR = Path(str(get_env("ARTIFACT_STORE_DIR", "")).strip() or PROJECT_ROOT / ".run" / "artifacts")
+ARTIFACT_STORE_MEMORY_MB = _get_env_int("ARTIFACT_STORE_MEMORY_MB", 64, minimum=0, maximum=10240)
+ARTIFACT_STORE_DISK_MB = _get_env_int("ARTIFACT_STORE_DISK_MB", 1024, minimum=1, maximum=1024 * 1024)
+ARTIFACT_STORE_TTL_SECONDS = _get_env_float("ARTIFACT_STORE_TTL_SECONDS", 24 * 3600.0, minimum=60.0, maximum=90 * 86400.0)
+IMAGE_DESCRIPTION_PROMPT_VERSION = "image-description-v1"
+IMAGE_FETCH_MAX_BYTES = _get_env_int("IMAGE_FETCH_MAX_MB", 15, minimum=1, maximum=200) * 1024 * 1024
+IMAGE_FETCH_TIMEOUT_SECONDS = _get_env_float("IMAGE_FETCH_TIMEOUT_SECONDS", 20.0, minimum=1.0, maximum=120.0)
+IMAGE_FETCH_CACHE_ENABLED = str(get_env("IMAGE_FETCH_CACHE_ENABLED", "1")).strip().lower() in ("1", "true", "yes", "on")
+IMAGE_FETCH_CACHE_MAX_ENTRIES = _get_env_int("IMAGE_FETCH_CACHE_MAX_ENTRIES", 2000, minimum=10, maximum=1000000)
+IMAGE_FETCH_CACHE_MAX_MB = _get_env_int("IMAGE_FETCH_CACHE_MAX_MB", 256, minimum=16, maximum=102400)
+IMAGE_FETCH_CACHE_DIR = PROJECT_ROOT / ".run" / "image_fetch_cache"
+IMAGE_NORMALIZE_ENABLED = str(get_env("IMAGE_NORMALIZE_ENABLED", "1")).strip().lower() in ("1", "true", "yes", "on")
+IMAGE_NORMALIZE_MAX_EDGE = _get_env_int("IMAGE_NORMALIZE_MAX_EDGE", 1536, minimum=256, maximum=8192)
+IMAGE_NORMALIZE_MAX_BYTES = _get_env_int("IMAGE_NORMALIZE_MAX_KB", 600, minimum=32, maximum=20480) * 1024
+IMAGE_NORMALIZE_QUALITY = _get_env_int("IMAGE_NORMALIZE_QUALITY", 85, minimum=30, maximum=100)
+# Part of the normalize cache key; bump when _normalize_image_bytes output changes.
+IMAGE_NORMALIZE_VERSION = "normalize-v2"
+IMAGE_NORMALIZE_CACHE_MAX_MB = _get_env_int("IMAGE_NORMALIZE_CACHE_MAX_MB", 128, minimum=8, maximum=102400)
+IMAGE_NORMALIZE_CACHE_DIR = PROJECT_ROOT / ".run" / "image_normalize_cache"
+IMAGE_SESSION_TTL_SECONDS = _get_env_float("IMAGE_SESSION_TTL_SECONDS", 1800.0, minimum=60.0, maximum=86400.0)
+IMAGE_SESSION_MAX_ENTRIES = _get_env_int("IMAGE_SESSION_MAX_ENTRIES", 200, minimum=1, maximum=10000)
+IMAGE_SESSION_MAX_BYTES = _get_env_int("IMAGE_SESSION_MAX_MB", 64, minimum=1, maximum=4096) * 1024 * 1024
+IMAGE_SESSION_USE_FILES_API = str(get_env("IMAGE_SESSION_USE_FILES_API", "1")).strip().lower() in ("1", "true", "yes", "on")
+# Gemini Files API uploads are kept for 48 hours; re-upload well before that.
+IMAGE_SESSION_FILE_MAX_AGE_SECONDS = 36 * 60 * 60
+PARAGRAPH_AI_MODEL = "gemini-3-flash-preview"
+STYLE_PROFILE_DISTILL = str(get_env("STYLE_PROFILE_DISTILL", "1")).strip().lower() in ("1", "true", "yes", "on")
+STYLE_PROFILE_MAX_ENTRIES = _get_env_int("STYLE_PROFILE_MAX_ENTRIES", 5000, minimum=10, maximum=1000000)
+STYLE_PROFILE_DIR = PROJECT_ROOT / ".run" / "style_profiles"
+STYLE_PROFILE_PROMPT_VERSION = "style-profile-v1"
+SUMMARY_BATCH_TOKEN_BUDGET = _get_env_int("SUMMARY_BATCH_TOKEN_BUDGET", 3000, minimum=200, maximum=100000)
+# "streaming" parses word/document.xml incrementally; "python-docx" builds the
+# full Document object model. Both produce the same HTML.
+DOCX_CONVERTER_ENGINE = str(get_env("DOCX_CONVERTER_ENGINE", "streaming")).strip().lower() or "streaming"
+CONVERT_STREAM_CHUNK_BLOCKS = _get_env_int("CONVERT_STREAM_CHUNK_BLOCKS", 20, minimum=1, maximum=10000)
+DOC_IMAGE_LAZY_LOADING = str(get_env("DOC_IMAGE_LAZY_LOADING", "1")).strip().lower() in ("1", "true", "yes", "on")
+# Override when the server is reached through a proxy and request.url_root is not the public origin.
+DOC_IMAGE_URL_BASE = str(get_env("DOC_IMAGE_URL_BASE", "")).strip().rstrip("/")
+DOC_IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+CONVERT_STREAM_FLUSH_MS = _get_env_float("CONVERT_STREAM_FLUSH_MS", 50.0, minimum=0.0, maximum=10000.0)
+# Bump when the converter's HTML changes so cached conversions from the old output are not reused.
+DOCX_CONVERTER_VERSION = "bionic-html-v3"
+CONVERSION_CACHE_ENABLED = str(get_env("CONVERSION_CACHE_ENABLED", "1")).strip().lower() in ("1", "true", "yes", "on")
+CONVERSION_CACHE_MEMORY_MB = _get_env_int("CONVERSION_CACHE_MEMORY_MB", 32, minimum=0, maximum=10240)
+CONVERSION_CACHE_MAX_ENTRIES = _get_env_int("CONVERSION_CACHE_MAX_ENTRIES", 1000, minimum=10, maximum=1000000)
+CONVERSION_CACHE_MAX_MB = _get_env_int("CONVERSION_CACHE_MAX_MB", 512, minimum=8, maximum=102400)
+CONVERSION_CACHE_DIR = PROJECT_ROOT / ".run" / "conversion_cache"
+# DOCX conversion, text extraction and heuristic reading-mode plans run in
+# worker processes so they do not hold the GIL against other requests. 0 runs
+# them on the request thread.
+CPU_POOL_WORKERS = _get_env_int("CPU_POOL_WORKERS", min(4, max(1, (os.cpu_count() or 2) - 1)), minimum=0, maximum=64)
+CPU_POOL_MAX_JOBS_PER_WORKER = _get_env_int("CPU_POOL_MAX_JOBS_PER_WORKER", 200, minimum=1, maximum=1000000)
+CPU_POOL_MAX_RSS_MB = _get_env_int("CPU_POOL_MAX_RSS_MB", 1024, minimum=0, maximum=1024 * 1024)
+CPU_POOL_CONVERT_TIMEOUT_SECONDS = _get_env_float("CPU_POOL_CONVERT_TIMEOUT_SECONDS", 120.0, minimum=1.0, maximum=3600.0)
+CPU_POOL_PLAN_TIMEOUT_SECONDS = _get_env_float("CPU_POOL_PLAN_TIMEOUT_SECONDS", 20.0, minimum=1.0, maximum=600.0)
+SUMMARY_BATCH_MAX_PARAGRAPHS = _get_env_int("SUMMARY_BATCH_MAX_PARAGRAPHS", 12, minimum=1, maximum=100)
+SUMMARY_BATCH_CONCURRENCY = _get_env_int("SUMMARY_BATCH_CONCURRENCY", 3, minimum=1, maximum=32)
+SUMMARY_PRECOMPUTE_ENABLED = str(get_env("SUMMARY_PRECOMPUTE_ENABLED", "0")).strip().lower() in ("1", "true", "yes", "on")
+SUMMARY_PRECOMPUTE_MIN_CHARS = _get_env_int("SUMMARY_PRECOMPUTE_MIN_CHARS", 200, minimum=1, maximum=100000)
+SUMMARY_PRECOMPUTE_MAX_DOCUMENTS = _get_env_int("SUMMARY_PRECOMPUTE_MAX_DOCUMENTS", 2, minimum=1, maximum=64)
+SUMMARY_BATCH_MAX_ITEMS = _get_env_int("SUMMARY_BATCH_MAX_ITEMS", 500, minimum=1, maximum=10000)
+PARAGRAPH_AI_CACHE_MAX_ENTRIES = _get_env_int("PARAGRAPH_AI_CACHE_MAX_ENTRIES", 2000, minimum=0, maximum=100000)
+PARAGRAPH_AI_CACHE_TTL_SECONDS = _get_env_float("PARAGRAPH_AI_CACHE_TTL_SECONDS", 7 * 86400.0, minimum=0.0, maximum=90 * 86400.0)
+PARAGRAPH_AI_CACHE_DISK_ENABLED = str(get_env("PARAGRAPH_AI_CACHE_DISK_ENABLED", "1")).strip().lower() in ("1", "true", "yes", "on")
+PARAGRAPH_AI_CACHE_DISK_MAX_ENTRIES = _get_env_int("PARAGRAPH_AI_CACHE_DISK_MAX_ENTRIES", 20000, minimum=10, maximum=1000000)
+PARAGRAPH_AI_CACHE_DISK_MAX_MB = _get_env_int("PARAGRAPH_AI_CACHE_DISK_MAX_MB", 64, minimum=1, maximum=10240)
+PARAGRAPH_AI_CACHE_DIR = PROJECT_ROOT / ".run" / "paragraph_ai_cache"
+# Bump when a prompt changes so cached answers from the old wording are not reused.
+SUMMARY_PROMPT_VERSION = "summary-v1"
+REPHRASE_PROMPT_VERSION = "rephrase-v1"
+
+
+HTTP_CLIENT_HTTP2 = str(get_env("HTTP_CLIENT_HTTP2", "1")).strip().lower() in ("1", "true", "yes", "on")
+HTTP_CLIENT_MAX_CONNECTIONS = _get_env_int("HTTP_CLIENT_MAX_CONNECTIONS", 100, minimum=4, maximum=2000)
+HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS = _get_env_int("HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS", 20, minimum=1, maximum=500)
+HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS = _get_env_float("HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS", 60.0, minimum=1.0, maximum=900.0)
+HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS = _get_env_float("HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS", 5.0, minimum=0.5, maximum=60.0)
+HTTP_CLIENT_READ_TIMEOUT_SECONDS = _get_env_float("HTTP_CLIENT_READ_TIMEOUT_SECONDS", 30.0, minimum=1.0, maximum=600.0)
+GEMINI_REQUEST_TIMEOUT_SECONDS = _get_env_float("GEMINI_REQUEST_TIMEOUT_SECONDS", 120.0, minimum=5.0, maximum=900.0)
+
+# Shared event loop for async Gemini/HTTP work. The ASGI entry point binds its
+# running loop here; under the Flask dev server a daemon thread owns the loop.
+async_loop = None
+async_loop_lock = Lock()
+
+# Process-wide clients. Async httpx clients are only ever used on the shared
+# loop; the Gemini client routes its REST traffic through the "gemini" one.
+http_client_lock = Lock()
+gemini_client = None
+async_http_clients = {}
+http_host_stats = {}
+http_host_stats_lock = Lock()
+
+
+def _bind_async_loop(loop):
+    global async_loop
+    with async_loop_lock:
+        async_loop = loop
+
+
+def _get_async_loop():
+    global async_loop
+    with async_loop_lock:
+        if async_loop is not None and not async_loop.is_closed():
+            return async_loop
+        loop = asyncio.new_event_loop()
+        Thread(target=loop.run_forever, name="bionic-async-loop", daemon=True).start()
+        async_loop = loop
+        return loop
+
+
+def _run_async(coro, timeout=None):
+    """Run a coroutine on the shared loop and block the calling request thread for its result."""
+    loop = _get_async_loop()
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+    if running_loop is loop:
+        coro.close()
+        raise RuntimeError("_run_async cannot be called from the shared event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+def _http2_available() -> bool:
+    if not HTTP_CLIENT_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _http_stats_for_host(host: str) -> dict:
+    entry = http_host_stats.get(host)
+    if entry is None:
+        entry = {
+            "requests": 0,
+            "responses": 0,
+            "status_4xx": 0,
+            "status_5xx": 0,
+            "http2_responses": 0,
+            "total_headers_ms": 0.0,
+            "last_used_at": 0.0,
+        }
+        http_host_stats[host] = entry
+    return entry
+
+
+async def _on_http_request(http_request):
+    http_request.extensions["aqual_started_at"] = time.perf_counter()
+    with http_host_stats_lock:
+        entry = _http_stats_for_host(http_request.url.host)
+        entry["requests"] += 1
+        entry["last_used_at"] = time.time()
+
+
+async def _on_http_response(http_response):
+    started_at = http_response.request.extensions.get("aqual_started_at")
+    headers_ms = (time.perf_counter() - started_at) * 1000 if started_at else 0.0
+    with http_host_stats_lock:
+        entry = _http_stats_for_host(http_response.request.url.host)
+        entry["responses"] += 1
+        entry["total_headers_ms"] += headers_ms
+        if http_response.status_code >= 500:
+            entry["status_5xx"] += 1
+        elif http_response.status_code >= 400:
+            entry["status_4xx"] += 1
+        if http_response.http_version == "HTTP/2":
+            entry["http2_responses"] += 1
+
+
+def _build_async_http_client(read_timeout: float) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=_http2_available(),
+        headers={"User-Agent": "AQual/1.0"},
+        limits=httpx.Limits(
+            max_connections=HTTP_CLIENT_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(
+            connect=HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS,
+            read=read_timeout,
+            write=30.0,
+            pool=10.0,
+        ),
+        event_hooks={"request": [_on_http_request], "response": [_on_http_response]},
+    )
+
+
+def _get_async_http_client(kind: str = "default"):
+    """Return the shared keep-alive AsyncClient for `kind` ("default" or "gemini")."""
+    with http_client_lock:
+        client = async_http_clients.get(kind)
+        if client is None or client.is_closed:
+            read_timeout = GEMINI_REQUEST_TIMEOUT_SECONDS if kind == "gemini" else HTTP_CLIENT_READ_TIMEOUT_SECONDS
+            client = _build_async_http_client(read_timeout)
+            async_http_clients[kind] = client
+        return client
 
 
 def get_gemini_client():
+    global gemini_client
     if not GEMINI_API_KEY:
         raise RuntimeError("GEMINI_API_KEY is not configured. Set it in .env.")
-    return genai.Client(
-        api_key=GEMINI_API_KEY,
-        http_options={"api_version": "v1beta"},
-    )
+    if gemini_client is not None:
+        return gemini_client
+    gemini_http_client = _get_async_http_client("gemini")
+    with http_client_lock:
+        if gemini_client is None:
+            gemini_client = genai.Client(
+                api_key=GEMINI_API_KEY,
+                http_options=types.HttpOptions(
+                    api_version="v1beta",
+                    timeout=int(GEMINI_REQUEST_TIMEOUT_SECONDS * 1000),
+                    httpx_async_client=gemini_http_client,
+                ),
+            )
+        return gemini_client
+
+
+def _snapshot_http_pool(client) -> dict:
+    """Best-effort per-origin view of open pooled connections, or {} when it cannot be read.
+
+    httpx exposes no public pool API, so this reads httpx/httpcore internals;
+    any change there makes the snapshot empty instead of failing /debug.
+    """
+    try:
+        pools = {}
+        for connection in list(client._transport._pool.connections):
+            origin = connection._origin
+            host = origin.host.decode("ascii", errors="ignore") if isinstance(origin.host, bytes) else str(origin.host)
+            entry = pools.setdefault(host, {"open": 0, "idle": 0})
+            entry["open"] += 1
+            if connection.is_idle():
+                entry["idle"] += 1
+        return pools
+    except Exception:
+        return {}
+
+
+def _get_http_client_stats() -> dict:
+    with http_host_stats_lock:
+        hosts = {}
+        for host, entry in http_host_stats.items():
+            responses = int(entry["responses"])
+            hosts[host] = {
+                **entry,
+                # Requests with no response yet: in flight, or failed at the transport level.
+                "unanswered": int(entry["requests"]) - responses,
+                "total_headers_ms": round(entry["total_headers_ms"], 1),
+                "avg_headers_ms": round(entry["total_headers_ms"] / responses, 1) if responses else 0.0,
+            }
+    with http_client_lock:
+        clients = {
+            kind: {
+                "closed": bool(client.is_closed),
+                "pool": _snapshot_http_pool(client),
+            }
+            for kind, client in async_http_clients.items()
+        }
+        gemini_ready = gemini_client is not None
+    return {
+        "http2": _http2_available(),
+        "limits": {
+            "max_connections": HTTP_CLIENT_MAX_CONNECTIONS,
+            "max_keepalive_connections": HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry_seconds": HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+        },
+        "gemini_client_ready": gemini_ready,
+        "clients": clients,
+        "hosts": hosts,
+    }
+
+
+async def _close_http_clients():
+    """Close the shared Gemini and httpx clients; they are recreated lazily if used again."""
+    global gemini_client
+    with http_client_lock:
+        closing_gemini = gemini_client
+        closing_clients = list(async_http_clients.values())
+        gemini_client = None
+        async_http_clients.clear()
+    if closing_gemini is not None:
+        try:
+            await closing_gemini.aio.aclose()
+            closing_gemini.close()
+        except Exception:
+            pass
+    for client in closing_clients:
+        try:
+            await client.aclose()
+        except Exception:
+            pass
 
-# Store images temporarily for the session
-image_store = {}
+
+async def _close_async_resources():
+    await _close_live_session_pool()
+    await _close_http_clients()
+
+
+def _close_async_resources_at_exit():
+    with http_client_lock:
+        has_open_clients = gemini_client is not None or bool(async_http_clients)
+    with async_loop_lock:
+        loop = async_loop
+    if not has_open_clients or loop is None or loop.is_closed() or not loop.is_running():
+        return
+    try:
+        _run_async(_close_async_resources(), timeout=5.0)
+    except Exception:
+        pass
+
+
+atexit.register(_close_async_resources_at_exit)
+
+# Paragraph texts of converted documents by docId, in `.doc-paragraph` order.
+DOCUMENT_STORE_TTL_SECONDS = 2 * 60 * 60
+DOCUMENT_STORE_MAX_ENTRIES = 200
+document_store = {}
+document_store_lock = Lock()
+# Background summary jobs by docId and the count of reader-facing AI requests in
+# flight. Only touched from the shared event loop.
+summary_precompute_tasks = {}
+summary_precompute_semaphore = None
+interactive_ai_state = {"inflight": 0}
 LIVE_SESSION_TTL_SECONDS = 2 * 60 * 60
 LIVE_SESSION_MAX_ENTRIES = 200
 live_session_store = {}
 live_session_lock = Lock()
 live_screenshot_store = {}
+image_session_store = {}
+image_session_lock = Lock()
+# Pre-opened Gemini Live sessions per model. Only touched from the shared event loop.
+live_session_pool = {}
+live_session_pool_opening = {}
+live_session_pool_retry = {}
+live_session_pool_stats = {"hits": 0, "misses": 0, "opened": 0, "expired": 0, "stale": 0, "open_errors": 0}
+live_session_pool_task = None
+live_session_pool_wakeup = None
+live_session_pool_background_tasks = set()
+# Recent time-to-first-response (ms from attempt start) per live model, used for hedging.
+live_first_response_history = {}
+model_router_state = {}
+model_router_lock = Lock()
+# Per request kind: EWMA of what the model sends after the JSON object closes.
+stream_tail_stats = {}
+stream_tail_lock = Lock()
 ring_event_lock = Lock()
 ring_event_counter = 0
 ring_event_last_ts = 0.0
@@ -142,6 +521,11 @@ reading_mode_plan_cache_lock = Lock()
 reading_mode_url_cache = {}
 reading_mode_url_cache_loaded = False
 reading_mode_url_cache_lock = Lock()
+paragraph_ai_cache = OrderedDict()
+paragraph_ai_cache_lock = Lock()
+paragraph_ai_cache_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+# Fire-and-forget cache writes; held here so the loop cannot garbage-collect them mid-write.
+paragraph_ai_cache_write_tasks = set()
 
 
 def _set_cors_headers(response):
@@ -296,6 +680,123 @@ def _set_live_session_handle(conversation_id: str, handle: str):
         }
 
 
+def _prune_document_store(now_ts: float):
+    expired = [key for key, value in document_store.items() if now_ts - float(value.get("updated_at", 0)) > DOCUMENT_STORE_TTL_SECONDS]
+    for key in expired:
+        document_store.pop(key, None)
+    if len(document_store) <= DOCUMENT_STORE_MAX_ENTRIES:
+        return
+    ordered = sorted(document_store.items(), key=lambda item: float(item[1].get("updated_at", 0)))
+    for key, _value in ordered[: max(0, len(document_store) - DOCUMENT_STORE_MAX_ENTRIES)]:
+        document_store.pop(key, None)
+
+
+def _extract_document_paragraphs(html_content: str):
+    """Return the text of every `.doc-paragraph` element, matching what the viewer sends as `textContent`."""
+    if not html_content:
+        return []
+    root = lxml_html.fragment_fromstring(html_content, create_parent="div")
+    return [
+        element.text_content()
+        for element in root.xpath("//*[contains(concat(' ', normalize-space(@class), ' '), ' doc-paragraph ')]")
+    ]
+
+
+def _remember_document_paragraphs(doc_id: str, html_content: str, paragraphs=None):
+    if paragraphs is None:
+        paragraphs = _extract_document_paragraphs(html_content)
+    now_ts = time.time()
+    with document_store_lock:
+        _prune_document_store(now_ts)
+        document_store[doc_id] = {"paragraphs": paragraphs, "updated_at": now_ts}
+    return paragraphs
+
+
+def _get_document_paragraphs(doc_id: str):
+    now_ts = time.time()
+    with document_store_lock:
+        _prune_document_store(now_ts)
+        entry = document_store.get(str(doc_id or "").strip())
+        if entry is None:
+            return None
+        entry["updated_at"] = now_ts
+        return entry["paragraphs"]
+
+
+def _prune_image_session_store(now_ts: float):
+    # Uploaded Gemini files are not deleted here; the Files API expires them on its own.
+    expired = [key for key, value in image_session_store.items() if now_ts - float(value.get("updated_at", 0)) > IMAGE_SESSION_TTL_SECONDS]
+    for key in expired:
+        image_session_store.pop(key, None)
+    total_bytes = sum(len(value["bytes"]) for value in image_session_store.values())
+    if len(image_session_store) <= IMAGE_SESSION_MAX_ENTRIES and total_bytes <= IMAGE_SESSION_MAX_BYTES:
+        return
+    # Least recently used first, until both the entry and the byte budget hold.
+    ordered = sorted(image_session_store.items(), key=lambda item: float(item[1].get("updated_at", 0)))
+    for key, value in ordered:
+        if len(image_session_store) <= IMAGE_SESSION_MAX_ENTRIES and total_bytes <= IMAGE_SESSION_MAX_BYTES:
+            break
+        image_session_store.pop(key, None)
+        total_bytes -= len(value["bytes"])
+
+
+def _register_image_session(upload_bytes: bytes, upload_mime: str, *, image_hash: str, description: str = "") -> str:
+    """Keep an upload-ready image server-side and return its `imageSessionId`.
+
+    Returns "" when the image alone is larger than IMAGE_SESSION_MAX_MB.
+    """
+    if len(upload_bytes) > IMAGE_SESSION_MAX_BYTES:
+        return ""
+    session_id = uuid.uuid4().hex
+    now_ts = time.time()
+    with image_session_lock:
+        image_session_store[session_id] = {
+            "bytes": upload_bytes,
+            "mime_type": upload_mime,
+            "image_hash": image_hash,
+            "description": description,
+            "file_uri": "",
+            "file_uploaded_at": 0.0,
+            "created_at": now_ts,
+            "updated_at": now_ts,
+        }
+        _prune_image_session_store(now_ts)
+    return session_id
+
+
+def _get_image_session(session_id: str):
+    session_id = str(session_id or "").strip()
+    if not session_id:
+        return None
+    now_ts = time.time()
+    with image_session_lock:
+        _prune_image_session_store(now_ts)
+        entry = image_session_store.get(session_id)
+        if entry is None:
+            return None
+        entry["updated_at"] = now_ts
+        return entry
+
+
+async def _image_session_part(client, session: dict):
+    """Return the Gemini Part for a session image, uploading it to the Files API once when enabled."""
+    if IMAGE_SESSION_USE_FILES_API:
+        if session.get("file_uri") and time.time() - session["file_uploaded_at"] < IMAGE_SESSION_FILE_MAX_AGE_SECONDS:
+            return types.Part.from_uri(file_uri=session["file_uri"], mime_type=session["mime_type"]), "file_api"
+        try:
+            uploaded = await client.aio.files.upload(
+                file=io.BytesIO(session["bytes"]),
+                config=types.UploadFileConfig(mime_type=session["mime_type"]),
+            )
+            session["file_uri"] = str(uploaded.uri or "")
+            session["file_uploaded_at"] = time.time()
+            if session["file_uri"]:
+                return types.Part.from_uri(file_uri=session["file_uri"], mime_type=session["mime_type"]), "file_api_upload"
+        except Exception as e:
+            _log_gemini_event("image_session_upload_error", error_type=type(e).__name__, error_message=str(e)[:240])
+    return types.Part.from_bytes(data=session["bytes"], mime_type=session["mime_type"]), "inline"
+
+
 def _prune_reading_mode_plan_cache(now_ts: float):
     stale_keys = [
         cache_key
@@ -456,6 +957,119 @@ def _set_cached_reading_mode_plan_by_url(page_url: str, payload: dict):
         _persist_reading_mode_url_cache_locked()
 
 
+def _normalize_paragraph_text(text: str) -> str:
+    return " ".join(str(text or "").split())
+
+
+def _paragraph_ai_cache_key(kind: str, prompt_version: str, model_name: str, text: str, writing_sample: str = "") -> str:
+    sample_hash = hashlib.sha256(_normalize_paragraph_text(writing_sample).encode("utf-8")).hexdigest() if writing_sample else ""
+    seed = json.dumps(
+        [kind, prompt_version, model_name, _normalize_paragraph_text(text), sample_hash],
+        ensure_ascii=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(seed.encode("utf-8")).hexdigest()
+
+
+def _prune_paragraph_ai_cache_locked(now_ts: float):
+    while paragraph_ai_cache:
+        oldest_key, oldest_entry = next(iter(paragraph_ai_cache.items()))
+        expired = now_ts - float(oldest_entry.get("stored_at", 0.0)) > PARAGRAPH_AI_CACHE_TTL_SECONDS
+        if not expired and len(paragraph_ai_cache) <= PARAGRAPH_AI_CACHE_MAX_ENTRIES:
+            break
+        paragraph_ai_cache.pop(oldest_key, None)
+
+
+def _read_paragraph_ai_cache_file(cache_key: str):
+    entry = _read_cached_json(paragraph_ai_disk_cache, cache_key)
+    if entry is None or not isinstance(entry.get("payload"), dict):
+        return None
+    if time.time() - float(entry.get("stored_at", 0.0) or 0.0) > PARAGRAPH_AI_CACHE_TTL_SECONDS:
+        paragraph_ai_disk_cache.delete(cache_key)
+        return None
+    return entry
+
+
+async def _get_cached_paragraph_ai_result(cache_key: str):
+    """Return `(payload, tier)` for a cached summary/rephrase, or `(None, "")` on a miss."""
+    if PARAGRAPH_AI_CACHE_MAX_ENTRIES <= 0 or PARAGRAPH_AI_CACHE_TTL_SECONDS <= 0:
+        return None, ""
+    now_ts = time.time()
+    with paragraph_ai_cache_lock:
+        _prune_paragraph_ai_cache_locked(now_ts)
+        entry = paragraph_ai_cache.get(cache_key)
+        if entry is not None:
+            paragraph_ai_cache.move_to_end(cache_key)
+            paragraph_ai_cache_stats["memory_hits"] += 1
+            return json.loads(entry["payload_json"]), "memory"
+
+    if PARAGRAPH_AI_CACHE_DISK_ENABLED:
+        disk_entry = await asyncio.to_thread(_read_paragraph_ai_cache_file, cache_key)
+        if disk_entry is not None:
+            payload = disk_entry["payload"]
+            with paragraph_ai_cache_lock:
+                paragraph_ai_cache[cache_key] = {
+                    "payload_json": json.dumps(payload, separators=(",", ":")),
+                    "stored_at": float(disk_entry.get("stored_at", now_ts) or now_ts),
+                }
+                paragraph_ai_cache.move_to_end(cache_key)
+                _prune_paragraph_ai_cache_locked(now_ts)
+                paragraph_ai_cache_stats["disk_hits"] += 1
+            return payload, "disk"
+
+    with paragraph_ai_cache_lock:
+        paragraph_ai_cache_stats["misses"] += 1
+    return None, ""
+
+
+async def _set_cached_paragraph_ai_result(cache_key: str, payload: dict):
+    if PARAGRAPH_AI_CACHE_MAX_ENTRIES <= 0 or PARAGRAPH_AI_CACHE_TTL_SECONDS <= 0 or not isinstance(payload, dict):
+        return
+    now_ts = time.time()
+    with paragraph_ai_cache_lock:
+        # Stored serialised so callers can never mutate a cached answer in place.
+        paragraph_ai_cache[cache_key] = {
+            "payload_json": json.dumps(payload, separators=(",", ":")),
+            "stored_at": now_ts,
+        }
+        paragraph_ai_cache.move_to_end(cache_key)
+        _prune_paragraph_ai_cache_locked(now_ts)
+    if PARAGRAPH_AI_CACHE_DISK_ENABLED:
+        await asyncio.to_thread(_write_cached_json, paragraph_ai_disk_cache, cache_key, {"payload": payload, "stored_at": now_ts})
+
+
+def _finish_paragraph_ai_cache_write(task):
+    paragraph_ai_cache_write_tasks.discard(task)
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        _log_gemini_event("paragraph_ai_cache_write_error", error_type=type(exc).__name__, error_message=str(exc)[:240])
+
+
+def _spawn_paragraph_ai_cache_write(cache_key: str, payload: dict):
+    """Cache a result without waiting for the disk write; failures are logged, not raised."""
+    task = asyncio.get_running_loop().create_task(_set_cached_paragraph_ai_result(cache_key, payload))
+    paragraph_ai_cache_write_tasks.add(task)
+    task.add_done_callback(_finish_paragraph_ai_cache_write)
+    return task
+
+
+def _paragraph_ai_cache_debug(cache_key: str, tier: str, started_at: float) -> dict:
+    with paragraph_ai_cache_lock:
+        stats = dict(paragraph_ai_cache_stats)
+        entries = len(paragraph_ai_cache)
+    return {
+        "cacheHit": bool(tier),
+        "cacheTier": tier,
+        "cacheKey": cache_key[:16],
+        "cacheHits": stats["memory_hits"] + stats["disk_hits"],
+        "cacheMisses": stats["misses"],
+        "cacheEntries": entries,
+        "durationMs": round((time.perf_counter() - started_at) * 1000, 1),
+    }
+
+
 def _clean_ai_json_text(response_text: str) -> str:
     response_text = (response_text or "").strip()
     if response_text.startswith("```"):
@@ -468,36 +1082,196 @@ def _clean_ai_json_text(response_text: str) -> str:
     return response_text
 
 
-def _extract_first_json_object_text(response_text: str) -> str:
-    text = str(response_text or "")
-    start = text.find("{")
-    if start < 0:
-        return ""
+class _JsonObjectScanner:
+    """Brace- and string-aware scanner that finds the first top-level JSON object in streamed text.
 
-    depth = 0
-    in_string = False
-    escape = False
-    for index in range(start, len(text)):
-        ch = text[index]
-        if in_string:
-            if escape:
-                escape = False
+    `feed` returns True once the object has closed; `object_text` then holds it.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.start = -1
+        self.end = -1
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def complete(self) -> bool:
+        return self.end >= 0
+
+    @property
+    def object_text(self) -> str:
+        return self.text[self.start:self.end] if self.complete else ""
+
+    def feed(self, chunk: str) -> bool:
+        if self.complete:
+            return True
+        self.text += str(chunk or "")
+        text = self.text
+        if self.start < 0:
+            self.start = text.find("{", self._pos)
+            if self.start < 0:
+                self._pos = len(text)
+                return False
+            self._pos = self.start
+
+        for index in range(self._pos, len(text)):
+            ch = text[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == "\"":
+                    self._in_string = False
+                continue
+            if ch == "\"":
+                self._in_string = True
+                continue
+            if ch == "{":
+                self._depth += 1
+                continue
+            if ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.end = index + 1
+                    return True
+        self._pos = len(text)
+        return False
+
+
+def _extract_first_json_object_text(response_text: str) -> str:
+    scanner = _JsonObjectScanner()
+    scanner.feed(response_text)
+    return scanner.object_text
+
+
+def _record_stream_tail(request_kind: str, tail_ms: float, tail_chars: int):
+    alpha = 0.2
+    with stream_tail_lock:
+        entry = stream_tail_stats.get(request_kind)
+        if entry is None:
+            stream_tail_stats[request_kind] = {"samples": 1, "tail_ms": tail_ms, "tail_chars": float(tail_chars)}
+            return
+        entry["samples"] += 1
+        entry["tail_ms"] = (1.0 - alpha) * entry["tail_ms"] + alpha * tail_ms
+        entry["tail_chars"] = (1.0 - alpha) * entry["tail_chars"] + alpha * tail_chars
+
+
+def _get_stream_tail_estimate(request_kind: str) -> dict:
+    with stream_tail_lock:
+        return dict(stream_tail_stats.get(request_kind) or {"samples": 0, "tail_ms": 0.0, "tail_chars": 0.0})
+
+
+class IncrementalJsonParser:
+    """Push parser that reports JSON values inside a streamed object as soon as they close.
+
+    Feed raw model text in chunks. Anything before the first "{" (prose, a ```
+    fence) is skipped. `on_value(path, value)` is called for every completed
+    value whose path from the top-level object is at most `max_depth` long,
+    e.g. ("bullets", 2) or ("rephrased",). `complete` turns True once the
+    top-level object closes; later text is ignored.
+    """
+
+    def __init__(self, on_value, *, max_depth: int = 2):
+        self.on_value = on_value
+        self.max_depth = max_depth
+        self.text = ""
+        self.started = False
+        self.complete = False
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._scalar_start = -1
+
+    def feed(self, chunk: str):
+        if self.complete or not chunk:
+            return
+        self.text += chunk
+        text = self.text
+        for index in range(self._pos, len(text)):
+            if self.complete:
+                break
+            self._step(text, index, text[index])
+        self._pos = len(text)
+
+    def _path(self):
+        return tuple(frame["key"] if frame["kind"] == "obj" else frame["index"] for frame in self._stack)
+
+    def _value_done(self, raw: str):
+        frame = self._stack[-1]
+        frame["state"] = "comma"
+        path = self._path()
+        if len(path) > self.max_depth:
+            return
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        self.on_value(path, value)
+
+    def _step(self, text: str, index: int, ch: str):
+        if not self.started:
+            if ch == "{":
+                self.started = True
+                self._stack.append({"kind": "obj", "key": None, "index": 0, "state": "key", "value_start": -1})
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
             elif ch == "\\":
-                escape = True
+                self._escape = True
             elif ch == "\"":
-                in_string = False
-            continue
+                self._in_string = False
+                raw = text[self._string_start:index + 1]
+                frame = self._stack[-1]
+                if frame["kind"] == "obj" and frame["state"] == "key":
+                    try:
+                        frame["key"] = json.loads(raw)
+                    except ValueError:
+                        frame["key"] = raw.strip('"')
+                    frame["state"] = "colon"
+                else:
+                    self._value_done(raw)
+            return
+
+        if self._scalar_start >= 0:
+            if ch not in ",]}" and not ch.isspace():
+                return
+            raw = text[self._scalar_start:index]
+            self._scalar_start = -1
+            self._value_done(raw)
+
+        if ch.isspace():
+            return
+        frame = self._stack[-1]
         if ch == "\"":
-            in_string = True
-            continue
-        if ch == "{":
-            depth += 1
-            continue
-        if ch == "}":
-            depth -= 1
-            if depth == 0:
-                return text[start:index + 1]
-    return ""
+            self._in_string = True
+            self._string_start = index
+        elif ch == ":":
+            frame["state"] = "value"
+        elif ch == ",":
+            if frame["kind"] == "arr":
+                frame["index"] += 1
+            frame["state"] = "key" if frame["kind"] == "obj" else "value"
+        elif ch in "{[":
+            frame["value_start"] = index
+            kind = "obj" if ch == "{" else "arr"
+            self._stack.append({"kind": kind, "key": None, "index": 0, "state": "key" if kind == "obj" else "value", "value_start": -1})
+        elif ch in "}]":
+            self._stack.pop()
+            if not self._stack:
+                self.complete = True
+                return
+            parent = self._stack[-1]
+            self._value_done(text[parent["value_start"]:index + 1])
+        else:
+            self._scalar_start = index
 
 
 def _normalize_selector_list(raw_value, *, max_items: int):
@@ -1058,124 +1832,865 @@ def _parse_relaxed_reading_mode_payload(response_text: str):
     }
 
 
-def _decode_data_url(data_url: str):
-    match = re.match(r"^data:(?P<mime>[^;,]+)?(?P<b64>;base64)?,(?P<data>.*)$", data_url, re.DOTALL)
-    if not match:
-        raise ValueError("Invalid data URL")
-
-    mime_type = (match.group("mime") or "image/png").strip()
-    payload = match.group("data") or ""
-    if match.group("b64"):
-        image_bytes = base64.b64decode(payload)
-    else:
-        image_bytes = urllib.parse.unquote_to_bytes(payload)
-    return image_bytes, mime_type
+class DiskLruCache:
+    """Bounded on-disk key/value store with least-recently-used eviction.
+
+    Values are opaque bytes stored one file per key under `directory`; the
+    recency order is kept in memory and rebuilt from file mtimes on first use,
+    so it survives restarts. Safe to share between threads.
+    """
+
+    def __init__(self, directory: Path, *, max_entries: int, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._lock = Lock()
+        self._index = None
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path_for(self, name: str) -> Path:
+        return self.directory / name[:2] / name
+
+    @staticmethod
+    def _name_for(key: str) -> str:
+        return hashlib.sha256(str(key).encode("utf-8")).hexdigest()
+
+    def _load_index_locked(self):
+        if self._index is not None:
+            return
+        entries = []
+        if self.directory.exists():
+            for path in self.directory.glob("*/*"):
+                if path.suffix == ".tmp":
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path.name, stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((name, size) for _mtime, name, size in entries)
+        self._total_bytes = sum(size for _mtime, _name, size in entries)
+        self._evict_locked()
+
+    def _evict_locked(self):
+        while self._index and (len(self._index) > self.max_entries or self._total_bytes > self.max_bytes):
+            name, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                self._path_for(name).unlink()
+            except OSError:
+                pass
 
+    def get(self, key: str):
+        name = self._name_for(key)
+        path = self._path_for(name)
+        with self._lock:
+            self._load_index_locked()
+            if name not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(name)
+        try:
+            value = path.read_bytes()
+        except OSError:
+            with self._lock:
+                self._total_bytes -= self._index.pop(name, 0)
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes):
+        name = self._name_for(key)
+        path = self._path_for(name)
+        value = bytes(value)
+        with self._lock:
+            self._load_index_locked()
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = path.with_name(f"{name}.{uuid.uuid4().hex[:8]}.tmp")
+                temp_path.write_bytes(value)
+                temp_path.replace(path)
+            except OSError:
+                return
+            self._total_bytes -= self._index.pop(name, 0)
+            self._index[name] = len(value)
+            self._total_bytes += len(value)
+            self._evict_locked()
+
+    def delete(self, key: str):
+        name = self._name_for(key)
+        with self._lock:
+            self._load_index_locked()
+            self._total_bytes -= self._index.pop(name, 0)
+            try:
+                self._path_for(name).unlink()
+            except OSError:
+                pass
 
-def _load_web_image_payload(data: dict):
-    image_data = data.get("imageData")
-    content_type = (data.get("contentType") or "").split(";", 1)[0].strip()
-    image_url = (data.get("imageUrl") or "").strip()
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._index or {}),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
 
-    if image_data:
-        image_bytes = base64.b64decode(image_data)
-        if not content_type:
-            content_type = "image/jpeg"
-    elif image_url:
-        if image_url.startswith("data:"):
-            image_bytes, content_type = _decode_data_url(image_url)
-        else:
-            response = httpx.get(
-                image_url,
-                follow_redirects=True,
-                timeout=20.0,
-                headers={"User-Agent": "AQual/1.0"},
-            )
-            response.raise_for_status()
-            image_bytes = response.content
-            content_type = (response.headers.get("content-type") or "image/jpeg").split(";", 1)[0].strip()
-    else:
-        raise ValueError("No image input provided")
 
-    if not image_bytes:
-        raise ValueError("Image is empty")
-    if len(image_bytes) > 15 * 1024 * 1024:
-        raise ValueError("Image is too large")
-    if not content_type.startswith("image/"):
-        content_type = "image/jpeg"
+class DocumentArtifactStore:
+    """Bounded store for converted-document artifacts (images), shared by worker processes.
+
+    Blobs are content addressed and written once under `directory/blobs`, each
+    file holding its content type, a newline and the raw bytes, so every
+    worker process can serve any document's images. A per-process LRU keeps
+    hot blobs in memory within `memory_bytes`.
+
+    Each document has a manifest under `directory/docs` listing its blobs.
+    Manifests expire `ttl_seconds` after last use or when the document is
+    closed; blobs no longer referenced are then removed, and when the disk
+    tier exceeds `disk_bytes` the least recently used documents go first.
+    """
+
+    # Unreferenced blobs younger than this are kept: a concurrent conversion
+    # may have written them but not yet its manifest.
+    GC_GRACE_SECONDS = 300.0
+    PRUNE_INTERVAL_SECONDS = 60.0
+    HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+    DOC_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+    def __init__(self, directory: Path, *, memory_bytes: int, disk_bytes: int, ttl_seconds: float):
+        self.directory = Path(directory)
+        self.blob_dir = self.directory / "blobs"
+        self.doc_dir = self.directory / "docs"
+        self.memory_bytes = max(0, int(memory_bytes))
+        self.disk_bytes = max(1, int(disk_bytes))
+        self.ttl_seconds = float(ttl_seconds)
+        self._lock = Lock()
+        self._memory = OrderedDict()  # hash -> (content_type, bytes)
+        self._memory_total = 0
+        self._last_prune = 0.0
+        self._disk = {"documents": 0, "blobs": 0, "bytes": 0}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _blob_path(self, image_hash: str) -> Path:
+        return self.blob_dir / image_hash[:2] / image_hash
+
+    def _doc_path(self, doc_id: str) -> Path:
+        return self.doc_dir / f"{doc_id}.json"
+
+    @staticmethod
+    def _write_atomic(path: Path, payload: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        temp_path.write_bytes(payload)
+        temp_path.replace(path)
+
+    def _remember_locked(self, image_hash: str, content_type: str, data: bytes):
+        if len(data) > self.memory_bytes:
+            return
+        previous = self._memory.pop(image_hash, None)
+        if previous is not None:
+            self._memory_total -= len(previous[1])
+        self._memory[image_hash] = (content_type, data)
+        self._memory_total += len(data)
+        while self._memory_total > self.memory_bytes:
+            _hash, (_content_type, evicted) = self._memory.popitem(last=False)
+            self._memory_total -= len(evicted)
+
+    def put(self, data: bytes, content_type: str) -> str:
+        """Store a blob and return its sha256 hex digest."""
+        data = bytes(data)
+        image_hash = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(image_hash)
+        try:
+            if path.exists():
+                os.utime(path)
+            else:
+                self._write_atomic(path, content_type.encode("ascii", "replace") + b"\n" + data)
+        except OSError as exc:
+            app.logger.warning("artifact store write failed for %s: %s", image_hash, exc)
+        with self._lock:
+            self._remember_locked(image_hash, content_type, data)
+        self._maybe_prune()
+        return image_hash
+
+    def _read_blob(self, image_hash: str):
+        path = self._blob_path(image_hash)
+        try:
+            with open(path, "rb") as handle:
+                content_type = handle.readline()
+                if not content_type.endswith(b"\n"):
+                    return None
+                data = handle.read()
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return content_type[:-1].decode("ascii", "replace"), data
 
-    return image_bytes, content_type
+    def get(self, image_hash: str):
+        """Return (content_type, bytes) for a blob, or None when unknown or evicted."""
+        image_hash = str(image_hash or "").strip().lower()
+        if not self.HASH_RE.match(image_hash):
+            return None
+        with self._lock:
+            entry = self._memory.get(image_hash)
+            if entry is not None:
+                self._memory.move_to_end(image_hash)
+                self.memory_hits += 1
+                return entry
+        entry = self._read_blob(image_hash)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember_locked(image_hash, *entry)
+        return entry
+
+    def register_document(self, doc_id: str, image_hashes):
+        if not self.DOC_ID_RE.match(str(doc_id or "")):
+            return
+        manifest = {"docId": doc_id, "images": list(dict.fromkeys(image_hashes)), "createdAt": time.time()}
+        try:
+            self._write_atomic(self._doc_path(doc_id), json.dumps(manifest, separators=(",", ":")).encode("utf-8"))
+        except OSError as exc:
+            app.logger.warning("artifact store manifest write failed for %s: %s", doc_id, exc)
+        self._maybe_prune()
+
+    def document_images(self, doc_id: str):
+        """Blob hashes of a live document (refreshing its TTL), or None when unknown or expired."""
+        doc_id = str(doc_id or "").strip()
+        if not self.DOC_ID_RE.match(doc_id):
+            return None
+        path = self._doc_path(doc_id)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                path.unlink()
+                return None
+            manifest = json.loads(path.read_bytes())
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return list(manifest.get("images") or [])
+
+    def has(self, image_hash: str) -> bool:
+        """True while a blob is still stored, without reading it."""
+        image_hash = str(image_hash or "").strip().lower()
+        if not self.HASH_RE.match(image_hash):
+            return False
+        with self._lock:
+            if image_hash in self._memory:
+                return True
+        return self._blob_path(image_hash).exists()
+
+    def drop_document(self, doc_id: str) -> bool:
+        doc_id = str(doc_id or "").strip()
+        if not self.DOC_ID_RE.match(doc_id):
+            return False
+        try:
+            self._doc_path(doc_id).unlink()
+        except OSError:
+            return False
+        return True
 
+    def _maybe_prune(self, force: bool = False):
+        now_ts = time.time()
+        with self._lock:
+            if not force and now_ts - self._last_prune < self.PRUNE_INTERVAL_SECONDS:
+                return
+            self._last_prune = now_ts
+        try:
+            self._prune(now_ts)
+        except OSError as exc:
+            app.logger.warning("artifact store prune failed: %s", exc)
+
+    def _prune(self, now_ts: float):
+        # Filesystem only and tolerant of other workers pruning at the same time.
+        documents = []
+        for path in self.doc_dir.glob("*.json"):
+            try:
+                mtime = path.stat().st_mtime
+                if now_ts - mtime > self.ttl_seconds:
+                    path.unlink()
+                    continue
+                images = json.loads(path.read_bytes()).get("images") or []
+            except (OSError, ValueError):
+                continue
+            documents.append((mtime, path, set(images)))
 
-def _load_live_audio_payload(data: dict):
-    audio_data = (data.get("audioData") or "").strip()
-    audio_mime_type = (data.get("audioMimeType") or "audio/pcm;rate=24000").strip()
-    if not audio_data:
-        raise ValueError("No audio input provided")
+        blobs = {}
+        for path in self.blob_dir.glob("*/*"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path.suffix == ".tmp":
+                if now_ts - stat.st_mtime > self.GC_GRACE_SECONDS:
+                    path.unlink(missing_ok=True)
+                continue
+            blobs[path.name] = (stat.st_mtime, stat.st_size, path)
+
+        references = {}
+        for _mtime, _path, images in documents:
+            for image_hash in images:
+                references[image_hash] = references.get(image_hash, 0) + 1
+
+        evicted = 0
+
+        def remove_blob(image_hash):
+            nonlocal evicted
+            _mtime, _size, blob_path = blobs.pop(image_hash)
+            blob_path.unlink(missing_ok=True)
+            evicted += 1
+
+        for image_hash, (mtime, _size, _path) in list(blobs.items()):
+            if image_hash not in references and now_ts - mtime > self.GC_GRACE_SECONDS:
+                remove_blob(image_hash)
+
+        # Still over budget: expire the least recently used documents and the blobs only they use.
+        documents.sort(key=lambda item: item[0])
+        total_bytes = sum(size for _mtime, size, _path in blobs.values())
+        while total_bytes > self.disk_bytes and documents:
+            _mtime, doc_path, images = documents.pop(0)
+            doc_path.unlink(missing_ok=True)
+            for image_hash in images:
+                references[image_hash] -= 1
+                if references[image_hash] == 0 and image_hash in blobs:
+                    total_bytes -= blobs[image_hash][1]
+                    remove_blob(image_hash)
+
+        with self._lock:
+            self._disk = {"documents": len(documents), "blobs": len(blobs), "bytes": total_bytes}
+            self.evictions += evicted
+
+    def stats(self) -> dict:
+        self._maybe_prune()
+        with self._lock:
+            return {
+                "memoryEntries": len(self._memory),
+                "memoryBytes": self._memory_total,
+                "maxMemoryBytes": self.memory_bytes,
+                "disk": dict(self._disk),
+                "maxDiskBytes": self.disk_bytes,
+                "ttlSeconds": self.ttl_seconds,
+                "memoryHits": self.memory_hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
 
-    try:
-        audio_bytes = base64.b64decode(audio_data, validate=True)
-    except Exception:
-        raise ValueError("Invalid base64 audio payload")
 
-    if not audio_bytes:
-        raise ValueError("Audio is empty")
-    if len(audio_bytes) > 15 * 1024 * 1024:
-        raise ValueError("Audio payload is too large")
-    if not audio_mime_type:
-        audio_mime_type = "audio/pcm;rate=24000"
-    return audio_bytes, audio_mime_type
+document_artifact_store = DocumentArtifactStore(
+    ARTIFACT_STORE_DIR,
+    memory_bytes=ARTIFACT_STORE_MEMORY_MB * 1024 * 1024,
+    disk_bytes=ARTIFACT_STORE_DISK_MB * 1024 * 1024,
+    ttl_seconds=ARTIFACT_STORE_TTL_SECONDS,
+)
 
 
-def _load_live_screenshot_payload(data: dict):
-    screenshot_data_url = (data.get("screenshotDataUrl") or "").strip()
-    screenshot_data = (data.get("screenshotData") or "").strip()
-    screenshot_mime_type = (data.get("screenshotMimeType") or "image/png").split(";", 1)[0].strip()
+paragraph_ai_disk_cache = DiskLruCache(
+    PARAGRAPH_AI_CACHE_DIR,
+    max_entries=PARAGRAPH_AI_CACHE_DISK_MAX_ENTRIES,
+    max_bytes=PARAGRAPH_AI_CACHE_DISK_MAX_MB * 1024 * 1024,
+)
 
-    if screenshot_data_url:
-        if not screenshot_data_url.startswith("data:"):
-            raise ValueError("Screenshot must be provided as a data URL")
-        screenshot_bytes, screenshot_mime_type = _decode_data_url(screenshot_data_url)
-    elif screenshot_data:
-        try:
-            screenshot_bytes = base64.b64decode(screenshot_data, validate=True)
-        except Exception:
-            raise ValueError("Invalid base64 screenshot payload")
-    else:
-        raise ValueError("No screenshot provided")
 
-    if not screenshot_bytes:
-        raise ValueError("Screenshot is empty")
-    if len(screenshot_bytes) > 15 * 1024 * 1024:
-        raise ValueError("Screenshot is too large")
-    if not screenshot_mime_type.startswith("image/"):
-        screenshot_mime_type = "image/png"
-    return screenshot_bytes, screenshot_mime_type
+image_description_cache = DiskLruCache(
+    IMAGE_DESCRIPTION_CACHE_DIR,
+    max_entries=IMAGE_DESCRIPTION_CACHE_MAX_ENTRIES,
+    max_bytes=IMAGE_DESCRIPTION_CACHE_MAX_MB * 1024 * 1024,
+)
 
 
-def _iter_live_models():
-    ordered = [GEMINI_LIVE_MODEL] + list(GEMINI_LIVE_MODEL_FALLBACKS)
-    seen = set()
-    for model_name in ordered:
-        token = str(model_name or "").strip()
-        if not token or token in seen:
-            continue
-        seen.add(token)
-        yield token
+def _image_description_key(image_hash: str, kind: str, hint_block: str = "") -> str:
+    # On-page hints change the prompt, so they are part of the key.
+    hint_hash = hashlib.sha256(hint_block.encode("utf-8")).hexdigest()[:16] if hint_block else ""
+    return f"desc|{IMAGE_DESCRIPTION_PROMPT_VERSION}|{GEMINI_MODEL}|{kind}|{image_hash}|{hint_hash}"
 
 
-def _normalize_reading_mode_model_name(model_name: str) -> str:
-    token = str(model_name or "").strip()
-    if not token:
-        return ""
-    alias_map = {
-        "gemini-3.0-flash": "gemini-3-flash-preview",
-        "gemini-3-flash": "gemini-3-flash-preview",
-    }
-    return alias_map.get(token.lower(), token)
+def _image_url_index_key(image_url: str) -> str:
+    return f"url|{image_url}"
 
 
-def _iter_reading_mode_models():
+def _read_cached_json(cache: DiskLruCache, key: str):
+    raw = cache.get(key)
+    if raw is None:
+        return None
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        cache.delete(key)
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def _write_cached_json(cache: DiskLruCache, key: str, value: dict):
+    cache.set(key, json.dumps(value, ensure_ascii=True, separators=(",", ":")).encode("utf-8"))
+
+
+async def _get_cached_image_description(image_hash: str, kind: str, hint_block: str = ""):
+    if not IMAGE_DESCRIPTION_CACHE_ENABLED or not image_hash:
+        return ""
+    entry = await asyncio.to_thread(_read_cached_json, image_description_cache, _image_description_key(image_hash, kind, hint_block))
+    return str((entry or {}).get("description") or "").strip()
+
+
+async def _set_cached_image_description(image_hash: str, kind: str, description: str, hint_block: str = ""):
+    if not IMAGE_DESCRIPTION_CACHE_ENABLED or not image_hash or not description:
+        return
+    await asyncio.to_thread(
+        _write_cached_json,
+        image_description_cache,
+        _image_description_key(image_hash, kind, hint_block),
+        {"description": description, "stored_at": time.time()},
+    )
+
+
+async def _remember_image_url(image_url: str, image_hash: str, source_info: dict):
+    """Index a remote image URL by its validators so later requests can skip the download."""
+    etag = str(source_info.get("etag") or "")
+    last_modified = str(source_info.get("last_modified") or "")
+    if not IMAGE_DESCRIPTION_CACHE_ENABLED or not image_hash or not (etag or last_modified):
+        return
+    await asyncio.to_thread(
+        _write_cached_json,
+        image_description_cache,
+        _image_url_index_key(image_url),
+        {"image_hash": image_hash, "etag": etag, "last_modified": last_modified, "checked_at": time.time()},
+    )
+
+
+async def _lookup_image_hash_by_url(image_url: str) -> str:
+    """Return the content hash last seen at `image_url` if it is known to be unchanged.
+
+    Within the revalidation window the stored validators are trusted as-is;
+    after it, a HEAD request must return the same ETag or Last-Modified.
+    """
+    if not IMAGE_DESCRIPTION_CACHE_ENABLED:
+        return ""
+    index_key = _image_url_index_key(image_url)
+    entry = await asyncio.to_thread(_read_cached_json, image_description_cache, index_key)
+    if not entry or not entry.get("image_hash"):
+        return ""
+    if time.time() - float(entry.get("checked_at", 0.0) or 0.0) <= IMAGE_DESCRIPTION_URL_REVALIDATE_SECONDS:
+        return str(entry["image_hash"])
+
+    try:
+        response = await _get_async_http_client().head(
+            image_url,
+            follow_redirects=True,
+            timeout=httpx.Timeout(5.0, connect=HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS),
+        )
+    except httpx.HTTPError:
+        return ""
+    if response.status_code >= 400:
+        return ""
+    etag = str(response.headers.get("etag") or "")
+    last_modified = str(response.headers.get("last-modified") or "")
+    unchanged = (etag and etag == entry.get("etag")) or (
+        not etag and last_modified and last_modified == entry.get("last_modified")
+    )
+    if not unchanged:
+        return ""
+    entry["checked_at"] = time.time()
+    await asyncio.to_thread(_write_cached_json, image_description_cache, index_key, entry)
+    return str(entry["image_hash"])
+
+
+image_fetch_cache = DiskLruCache(
+    IMAGE_FETCH_CACHE_DIR,
+    max_entries=IMAGE_FETCH_CACHE_MAX_ENTRIES,
+    max_bytes=IMAGE_FETCH_CACHE_MAX_MB * 1024 * 1024,
+)
+# In-flight remote image fetches by URL. Only touched from the shared event loop.
+image_fetch_inflight = {}
+image_fetch_stats = {"fresh": 0, "revalidated": 0, "downloaded": 0, "coalesced": 0, "rejected_too_large": 0}
+
+
+def _pack_cache_entry(meta: dict, body: bytes) -> bytes:
+    return json.dumps(meta, ensure_ascii=True, separators=(",", ":")).encode("utf-8") + b"\n" + body
+
+
+def _unpack_cache_entry(raw):
+    if not raw:
+        return None, b""
+    header, sep, body = raw.partition(b"\n")
+    if not sep:
+        return None, b""
+    try:
+        meta = json.loads(header)
+    except ValueError:
+        return None, b""
+    return (meta if isinstance(meta, dict) else None), body
+
+
+def _parse_cache_control(value: str) -> dict:
+    directives = {}
+    for part in str(value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip().strip('"')
+    return directives
+
+
+async def _download_remote_image(image_url: str) -> dict:
+    cached_meta, cached_body = (None, b"")
+    if IMAGE_FETCH_CACHE_ENABLED:
+        raw = await asyncio.to_thread(image_fetch_cache.get, image_url)
+        cached_meta, cached_body = _unpack_cache_entry(raw)
+
+    if cached_meta is not None:
+        fresh_until = float(cached_meta.get("fresh_until", 0.0) or 0.0)
+        if time.time() < fresh_until:
+            image_fetch_stats["fresh"] += 1
+            return {**cached_meta, "bytes": cached_body, "cache": "fresh"}
+
+    request_headers = {}
+    if cached_meta is not None:
+        if cached_meta.get("etag"):
+            request_headers["If-None-Match"] = cached_meta["etag"]
+        if cached_meta.get("last_modified"):
+            request_headers["If-Modified-Since"] = cached_meta["last_modified"]
+
+    client = _get_async_http_client()
+    async with client.stream(
+        "GET",
+        image_url,
+        headers=request_headers,
+        follow_redirects=True,
+        timeout=httpx.Timeout(IMAGE_FETCH_TIMEOUT_SECONDS, connect=HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS),
+    ) as response:
+        cache_control = _parse_cache_control(response.headers.get("cache-control"))
+        max_age = cache_control.get("max-age", "")
+        fresh_until = time.time() + int(max_age) if max_age.isdigit() and "no-cache" not in cache_control else 0.0
+
+        if response.status_code == 304 and cached_meta is not None:
+            image_fetch_stats["revalidated"] += 1
+            meta = {
+                **cached_meta,
+                "etag": response.headers.get("etag") or cached_meta.get("etag", ""),
+                "last_modified": response.headers.get("last-modified") or cached_meta.get("last_modified", ""),
+                "fresh_until": fresh_until,
+            }
+            if IMAGE_FETCH_CACHE_ENABLED:
+                await asyncio.to_thread(image_fetch_cache.set, image_url, _pack_cache_entry(meta, cached_body))
+            return {**meta, "bytes": cached_body, "cache": "revalidated"}
+
+        response.raise_for_status()
+        declared_length = response.headers.get("content-length", "")
+        if declared_length.isdigit() and int(declared_length) > IMAGE_FETCH_MAX_BYTES:
+            image_fetch_stats["rejected_too_large"] += 1
+            raise ValueError("Image is too large")
+
+        chunks = []
+        received = 0
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            if received > IMAGE_FETCH_MAX_BYTES:
+                image_fetch_stats["rejected_too_large"] += 1
+                raise ValueError("Image is too large")
+            chunks.append(chunk)
+        body = b"".join(chunks)
+
+        meta = {
+            "content_type": (response.headers.get("content-type") or "image/jpeg").split(";", 1)[0].strip(),
+            "etag": response.headers.get("etag") or "",
+            "last_modified": response.headers.get("last-modified") or "",
+            "fresh_until": fresh_until,
+        }
+
+    image_fetch_stats["downloaded"] += 1
+    cacheable = "no-store" not in cache_control and (meta["etag"] or meta["last_modified"] or fresh_until)
+    if IMAGE_FETCH_CACHE_ENABLED and body and cacheable:
+        await asyncio.to_thread(image_fetch_cache.set, image_url, _pack_cache_entry(meta, body))
+    return {**meta, "bytes": body, "cache": "miss"}
+
+
+def _finish_image_fetch(image_url: str, task):
+    image_fetch_inflight.pop(image_url, None)
+    if not task.cancelled():
+        # Retrieve the exception so a fetch whose callers all left is not reported as unhandled.
+        task.exception()
+
+
+async def _fetch_remote_image(image_url: str) -> dict:
+    """Fetch a remote image through the disk HTTP cache, sharing concurrent fetches of one URL.
+
+    Returns a dict with `bytes`, `content_type`, `etag`, `last_modified` and
+    `cache` ("fresh", "revalidated", "miss" or "coalesced"). Raises ValueError
+    as soon as the body is known to exceed IMAGE_FETCH_MAX_BYTES.
+    """
+    task = image_fetch_inflight.get(image_url)
+    if task is not None:
+        image_fetch_stats["coalesced"] += 1
+        result = await asyncio.shield(task)
+        return {**result, "cache": "coalesced"}
+
+    task = asyncio.ensure_future(_download_remote_image(image_url))
+    image_fetch_inflight[image_url] = task
+    task.add_done_callback(lambda _task: _finish_image_fetch(image_url, _task))
+    # Shielded so one caller disconnecting does not cancel the fetch for the others.
+    return await asyncio.shield(task)
+
+
+image_normalize_cache = DiskLruCache(
+    IMAGE_NORMALIZE_CACHE_DIR,
+    max_entries=100000,
+    max_bytes=IMAGE_NORMALIZE_CACHE_MAX_MB * 1024 * 1024,
+)
+
+
+def _encode_normalized_image(image, fmt: str, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "WEBP":
+        image.save(buffer, format="WEBP", quality=quality, method=4)
+    elif fmt == "JPEG":
+        image.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+# Image.info keys holding metadata that must not reach Gemini.
+IMAGE_METADATA_INFO_KEYS = ("exif", "icc_profile", "xmp", "XML:com.adobe.xmp", "photoshop")
+
+
+def _normalize_image_bytes(image_bytes: bytes, content_type: str):
+    """Downscale and re-encode an image for upload to Gemini. CPU-bound; run off the event loop.
+
+    Returns `(bytes, mime_type, info)`. The output has no EXIF/ICC/XMP metadata,
+    its longest edge is at most IMAGE_NORMALIZE_MAX_EDGE, and the encoder steps
+    quality (then size) down until it fits IMAGE_NORMALIZE_MAX_BYTES. The source
+    is returned untouched when it cannot be decoded, or when it carries no
+    metadata and is already smaller.
+    """
+    info = {"source_bytes": len(image_bytes), "source_mime": content_type, "normalized": False}
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as opened:
+            opened.seek(0)
+            info["source_size"] = list(opened.size)
+            has_metadata = bool(opened.getexif()) or any(key in opened.info for key in IMAGE_METADATA_INFO_KEYS)
+            # Apply EXIF rotation before the metadata is dropped.
+            image = ImageOps.exif_transpose(opened)
+            has_alpha = image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+            image = image.convert("RGBA" if has_alpha else "RGB")
+    except Exception as e:
+        info["skipped"] = f"{type(e).__name__}"
+        return image_bytes, content_type, info
+
+    needs_resize = max(image.size) > IMAGE_NORMALIZE_MAX_EDGE
+    if needs_resize:
+        image.thumbnail((IMAGE_NORMALIZE_MAX_EDGE, IMAGE_NORMALIZE_MAX_EDGE), Image.LANCZOS)
+
+    if pil_features.check("webp"):
+        fmt, mime_type = "WEBP", "image/webp"
+    elif has_alpha:
+        fmt, mime_type = "PNG", "image/png"
+    else:
+        fmt, mime_type = "JPEG", "image/jpeg"
+
+    output = b""
+    for _attempt in range(4):
+        for quality in (IMAGE_NORMALIZE_QUALITY, 70, 55, 40):
+            output = _encode_normalized_image(image, fmt, min(quality, IMAGE_NORMALIZE_QUALITY))
+            if len(output) <= IMAGE_NORMALIZE_MAX_BYTES or fmt == "PNG":
+                break
+        if len(output) <= IMAGE_NORMALIZE_MAX_BYTES or min(image.size) <= 64:
+            break
+        image = image.resize((max(1, int(image.width * 0.75)), max(1, int(image.height * 0.75))), Image.LANCZOS)
+
+    # Only a metadata-free source may go out as is; EXIF/GPS/ICC/XMP are always stripped.
+    if not needs_resize and not has_metadata and len(output) >= len(image_bytes):
+        info["skipped"] = "already_small"
+        return image_bytes, content_type, info
+
+    info.update(normalized=True, output_size=list(image.size), output_mime=mime_type)
+    return output, mime_type, info
+
+
+async def _prepare_image_for_gemini(image_bytes: bytes, content_type: str, *, route: str, image_hash: str = ""):
+    """Return `(bytes, mime_type)` to upload, normalised and cached by source hash when enabled."""
+    if not IMAGE_NORMALIZE_ENABLED or Image is None or not image_bytes:
+        return image_bytes, content_type
+
+    started_at = time.perf_counter()
+    source_hash = image_hash or hashlib.sha256(image_bytes).hexdigest()
+    cache_key = f"{IMAGE_NORMALIZE_VERSION}|{source_hash}|{IMAGE_NORMALIZE_MAX_EDGE}|{IMAGE_NORMALIZE_MAX_BYTES}|{IMAGE_NORMALIZE_QUALITY}"
+    meta, body = _unpack_cache_entry(await asyncio.to_thread(image_normalize_cache.get, cache_key))
+    cache_hit = meta is not None
+    if cache_hit:
+        output, mime_type = (body, meta["mime_type"]) if meta.get("normalized") else (image_bytes, content_type)
+        info = meta
+    else:
+        output, mime_type, info = await asyncio.to_thread(_normalize_image_bytes, image_bytes, content_type)
+        # Undecodable or already-small images are remembered without a body.
+        meta = {**info, "mime_type": mime_type}
+        await asyncio.to_thread(
+            image_normalize_cache.set,
+            cache_key,
+            _pack_cache_entry(meta, output if info.get("normalized") else b""),
+        )
+
+    _log_gemini_event(
+        "image_normalized",
+        route=route,
+        cache_hit=cache_hit,
+        normalized=bool(info.get("normalized")),
+        skipped=info.get("skipped", ""),
+        source_bytes=len(image_bytes),
+        output_bytes=len(output),
+        bytes_saved=len(image_bytes) - len(output),
+        source_size=info.get("source_size"),
+        output_size=info.get("output_size"),
+        output_mime=mime_type,
+        duration_ms=round((time.perf_counter() - started_at) * 1000, 1),
+    )
+    return output, mime_type
+
+
+def _decode_data_url(data_url: str):
+    match = re.match(r"^data:(?P<mime>[^;,]+)?(?P<b64>;base64)?,(?P<data>.*)$", data_url, re.DOTALL)
+    if not match:
+        raise ValueError("Invalid data URL")
+
+    mime_type = (match.group("mime") or "image/png").strip()
+    payload = match.group("data") or ""
+    if match.group("b64"):
+        image_bytes = base64.b64decode(payload)
+    else:
+        image_bytes = urllib.parse.unquote_to_bytes(payload)
+    return image_bytes, mime_type
+
+
+async def _load_web_image_payload(data: dict):
+    """Return `(image_bytes, content_type, source_info)` for a webpage image request.
+
+    `source_info` carries the response validators (`etag`, `last_modified`) when
+    the image was fetched from a remote URL.
+    """
+    image_data = data.get("imageData")
+    content_type = (data.get("contentType") or "").split(";", 1)[0].strip()
+    image_url = (data.get("imageUrl") or "").strip()
+    source_info = {}
+
+    if image_data:
+        # Base64 is 4 chars per 3 bytes; reject oversized payloads before decoding them.
+        if len(image_data) * 3 // 4 > IMAGE_FETCH_MAX_BYTES + 3:
+            raise ValueError("Image is too large")
+        image_bytes = base64.b64decode(image_data)
+        if not content_type:
+            content_type = "image/jpeg"
+    elif image_url:
+        if image_url.startswith("data:"):
+            image_bytes, content_type = _decode_data_url(image_url)
+        else:
+            fetched = await _fetch_remote_image(image_url)
+            image_bytes = fetched["bytes"]
+            content_type = fetched["content_type"]
+            source_info = {
+                "etag": fetched["etag"],
+                "last_modified": fetched["last_modified"],
+                "cache": fetched["cache"],
+            }
+    else:
+        raise ValueError("No image input provided")
+
+    if not image_bytes:
+        raise ValueError("Image is empty")
+    if len(image_bytes) > IMAGE_FETCH_MAX_BYTES:
+        raise ValueError("Image is too large")
+    if not content_type.startswith("image/"):
+        content_type = "image/jpeg"
+
+    return image_bytes, content_type, source_info
+
+
+def _load_live_audio_payload(data: dict):
+    audio_data = (data.get("audioData") or "").strip()
+    audio_mime_type = (data.get("audioMimeType") or "audio/pcm;rate=24000").strip()
+    if not audio_data:
+        raise ValueError("No audio input provided")
+
+    try:
+        audio_bytes = base64.b64decode(audio_data, validate=True)
+    except Exception:
+        raise ValueError("Invalid base64 audio payload")
+
+    if not audio_bytes:
+        raise ValueError("Audio is empty")
+    if len(audio_bytes) > 15 * 1024 * 1024:
+        raise ValueError("Audio payload is too large")
+    if not audio_mime_type:
+        audio_mime_type = "audio/pcm;rate=24000"
+    return audio_bytes, audio_mime_type
+
+
+def _load_live_screenshot_payload(data: dict):
+    screenshot_data_url = (data.get("screenshotDataUrl") or "").strip()
+    screenshot_data = (data.get("screenshotData") or "").strip()
+    screenshot_mime_type = (data.get("screenshotMimeType") or "image/png").split(";", 1)[0].strip()
+
+    if screenshot_data_url:
+        if not screenshot_data_url.startswith("data:"):
+            raise ValueError("Screenshot must be provided as a data URL")
+        screenshot_bytes, screenshot_mime_type = _decode_data_url(screenshot_data_url)
+    elif screenshot_data:
+        try:
+            screenshot_bytes = base64.b64decode(screenshot_data, validate=True)
+        except Exception:
+            raise ValueError("Invalid base64 screenshot payload")
+    else:
+        raise ValueError("No screenshot provided")
+
+    if not screenshot_bytes:
+        raise ValueError("Screenshot is empty")
+    if len(screenshot_bytes) > 15 * 1024 * 1024:
+        raise ValueError("Screenshot is too large")
+    if not screenshot_mime_type.startswith("image/"):
+        screenshot_mime_type = "image/png"
+    return screenshot_bytes, screenshot_mime_type
+
+
+def _iter_live_models():
+    ordered = [GEMINI_LIVE_MODEL] + list(GEMINI_LIVE_MODEL_FALLBACKS)
+    seen = set()
+    for model_name in ordered:
+        token = str(model_name or "").strip()
+        if not token or token in seen:
+            continue
+        seen.add(token)
+        yield token
+
+
+def _normalize_reading_mode_model_name(model_name: str) -> str:
+    token = str(model_name or "").strip()
+    if not token:
+        return ""
+    alias_map = {
+        "gemini-3.0-flash": "gemini-3-flash-preview",
+        "gemini-3-flash": "gemini-3-flash-preview",
+    }
+    return alias_map.get(token.lower(), token)
+
+
+def _iter_reading_mode_models():
     ordered = [
         _normalize_reading_mode_model_name(GEMINI_READING_MODE_MODEL),
         "gemini-3-flash-preview",
@@ -1200,6 +2715,161 @@ def _model_supports_thinking_level(model_name: str) -> bool:
     return token.startswith("gemini-3")
 
 
+def _is_rate_limit_error(error) -> bool:
+    if getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429:
+        return True
+    message = str(error or "")
+    return "429" in message or "RESOURCE_EXHAUSTED" in message.upper()
+
+
+def _router_entry_locked(model_name: str) -> dict:
+    entry = model_router_state.get(model_name)
+    if entry is None:
+        entry = {
+            "state": "closed",
+            "ewma_latency_ms": 0.0,
+            "error_rate": 0.0,
+            "samples": 0,
+            "successes": 0,
+            "failures": 0,
+            "consecutive_failures": 0,
+            "rate_limited": 0,
+            "last_rate_limited_at": 0.0,
+            "opened_at": 0.0,
+            "open_seconds": GEMINI_ROUTER_OPEN_SECONDS,
+            "probe_started_at": 0.0,
+            "last_error": "",
+        }
+        model_router_state[model_name] = entry
+    return entry
+
+
+def _router_effective_state_locked(entry: dict, now_ts: float) -> str:
+    if entry["state"] == "open" and now_ts - entry["opened_at"] >= entry["open_seconds"]:
+        entry["state"] = "half_open"
+        entry["probe_started_at"] = 0.0
+    return entry["state"]
+
+
+def _order_models_by_health(models):
+    """Order candidate models by live health for one request.
+
+    Closed-circuit models come first, scored by EWMA latency inflated by the error
+    rate and recent 429s, with a bias that keeps the configured order when models
+    are similar. A half-open model is offered to at most one request at a time as
+    its probe. Open-circuit models (and half-open ones already probing) come last,
+    as a last resort after every other model has failed.
+    """
+    now_ts = time.time()
+    ranked = []
+    blocked = []
+    with model_router_lock:
+        for index, model_name in enumerate(models):
+            entry = _router_entry_locked(model_name)
+            state = _router_effective_state_locked(entry, now_ts)
+            score = entry["ewma_latency_ms"] * (1.0 + 3.0 * entry["error_rate"]) + index * GEMINI_ROUTER_ORDER_BIAS_MS
+            if now_ts - entry["last_rate_limited_at"] < entry["open_seconds"]:
+                score += 10000.0
+            if state == "closed":
+                ranked.append((0, score, model_name))
+            elif state == "half_open" and now_ts - entry["probe_started_at"] > 60.0:
+                entry["probe_started_at"] = now_ts
+                ranked.append((1, score, model_name))
+            else:
+                blocked.append((entry["opened_at"] + entry["open_seconds"], model_name))
+    # Open-circuit models stay at the end as a last resort, soonest to reopen first.
+    ordered = [model_name for _rank, _score, model_name in sorted(ranked)]
+    ordered.extend(model_name for _retry_at, model_name in sorted(blocked))
+    return ordered
+
+
+def _record_model_outcome(model_name: str, *, ok: bool, latency_ms: float = 0.0, error=None):
+    model_name = str(model_name or "").strip()
+    if not model_name:
+        return
+    now_ts = time.time()
+    alpha = GEMINI_ROUTER_EWMA_ALPHA
+    transition = ""
+    with model_router_lock:
+        entry = _router_entry_locked(model_name)
+        state = _router_effective_state_locked(entry, now_ts)
+        entry["samples"] += 1
+        entry["error_rate"] = (1.0 - alpha) * entry["error_rate"] + alpha * (0.0 if ok else 1.0)
+        if ok:
+            entry["successes"] += 1
+            entry["consecutive_failures"] = 0
+            if latency_ms > 0:
+                previous = entry["ewma_latency_ms"]
+                entry["ewma_latency_ms"] = latency_ms if previous <= 0 else (1.0 - alpha) * previous + alpha * latency_ms
+            if state != "closed":
+                entry["state"] = "closed"
+                entry["open_seconds"] = GEMINI_ROUTER_OPEN_SECONDS
+                # Start the error-rate window over so one early failure cannot re-trip it.
+                entry["samples"] = 0
+                transition = "router_circuit_closed"
+        else:
+            entry["failures"] += 1
+            entry["consecutive_failures"] += 1
+            entry["last_error"] = f"{type(error).__name__}: {str(error)[:160]}" if error is not None else ""
+            if error is not None and _is_rate_limit_error(error):
+                entry["rate_limited"] += 1
+                entry["last_rate_limited_at"] = now_ts
+            should_open = (
+                state == "half_open"
+                or entry["consecutive_failures"] >= GEMINI_ROUTER_FAILURE_THRESHOLD
+                or (entry["samples"] >= GEMINI_ROUTER_MIN_SAMPLES and entry["error_rate"] >= GEMINI_ROUTER_ERROR_RATE_THRESHOLD)
+            )
+            if should_open and state != "open":
+                if state == "half_open":
+                    entry["open_seconds"] = min(GEMINI_ROUTER_MAX_OPEN_SECONDS, entry["open_seconds"] * 2.0)
+                entry["state"] = "open"
+                entry["opened_at"] = now_ts
+                transition = "router_circuit_open"
+        entry["probe_started_at"] = 0.0
+        snapshot = dict(entry)
+    if transition:
+        _log_gemini_event(
+            transition,
+            model=model_name,
+            open_seconds=round(snapshot["open_seconds"], 1),
+            error_rate=round(snapshot["error_rate"], 3),
+            consecutive_failures=snapshot["consecutive_failures"],
+            last_error=snapshot["last_error"],
+        )
+
+
+def _get_model_router_snapshot() -> dict:
+    now_ts = time.time()
+    models = {}
+    with model_router_lock:
+        for model_name, entry in model_router_state.items():
+            state = _router_effective_state_locked(entry, now_ts)
+            models[model_name] = {
+                **entry,
+                "state": state,
+                "ewma_latency_ms": round(entry["ewma_latency_ms"], 1),
+                "error_rate": round(entry["error_rate"], 3),
+                "retry_in_seconds": round(max(0.0, entry["opened_at"] + entry["open_seconds"] - now_ts), 1) if state == "open" else 0.0,
+            }
+    return {
+        "live_order": _peek_model_order(list(_iter_live_models()), models),
+        "reading_mode_order": _peek_model_order(list(_iter_reading_mode_models()), models),
+        "models": models,
+    }
+
+
+def _peek_model_order(candidates, models: dict):
+    """Closed/half-open-first view of `candidates` for debugging, without claiming probe slots."""
+    rank = {"closed": 0, "half_open": 1, "open": 2}
+    return sorted(
+        candidates,
+        key=lambda model_name: (
+            rank.get((models.get(model_name) or {}).get("state", "closed"), 0),
+            candidates.index(model_name),
+        ),
+    )
+
+
 def _extract_live_message_text(message):
     text_chunks = []
     server_content = getattr(message, "server_content", None)
@@ -1292,22 +2962,8 @@ def _pcm16le_to_wav_bytes(pcm_bytes: bytes, sample_rate: int = 24000, channels:
     return header + pcm_bytes
 
 
-async def _run_live_query_once(
-    client,
-    model_name: str,
-    *,
-    audio_bytes: bytes,
-    audio_mime_type: str,
-    screenshot_bytes: bytes,
-    screenshot_mime_type: str,
-    page_url: str,
-    resume_handle: str = "",
-    send_screenshot: bool = True,
-):
-    normalized_model_name = _normalize_live_model_name(model_name)
-    connect_started_at = time.perf_counter()
-
-    config = types.LiveConnectConfig(
+def _build_live_connect_config(resume_handle: str = ""):
+    return types.LiveConnectConfig(
         # Native-audio models are served as audio turns; recover text via output transcription.
         response_modalities=["AUDIO"],
         temperature=GEMINI_LIVE_TEMPERATURE,
@@ -1330,9 +2986,173 @@ async def _run_live_query_once(
         ),
     )
 
-    async with client.aio.live.connect(model=normalized_model_name, config=config) as session:
-        connected_ms = round((time.perf_counter() - connect_started_at) * 1000, 1)
-        send_started_at = time.perf_counter()
+
+def _spawn_live_pool_task(coro):
+    task = asyncio.get_running_loop().create_task(coro)
+    live_session_pool_background_tasks.add(task)
+    task.add_done_callback(live_session_pool_background_tasks.discard)
+    return task
+
+
+async def _open_pooled_live_session(model_name: str):
+    client = get_gemini_client()
+    started_at = time.perf_counter()
+    connect_cm = client.aio.live.connect(
+        model=_normalize_live_model_name(model_name),
+        config=_build_live_connect_config(),
+    )
+    session = await connect_cm.__aenter__()
+    return {
+        "model": model_name,
+        "connect_cm": connect_cm,
+        "session": session,
+        "opened_at": time.time(),
+        "connect_ms": round((time.perf_counter() - started_at) * 1000, 1),
+    }
+
+
+async def _close_pooled_live_session(entry):
+    try:
+        await entry["connect_cm"].__aexit__(None, None, None)
+    except Exception:
+        pass
+
+
+async def _fill_live_session_pool_slot(model_name: str):
+    live_session_pool_opening[model_name] = live_session_pool_opening.get(model_name, 0) + 1
+    try:
+        entry = await _open_pooled_live_session(model_name)
+    except Exception as e:
+        failures = int(live_session_pool_retry.get(model_name, {}).get("failures", 0)) + 1
+        backoff_seconds = min(120.0, GEMINI_LIVE_POOL_REFILL_INTERVAL_SECONDS * (2 ** min(failures, 6)))
+        live_session_pool_retry[model_name] = {"failures": failures, "retry_at": time.time() + backoff_seconds}
+        live_session_pool_stats["open_errors"] += 1
+        _log_gemini_event(
+            "live_pool_open_error",
+            model=model_name,
+            failures=failures,
+            backoff_seconds=backoff_seconds,
+            error_type=type(e).__name__,
+            error_message=str(e)[:240],
+        )
+        return
+    finally:
+        live_session_pool_opening[model_name] = max(0, live_session_pool_opening.get(model_name, 1) - 1)
+
+    live_session_pool_retry.pop(model_name, None)
+    live_session_pool.setdefault(model_name, deque()).append(entry)
+    live_session_pool_stats["opened"] += 1
+    _log_gemini_event("live_pool_session_ready", model=model_name, connect_ms=entry["connect_ms"])
+
+
+def _is_pooled_live_session_fresh(entry, now_ts: float) -> bool:
+    return now_ts - float(entry.get("opened_at", 0.0)) < GEMINI_LIVE_POOL_MAX_AGE_SECONDS
+
+
+def _expire_live_session_pool(now_ts: float):
+    for model_name, queue in live_session_pool.items():
+        fresh = deque()
+        while queue:
+            entry = queue.popleft()
+            if _is_pooled_live_session_fresh(entry, now_ts):
+                fresh.append(entry)
+                continue
+            live_session_pool_stats["expired"] += 1
+            _spawn_live_pool_task(_close_pooled_live_session(entry))
+        live_session_pool[model_name] = fresh
+
+
+async def _run_live_session_pool():
+    while True:
+        now_ts = time.time()
+        _expire_live_session_pool(now_ts)
+        for model_name in _iter_live_models():
+            retry = live_session_pool_retry.get(model_name)
+            if retry and float(retry.get("retry_at", 0.0)) > now_ts:
+                continue
+            ready = len(live_session_pool.get(model_name) or ())
+            missing = GEMINI_LIVE_POOL_SIZE - ready - live_session_pool_opening.get(model_name, 0)
+            for _ in range(max(0, missing)):
+                _spawn_live_pool_task(_fill_live_session_pool_slot(model_name))
+        live_session_pool_wakeup.clear()
+        try:
+            await asyncio.wait_for(live_session_pool_wakeup.wait(), timeout=GEMINI_LIVE_POOL_REFILL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _ensure_live_session_pool_started():
+    """Start the background refill task. Must be called on the shared event loop."""
+    global live_session_pool_task, live_session_pool_wakeup
+    if GEMINI_LIVE_POOL_SIZE <= 0 or not GEMINI_API_KEY:
+        return
+    if live_session_pool_task is not None and not live_session_pool_task.done():
+        return
+    live_session_pool_wakeup = asyncio.Event()
+    live_session_pool_task = asyncio.get_running_loop().create_task(_run_live_session_pool())
+
+
+async def _start_live_session_pool():
+    _ensure_live_session_pool_started()
+
+
+def _checkout_live_session(model_name: str):
+    """Take a ready pre-opened session for `model_name`, or None on a pool miss."""
+    if GEMINI_LIVE_POOL_SIZE <= 0:
+        return None
+    _ensure_live_session_pool_started()
+    now_ts = time.time()
+    queue = live_session_pool.get(model_name) or deque()
+    entry = None
+    while queue:
+        candidate = queue.popleft()
+        if _is_pooled_live_session_fresh(candidate, now_ts):
+            entry = candidate
+            break
+        live_session_pool_stats["expired"] += 1
+        _spawn_live_pool_task(_close_pooled_live_session(candidate))
+    live_session_pool_stats["hits" if entry else "misses"] += 1
+    if live_session_pool_wakeup is not None:
+        live_session_pool_wakeup.set()
+    return entry
+
+
+def _get_live_session_pool_hit_rate() -> float:
+    lookups = live_session_pool_stats["hits"] + live_session_pool_stats["misses"]
+    return round(live_session_pool_stats["hits"] / lookups, 3) if lookups else 0.0
+
+
+async def _close_live_session_pool():
+    global live_session_pool_task
+    if live_session_pool_task is not None:
+        live_session_pool_task.cancel()
+        live_session_pool_task = None
+    entries = [entry for queue in live_session_pool.values() for entry in queue]
+    live_session_pool.clear()
+    for entry in entries:
+        await _close_pooled_live_session(entry)
+
+
+class _StaleLiveSessionError(RuntimeError):
+    """A pre-opened live session was closed before the query input could be sent."""
+
+
+async def _run_live_query_on_session(
+    session,
+    model_name: str,
+    *,
+    audio_bytes: bytes,
+    audio_mime_type: str,
+    screenshot_bytes: bytes,
+    screenshot_mime_type: str,
+    page_url: str,
+    send_screenshot: bool,
+    connected_ms: float,
+    pool_hit: bool,
+    first_response_event=None,
+):
+    send_started_at = time.perf_counter()
+    try:
         await session.send_realtime_input(activity_start=types.ActivityStart())
         if send_screenshot and screenshot_bytes:
             await session.send_realtime_input(
@@ -1344,75 +3164,84 @@ async def _run_live_query_once(
             audio=types.Blob(data=audio_bytes, mime_type=audio_mime_type),
         )
         await session.send_realtime_input(activity_end=types.ActivityEnd())
-        input_sent_ms = round((time.perf_counter() - send_started_at) * 1000, 1)
-
-        answer_chunks = []
-        transcript_text = ""
-        output_transcript_text = ""
-        output_audio_chunks = []
-        output_audio_mime = ""
-        next_session_handle = ""
-        first_response_ms = 0.0
-        receive_started_at = time.perf_counter()
-        async for message in session.receive():
-            chunk = _extract_live_message_text(message)
-            if chunk:
-                answer_chunks.append(chunk)
-                if not first_response_ms:
-                    first_response_ms = round((time.perf_counter() - receive_started_at) * 1000, 1)
-
-            audio_chunk, audio_mime = _extract_live_audio_bytes(message)
-            if audio_chunk:
-                output_audio_chunks.append(audio_chunk)
-                if not output_audio_mime:
-                    output_audio_mime = audio_mime
-                if not first_response_ms:
-                    first_response_ms = round((time.perf_counter() - receive_started_at) * 1000, 1)
-
-            server_content = getattr(message, "server_content", None)
-            input_transcription = getattr(server_content, "input_transcription", None) if server_content else None
-            if input_transcription and getattr(input_transcription, "text", None):
-                transcript_text = str(input_transcription.text).strip()
-            output_transcription = getattr(server_content, "output_transcription", None) if server_content else None
-            if output_transcription and getattr(output_transcription, "text", None):
-                output_transcript_text = str(output_transcription.text).strip()
-            session_update = getattr(message, "session_resumption_update", None)
-            if session_update and getattr(session_update, "resumable", None):
-                new_handle = getattr(session_update, "new_handle", None)
-                if new_handle:
-                    next_session_handle = str(new_handle).strip()
-
-            if server_content and getattr(server_content, "turn_complete", False):
-                break
+    except Exception as e:
+        if pool_hit:
+            raise _StaleLiveSessionError(f"{type(e).__name__}: {str(e)[:200]}") from e
+        raise
+    input_sent_ms = round((time.perf_counter() - send_started_at) * 1000, 1)
+
+    answer_chunks = []
+    transcript_text = ""
+    output_transcript_text = ""
+    output_audio_chunks = []
+    output_audio_mime = ""
+    next_session_handle = ""
+    first_response_ms = 0.0
+    receive_started_at = time.perf_counter()
+    async for message in session.receive():
+        chunk = _extract_live_message_text(message)
+        if chunk:
+            answer_chunks.append(chunk)
+            if not first_response_ms:
+                first_response_ms = round((time.perf_counter() - receive_started_at) * 1000, 1)
+
+        audio_chunk, audio_mime = _extract_live_audio_bytes(message)
+        if audio_chunk:
+            output_audio_chunks.append(audio_chunk)
+            if not output_audio_mime:
+                output_audio_mime = audio_mime
+            if not first_response_ms:
+                first_response_ms = round((time.perf_counter() - receive_started_at) * 1000, 1)
+
+        if first_response_ms and first_response_event is not None:
+            first_response_event.set()
+
+        server_content = getattr(message, "server_content", None)
+        input_transcription = getattr(server_content, "input_transcription", None) if server_content else None
+        if input_transcription and getattr(input_transcription, "text", None):
+            transcript_text = str(input_transcription.text).strip()
+        output_transcription = getattr(server_content, "output_transcription", None) if server_content else None
+        if output_transcription and getattr(output_transcription, "text", None):
+            output_transcript_text = str(output_transcription.text).strip()
+        session_update = getattr(message, "session_resumption_update", None)
+        if session_update and getattr(session_update, "resumable", None):
+            new_handle = getattr(session_update, "new_handle", None)
+            if new_handle:
+                next_session_handle = str(new_handle).strip()
+
+        if server_content and getattr(server_content, "turn_complete", False):
+            break
 
-        answer = "".join(answer_chunks).strip()
-        if not answer:
-            answer = output_transcript_text
-        if transcript_text and not re.search(r"[A-Za-z]", transcript_text):
-            answer = "I could not clearly hear an English question. Please hold Alt+D and try again in English."
-        output_audio_pcm = b"".join(output_audio_chunks)
-        output_audio_wav = b""
-        if output_audio_pcm:
-            pcm_rate = _extract_pcm_rate(output_audio_mime, 24000)
-            output_audio_wav = _pcm16le_to_wav_bytes(output_audio_pcm, sample_rate=pcm_rate, channels=1)
-        if not answer and output_audio_wav:
-            answer = "Spoken response generated."
-        return {
-            "answer": answer,
-            "transcript": transcript_text,
-            "model": model_name,
-            "session_handle": next_session_handle,
-            "audio_base64": base64.b64encode(output_audio_wav).decode("ascii") if output_audio_wav else "",
-            "audio_mime": "audio/wav" if output_audio_wav else "",
-            "audio_bytes": len(output_audio_wav),
-            "connected_ms": connected_ms,
-            "input_sent_ms": input_sent_ms,
-            "first_response_ms": first_response_ms,
-        }
+    answer = "".join(answer_chunks).strip()
+    if not answer:
+        answer = output_transcript_text
+    if transcript_text and not re.search(r"[A-Za-z]", transcript_text):
+        answer = "I could not clearly hear an English question. Please hold Alt+D and try again in English."
+    output_audio_pcm = b"".join(output_audio_chunks)
+    output_audio_wav = b""
+    if output_audio_pcm:
+        pcm_rate = _extract_pcm_rate(output_audio_mime, 24000)
+        output_audio_wav = _pcm16le_to_wav_bytes(output_audio_pcm, sample_rate=pcm_rate, channels=1)
+    if not answer and output_audio_wav:
+        answer = "Spoken response generated."
+    return {
+        "answer": answer,
+        "transcript": transcript_text,
+        "model": model_name,
+        "session_handle": next_session_handle,
+        "audio_base64": base64.b64encode(output_audio_wav).decode("ascii") if output_audio_wav else "",
+        "audio_mime": "audio/wav" if output_audio_wav else "",
+        "audio_bytes": len(output_audio_wav),
+        "connected_ms": connected_ms,
+        "input_sent_ms": input_sent_ms,
+        "first_response_ms": first_response_ms,
+        "pool_hit": bool(pool_hit),
+    }
 
 
-async def _run_live_query_with_fallbacks(
+async def _run_live_query_once(
     client,
+    model_name: str,
     *,
     audio_bytes: bytes,
     audio_mime_type: str,
@@ -1421,59 +3250,253 @@ async def _run_live_query_with_fallbacks(
     page_url: str,
     resume_handle: str = "",
     send_screenshot: bool = True,
+    first_response_event=None,
 ):
-    attempts = []
-    for model_name in _iter_live_models():
-        started_at = time.perf_counter()
+    query_kwargs = {
+        "audio_bytes": audio_bytes,
+        "audio_mime_type": audio_mime_type,
+        "screenshot_bytes": screenshot_bytes,
+        "screenshot_mime_type": screenshot_mime_type,
+        "page_url": page_url,
+        "send_screenshot": send_screenshot,
+        "first_response_event": first_response_event,
+    }
+
+    # Resumed conversations need their handle in the connect config, so only
+    # fresh conversations can use a pre-opened session.
+    pooled_entry = None if resume_handle else _checkout_live_session(model_name)
+    if pooled_entry is not None:
         try:
-            result = await _run_live_query_once(
-                client,
+            return await _run_live_query_on_session(
+                pooled_entry["session"],
                 model_name,
-                audio_bytes=audio_bytes,
-                audio_mime_type=audio_mime_type,
-                screenshot_bytes=screenshot_bytes,
-                screenshot_mime_type=screenshot_mime_type,
-                page_url=page_url,
-                resume_handle=resume_handle,
-                send_screenshot=send_screenshot,
+                connected_ms=0.0,
+                pool_hit=True,
+                **query_kwargs,
             )
-            duration_ms = round((time.perf_counter() - started_at) * 1000, 1)
+        except _StaleLiveSessionError as e:
+            live_session_pool_stats["stale"] += 1
             _log_gemini_event(
-                "live_model_success",
-                request_kind="gemini_live_page_query",
+                "live_pool_session_stale",
                 model=model_name,
-                duration_ms=duration_ms,
-                resumed_session=bool(resume_handle),
-                screenshot_sent=bool(send_screenshot),
-                connected_ms=float(result.get("connected_ms", 0.0) or 0.0),
-                input_sent_ms=float(result.get("input_sent_ms", 0.0) or 0.0),
-                first_response_ms=float(result.get("first_response_ms", 0.0) or 0.0),
-                thinking_budget=GEMINI_LIVE_THINKING_BUDGET,
-                max_output_tokens=GEMINI_LIVE_MAX_OUTPUT_TOKENS,
-                temperature=GEMINI_LIVE_TEMPERATURE,
-                answer_chars=len(result.get("answer", "")),
-                transcript_chars=len(result.get("transcript", "")),
-                output_audio_bytes=int(result.get("audio_bytes", 0) or 0),
+                session_age_s=round(time.time() - float(pooled_entry.get("opened_at", 0.0)), 1),
+                error_message=str(e)[:240],
             )
-            if result.get("answer"):
-                return result
-            attempts.append(f"{model_name}: empty response")
-        except Exception as e:
-            duration_ms = round((time.perf_counter() - started_at) * 1000, 1)
-            attempts.append(f"{model_name}: {type(e).__name__}: {str(e)[:220]}")
+        finally:
+            _spawn_live_pool_task(_close_pooled_live_session(pooled_entry))
+
+    connect_started_at = time.perf_counter()
+    async with client.aio.live.connect(
+        model=_normalize_live_model_name(model_name),
+        config=_build_live_connect_config(resume_handle),
+    ) as session:
+        connected_ms = round((time.perf_counter() - connect_started_at) * 1000, 1)
+        return await _run_live_query_on_session(
+            session,
+            model_name,
+            connected_ms=connected_ms,
+            pool_hit=False,
+            **query_kwargs,
+        )
+
+
+def _record_live_first_response(model_name: str, result: dict):
+    first_response_ms = float(result.get("first_response_ms", 0.0) or 0.0)
+    if first_response_ms <= 0:
+        return
+    total_ms = (
+        float(result.get("connected_ms", 0.0) or 0.0)
+        + float(result.get("input_sent_ms", 0.0) or 0.0)
+        + first_response_ms
+    )
+    live_first_response_history.setdefault(model_name, deque(maxlen=100)).append(total_ms)
+
+
+def _get_live_hedge_delay_ms(model_name: str) -> float:
+    """Percentile of recent time-to-first-response for `model_name`, clamped to the configured bounds."""
+    samples = sorted(live_first_response_history.get(model_name) or ())
+    if len(samples) < GEMINI_LIVE_HEDGE_MIN_SAMPLES:
+        delay_ms = GEMINI_LIVE_HEDGE_DEFAULT_DELAY_MS
+    else:
+        rank = int(round((GEMINI_LIVE_HEDGE_PERCENTILE / 100.0) * (len(samples) - 1)))
+        delay_ms = samples[rank]
+    return max(GEMINI_LIVE_HEDGE_MIN_DELAY_MS, min(GEMINI_LIVE_HEDGE_MAX_DELAY_MS, delay_ms))
+
+
+async def _run_live_query_attempt(client, model_name: str, *, resume_handle: str, first_response_event, **query_kwargs):
+    started_at = time.perf_counter()
+    try:
+        result = await _run_live_query_once(
+            client,
+            model_name,
+            resume_handle=resume_handle,
+            first_response_event=first_response_event,
+            **query_kwargs,
+        )
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        duration_ms = round((time.perf_counter() - started_at) * 1000, 1)
+        _record_model_outcome(model_name, ok=False, error=e)
+        _log_gemini_event(
+            "live_model_error",
+            request_kind="gemini_live_page_query",
+            model=model_name,
+            duration_ms=duration_ms,
+            error_type=type(e).__name__,
+            error_message=str(e)[:240],
+        )
+        raise
+
+    duration_ms = round((time.perf_counter() - started_at) * 1000, 1)
+    _record_live_first_response(model_name, result)
+    _record_model_outcome(model_name, ok=True, latency_ms=duration_ms)
+    _log_gemini_event(
+        "live_model_success",
+        request_kind="gemini_live_page_query",
+        model=model_name,
+        duration_ms=duration_ms,
+        resumed_session=bool(resume_handle),
+        screenshot_sent=bool(query_kwargs.get("send_screenshot")),
+        connected_ms=float(result.get("connected_ms", 0.0) or 0.0),
+        input_sent_ms=float(result.get("input_sent_ms", 0.0) or 0.0),
+        first_response_ms=float(result.get("first_response_ms", 0.0) or 0.0),
+        session_pool_hit=bool(result.get("pool_hit")),
+        thinking_budget=GEMINI_LIVE_THINKING_BUDGET,
+        max_output_tokens=GEMINI_LIVE_MAX_OUTPUT_TOKENS,
+        temperature=GEMINI_LIVE_TEMPERATURE,
+        answer_chars=len(result.get("answer", "")),
+        transcript_chars=len(result.get("transcript", "")),
+        output_audio_bytes=int(result.get("audio_bytes", 0) or 0),
+    )
+    result["duration_ms"] = duration_ms
+    return result
+
+
+async def _run_live_query_with_fallbacks(
+    client,
+    *,
+    audio_bytes: bytes,
+    audio_mime_type: str,
+    screenshot_bytes: bytes,
+    screenshot_mime_type: str,
+    page_url: str,
+    resume_handle: str = "",
+    send_screenshot: bool = True,
+):
+    """Query live models in fallback order, hedging onto the next model when one is slow.
+
+    A fallback model starts as soon as the current one fails, or (when hedging is
+    enabled) once the current one has not produced a first response within its
+    percentile-based hedge delay. The first non-empty answer wins and any other
+    in-flight attempt is cancelled.
+    """
+    models = _order_models_by_health(list(_iter_live_models()))
+    if not models:
+        raise RuntimeError("No Gemini Live model is configured")
+
+    query_kwargs = {
+        "audio_bytes": audio_bytes,
+        "audio_mime_type": audio_mime_type,
+        "screenshot_bytes": screenshot_bytes,
+        "screenshot_mime_type": screenshot_mime_type,
+        "page_url": page_url,
+        "send_screenshot": send_screenshot,
+    }
+    request_started_at = time.perf_counter()
+    attempts = []
+    pending = {}
+    launched = []
+
+    def launch_next(hedged: bool):
+        model_name = models[len(launched)]
+        attempt = {
+            "model": model_name,
+            "started_at": time.perf_counter(),
+            "first_response_event": asyncio.Event(),
+            "hedge_delay_ms": _get_live_hedge_delay_ms(model_name),
+            "hedged": hedged,
+        }
+        task = asyncio.get_running_loop().create_task(_run_live_query_attempt(
+            client,
+            model_name,
+            resume_handle=resume_handle,
+            first_response_event=attempt["first_response_event"],
+            **query_kwargs,
+        ))
+        pending[task] = attempt
+        launched.append(attempt)
+        if hedged:
+            previous = launched[-2]
             _log_gemini_event(
-                "live_model_error",
+                "live_hedge_started",
                 request_kind="gemini_live_page_query",
                 model=model_name,
-                duration_ms=duration_ms,
-                error_type=type(e).__name__,
-                error_message=str(e)[:240],
+                slow_model=previous["model"],
+                hedge_delay_ms=round(previous["hedge_delay_ms"], 1),
+                elapsed_ms=round((time.perf_counter() - request_started_at) * 1000, 1),
             )
 
+    launch_next(hedged=False)
+    try:
+        while pending:
+            newest = launched[-1]
+            can_hedge = (
+                GEMINI_LIVE_HEDGE_ENABLED
+                and len(launched) < len(models)
+                and not newest["first_response_event"].is_set()
+            )
+            timeout = None
+            if can_hedge:
+                hedge_at = newest["started_at"] + newest["hedge_delay_ms"] / 1000.0
+                timeout = max(0.0, hedge_at - time.perf_counter())
+
+            done, _ = await asyncio.wait(set(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if not newest["first_response_event"].is_set():
+                    launch_next(hedged=True)
+                continue
+
+            for task in done:
+                attempt = pending.pop(task)
+                model_name = attempt["model"]
+                try:
+                    result = task.result()
+                except Exception as e:
+                    attempts.append(f"{model_name}: {type(e).__name__}: {str(e)[:220]}")
+                    continue
+                if not result.get("answer"):
+                    attempts.append(f"{model_name}: empty response")
+                    continue
+
+                losers = list(pending.values())
+                hedge_won = bool(attempt["hedged"])
+                result["hedged"] = any(item["hedged"] for item in launched)
+                if result["hedged"]:
+                    _log_gemini_event(
+                        "live_hedge_result",
+                        request_kind="gemini_live_page_query",
+                        winner=model_name,
+                        hedge_won=hedge_won,
+                        cancelled_models=[item["model"] for item in losers],
+                        total_ms=round((time.perf_counter() - request_started_at) * 1000, 1),
+                        slow_model_elapsed_ms=round((time.perf_counter() - launched[0]["started_at"]) * 1000, 1),
+                        # Sequential fallback only starts the next model once the slow one
+                        # fails, so hedging saved at least the winner's whole run time.
+                        latency_saved_vs_fallback_ms=float(result.get("duration_ms", 0.0) or 0.0) if hedge_won else 0.0,
+                    )
+                return result
+
+            if not pending and len(launched) < len(models):
+                launch_next(hedged=False)
+    finally:
+        for task in pending:
+            task.cancel()
+
     raise RuntimeError("; ".join(attempts) if attempts else "No Gemini Live model is configured")
 
 
-def _generate_ai_json(
+async def _generate_ai_json_async(
     client,
     parts,
     request_kind="generic",
@@ -1488,7 +3511,13 @@ def _generate_ai_json(
     use_stream: bool = True,
     response_schema=None,
     response_json_schema=None,
+    on_text=None,
 ):
+    """Run one Gemini request and return its parsed JSON reply.
+
+    With `use_stream`, `on_text` (if given) is called with each text chunk as it
+    arrives, e.g. to feed an IncrementalJsonParser.
+    """
     selected_model = str(model_name or GEMINI_MODEL).strip() or GEMINI_MODEL
     selected_thinking_level = str(thinking_level or GEMINI_THINKING_LEVEL).strip() or GEMINI_THINKING_LEVEL
     request_id = uuid.uuid4().hex[:10]
@@ -1535,14 +3564,61 @@ def _generate_ai_json(
     chunk_count = 0
     try:
         if use_stream:
-            for chunk in client.models.generate_content_stream(
+            stream = await client.aio.models.generate_content_stream(
                 model=selected_model,
                 contents=contents,
                 config=generate_content_config,
-            ):
-                if chunk.text:
-                    response_text += chunk.text
-                    chunk_count += 1
+            )
+            # Stop reading once the reply's JSON object closes; anything after it is
+            # discarded anyway. A small sample reads on to measure that tail.
+            scanner = _JsonObjectScanner()
+            measure_tail = GEMINI_STREAM_EARLY_STOP and random.random() < GEMINI_STREAM_EARLY_STOP_SAMPLE_RATE
+            object_closed_at = 0.0
+            stopped_early = False
+            async for chunk in stream:
+                if not chunk.text:
+                    continue
+                response_text += chunk.text
+                chunk_count += 1
+                if on_text is not None:
+                    on_text(chunk.text)
+                if object_closed_at or not scanner.feed(chunk.text):
+                    continue
+                object_closed_at = time.perf_counter()
+                if GEMINI_STREAM_EARLY_STOP and not measure_tail:
+                    stopped_early = True
+                    break
+
+            if stopped_early:
+                aclose = getattr(stream, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+                discarded_chars = len(response_text) - scanner.end
+                estimate = _get_stream_tail_estimate(request_kind)
+                _log_gemini_event(
+                    "stream_early_stop",
+                    request_id=request_id,
+                    request_kind=request_kind,
+                    chunk_count=chunk_count,
+                    discarded_chars=discarded_chars,
+                    # Savings beyond the current chunk are estimated from sampled full reads (~4 chars/token).
+                    estimated_tokens_saved=round((discarded_chars + estimate["tail_chars"]) / 4),
+                    estimated_ms_saved=round(estimate["tail_ms"], 1),
+                    estimate_samples=estimate["samples"],
+                )
+                response_text = scanner.object_text
+            elif object_closed_at and measure_tail:
+                tail_ms = round((time.perf_counter() - object_closed_at) * 1000, 1)
+                tail_chars = len(response_text) - scanner.end
+                _record_stream_tail(request_kind, tail_ms, tail_chars)
+                _log_gemini_event(
+                    "stream_tail_measured",
+                    request_id=request_id,
+                    request_kind=request_kind,
+                    tail_ms=tail_ms,
+                    tail_chars=tail_chars,
+                    tail_tokens_estimate=round(tail_chars / 4),
+                )
 
             response_text = _clean_ai_json_text(response_text)
             try:
@@ -1553,7 +3629,7 @@ def _generate_ai_json(
                     raise
                 parsed = json.loads(extracted)
         else:
-            response = client.models.generate_content(
+            response = await client.aio.models.generate_content(
                 model=selected_model,
                 contents=contents,
                 config=generate_content_config,
@@ -1587,6 +3663,7 @@ def _generate_ai_json(
                     response_text = str(parsed)
 
         duration_ms = round((time.perf_counter() - started_at) * 1000, 1)
+        _record_model_outcome(selected_model, ok=True, latency_ms=duration_ms)
         _log_gemini_event(
             "request_success",
             request_id=request_id,
@@ -1602,6 +3679,7 @@ def _generate_ai_json(
             relaxed_payload = _parse_relaxed_reading_mode_payload(response_text)
             if relaxed_payload.get("include_selectors"):
                 duration_ms = round((time.perf_counter() - started_at) * 1000, 1)
+                _record_model_outcome(selected_model, ok=True, latency_ms=duration_ms)
                 _log_gemini_event(
                     "request_success_relaxed",
                     request_id=request_id,
@@ -1613,6 +3691,9 @@ def _generate_ai_json(
                 )
                 return relaxed_payload
         duration_ms = round((time.perf_counter() - started_at) * 1000, 1)
+        # A reply that fails to parse is a content problem, not a model outage.
+        if not isinstance(e, json.JSONDecodeError):
+            _record_model_outcome(selected_model, ok=False, error=e)
         _log_gemini_event(
             "request_error",
             request_id=request_id,
@@ -1628,6 +3709,14 @@ def _generate_ai_json(
         raise
 
 
+CSS_STRING_UNSAFE_RE = re.compile(r'[\x00-\x1f\x7f"\\{};<>]')
+
+
+def _css_string(value):
+    """Quoted CSS string for document text such as font names; nothing in it can end the string, rule or <style>."""
+    return '"' + CSS_STRING_UNSAFE_RE.sub(lambda match: f'\\{ord(match.group()):x} ', str(value)) + '"'
+
+
 class BionicHtmlConverter:
     """Converts DOCX files to HTML with bionic reading formatting."""
 
@@ -1638,41 +3727,27 @@ class BionicHtmlConverter:
         'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
     }
 
-    def __init__(self, doc_id=None):
-        self.css_classes = set()
+    def __init__(self, doc_id=None, image_url_base='', inline_images=False):
+        self.css_classes = {}  # inline run style -> interned CSS class name
+        self._pending_css_rules = []  # rules for classes not yet emitted in a <style> element
+        self._run_styles = {}  # serialised <w:rPr> -> run style
         self.doc_id = doc_id
+        self.image_url_base = image_url_base  # Prefix for /doc-image URLs, e.g. "http://localhost:8080"
+        # Embed images as data: URLs, for HTML that is saved and reopened without the server.
+        self.inline_images = inline_images
         self.image_counter = 0
+        self.image_hashes = []  # Artifact store hashes of this document's images, in order
         self.doc = None  # Will be set during convert
+        self._numbering_formats = None  # (numId, ilvl) -> numFmt, built per document
+        self._style_names = {}  # paragraph style id -> lower-cased style name
 
     def _get_fixation_length(self, word):
         """Calculates how many characters to bold for bionic reading."""
-        clean_word = re.sub(r'\W+', '', word)
-        length = len(clean_word)
-        if length <= 1:
-            return 1
-        elif length <= 3:
-            return int(length * 0.6) + 1
-        else:
-            return int(length * 0.45) + 1
+        return bionic_text.fixation_length(word)
 
     def _apply_bionic_to_text(self, text, is_already_bold=False):
         """Apply bionic reading formatting to text, returning HTML."""
-        if is_already_bold:
-            return f'<strong>{html.escape(text)}</strong>'
-
-        parts = re.split(r'(\s+)', text)
-        result = []
-
-        for part in parts:
-            if not part.strip() or not any(c.isalnum() for c in part):
-                result.append(html.escape(part))
-            else:
-                fixation = self._get_fixation_length(part)
-                bold_segment = html.escape(part[:fixation])
-                normal_segment = html.escape(part[fixation:]) if len(part) > fixation else ''
-                result.append(f'<strong class="bionic">{bold_segment}</strong>{normal_segment}')
-
-        return ''.join(result)
+        return bionic_text.bionic_html(text, is_already_bold)
 
     def _get_run_style(self, run):
         """Extract inline styles from a run."""
@@ -1689,57 +3764,131 @@ class BionicHtmlConverter:
             pt_size = run.font.size.pt
             styles.append(f'font-size: {pt_size}pt')
         if run.font.name:
-            styles.append(f'font-family: "{run.font.name}", sans-serif')
+            styles.append(f'font-family: {_css_string(run.font.name)}, sans-serif')
 
         return '; '.join(styles) if styles else None
 
     def _get_hyperlink_url(self, hyperlink_elem):
         """Extract URL from a hyperlink element."""
         r_id = hyperlink_elem.get(f'{{{self.NSMAP["r"]}}}id')
-        if r_id and self.doc:
+        if r_id:
             try:
-                rel = self.doc.part.rels.get(r_id)
-                if rel and rel.target_ref:
-                    return rel.target_ref
+                return self._get_relationship_target(r_id)
             except Exception:
                 pass
         return None
 
-    def _process_run(self, run, hyperlink_url=None):
-        """Process a single run and return HTML."""
-        text = run.text
-        if not text:
-            return ''
+    def _get_relationship_target(self, r_id):
+        """Target reference of a main document relationship, or None."""
+        if not self.doc:
+            return None
+        rel = self.doc.part.rels.get(r_id)
+        if rel and rel.target_ref:
+            return rel.target_ref
+        return None
+
+    def _get_related_image(self, embed_id):
+        """Return (blob, content_type) for an embedded image relationship, or None."""
+        image_part = self.doc.part.related_parts.get(embed_id)
+        if image_part:
+            return image_part.blob, image_part.content_type
+        return None
 
-        style = self._get_run_style(run)
-        style_attr = f' style="{style}"' if style else ''
+    def _paragraph_text(self, paragraph):
+        return paragraph.text
 
-        is_bold = run.bold is True
-        bionic_html = self._apply_bionic_to_text(text, is_bold)
+    def _run_text(self, run):
+        return run.text
 
-        if style:
-            bionic_html = f'<span{style_attr}>{bionic_html}</span>'
+    def _run_is_bold(self, run):
+        return run.bold is True
+
+    def _process_run(self, run, hyperlink_url=None):
+        """Process a single run and return HTML."""
+        text, is_bold, style, _ = self._run_piece(run)
+        return self._render_run_pieces([(text, is_bold, style, hyperlink_url)])
 
-        if hyperlink_url:
-            return f'<a href="{html.escape(hyperlink_url)}" class="doc-link" target="_blank">{bionic_html}</a>'
+    def _run_piece(self, run):
+        """Return (text, is_bold, style, hyperlink_url) for a run."""
+        text = self._run_text(run)
+        if not text:
+            return '', False, None, None
+        return text, self._run_is_bold(run), self._cached_run_style(run), None
 
-        return bionic_html
+    def _cached_run_style(self, run):
+        """_get_run_style, computed once per distinct <w:rPr> in the document."""
+        rPr = run._r.find(W_RPR_TAG)
+        if rPr is None:
+            return None
+        key = etree.tostring(rPr)
+        try:
+            return self._run_styles[key]
+        except KeyError:
+            style = self._run_styles[key] = self._get_run_style(run)
+            return style
+
+    def _run_style_class(self, style):
+        """Interned CSS class for a run style; its rule goes out with the next fragment."""
+        class_name = self.css_classes.get(style)
+        if class_name is None:
+            class_name = f'rs-{hashlib.sha1(style.encode("utf-8")).hexdigest()[:10]}'
+            self.css_classes[style] = class_name
+            self._pending_css_rules.append(f'.{class_name}{{{style}}}')
+        return class_name
+
+    def _take_css_rules(self):
+        """<style> element for run classes first used since the last call, or ''."""
+        if not self._pending_css_rules:
+            return ''
+        rules = ''.join(self._pending_css_rules)
+        self._pending_css_rules.clear()
+        return f'<style class="doc-run-styles">{rules}</style>'
+
+    def _render_run_pieces(self, pieces):
+        """Render (text, is_bold, style, hyperlink_url) pieces through one bionic pass.
+
+        Word often splits a sentence into many runs with the same formatting;
+        adjacent pieces that render alike are merged first so they share one
+        span and words split across runs are treated as whole words.
+        """
+        merged = []
+        for text, is_bold, style, url in pieces:
+            if not text:
+                continue
+            if merged and merged[-1][1:] == [is_bold, style, url]:
+                merged[-1][0].append(text)
+            else:
+                merged.append([[text], is_bold, style, url])
+
+        rendered = bionic_text.bionic_html_runs([(''.join(texts), is_bold) for texts, is_bold, _, _ in merged])
+        parts = []
+        for (_, _, style, url), run_html in zip(merged, rendered):
+            if style:
+                run_html = f'<span class="{self._run_style_class(style)}">{run_html}</span>'
+            if url:
+                run_html = f'<a href="{html.escape(url)}" class="doc-link" target="_blank">{run_html}</a>'
+            parts.append(run_html)
+        return ''.join(parts)
 
     def _process_paragraph_content(self, paragraph):
         """Process paragraph content including hyperlinks."""
-        content_parts = []
+        # Runs are collected in document order first so the whole paragraph
+        # goes through the bionic transform in a single call.
+        pieces = []
         p_elem = paragraph._p
+        runs = paragraph.runs
+        # Map each <w:r> element to its Run proxy once instead of rescanning
+        # paragraph.runs for every child.
+        runs_by_element = {run._r: run for run in runs}
 
         # Iterate through child elements to preserve order and detect hyperlinks
         for child in p_elem:
             tag = child.tag.split('}')[-1] if '}' in child.tag else child.tag
 
             if tag == 'r':  # Regular run
-                # Find the corresponding run object
-                for run in paragraph.runs:
-                    if run._r == child:
-                        content_parts.append(self._process_run(run))
-                        break
+                run = runs_by_element.get(child)
+                if run is not None:
+                    pieces.append(self._run_piece(run))
 
             elif tag == 'hyperlink':  # Hyperlink
                 url = self._get_hyperlink_url(child)
@@ -1755,19 +3904,70 @@ class BionicHtmlConverter:
                             if rPr is not None:
                                 bold_elem = rPr.find(f'{{{self.NSMAP["w"]}}}b')
                                 is_bold = bold_elem is not None
-
-                            bionic_text = self._apply_bionic_to_text(t_elem.text, is_bold)
-                            if url:
-                                content_parts.append(f'<a href="{html.escape(url)}" class="doc-link" target="_blank">{bionic_text}</a>')
-                            else:
-                                content_parts.append(bionic_text)
+                            pieces.append((t_elem.text, is_bold, None, url))
 
         # Fallback if no content was extracted (handles simple paragraphs)
-        if not content_parts:
-            for run in paragraph.runs:
-                content_parts.append(self._process_run(run))
+        if not pieces:
+            pieces = [self._run_piece(run) for run in runs]
 
-        return ''.join(content_parts)
+        return self._render_run_pieces(pieces)
+
+    ORDERED_NUM_FORMATS = frozenset(('decimal', 'lowerLetter', 'upperLetter', 'lowerRoman', 'upperRoman'))
+
+    def _build_numbering_index(self, doc):
+        """Map (numId, ilvl) to the numFmt of its abstract numbering level."""
+        try:
+            numbering_xml = doc.part.numbering_part._element
+        except Exception:
+            return {}
+        return self._index_numbering_xml(numbering_xml)
+
+    def _index_numbering_xml(self, numbering_xml):
+        w = self.NSMAP['w']
+        index = {}
+        # First definition wins, matching the order Word resolves them in.
+        level_formats = {}
+        for abstract in numbering_xml.findall(f'.//{{{w}}}abstractNum'):
+            abs_id = abstract.get(f'{{{w}}}abstractNumId')
+            if abs_id in level_formats:
+                continue
+            formats = {}
+            for lvl in abstract.findall(f'{{{w}}}lvl'):
+                ilvl = lvl.get(f'{{{w}}}ilvl')
+                if ilvl in formats:
+                    continue
+                numFmt = lvl.find(f'{{{w}}}numFmt')
+                formats[ilvl] = numFmt.get(f'{{{w}}}val', '') if numFmt is not None else None
+            level_formats[abs_id] = formats
+
+        seen_num_ids = set()
+        for num in numbering_xml.findall(f'.//{{{w}}}num'):
+            num_id = num.get(f'{{{w}}}numId')
+            if num_id in seen_num_ids:
+                continue
+            seen_num_ids.add(num_id)
+            abstract_id = num.find(f'{{{w}}}abstractNumId')
+            if abstract_id is None:
+                continue
+            for ilvl, fmt in level_formats.get(abstract_id.get(f'{{{w}}}val'), {}).items():
+                if fmt is not None:
+                    index[(num_id, ilvl)] = fmt
+        return index
+
+    def _get_style_name(self, paragraph):
+        """Lower-cased paragraph style name, cached per style id."""
+        style_id = paragraph._p.style
+        try:
+            return self._style_names[style_id]
+        except KeyError:
+            pass
+        style = self._get_paragraph_style(paragraph)
+        name = (style.name or '').lower() if style else ''
+        self._style_names[style_id] = name
+        return name
+
+    def _get_paragraph_style(self, paragraph):
+        return paragraph.style
 
     def _get_list_info(self, paragraph):
         """Get list numbering info (type and level) from paragraph."""
@@ -1776,7 +3976,7 @@ class BionicHtmlConverter:
 
         if numPr is None:
             # Check style for list
-            style_name = paragraph.style.name.lower() if paragraph.style else ''
+            style_name = self._get_style_name(paragraph)
             if 'list' in style_name:
                 return {'is_list': True, 'level': 0, 'is_ordered': 'number' in style_name or 'decimal' in style_name}
             return None
@@ -1787,32 +3987,13 @@ class BionicHtmlConverter:
         level = int(ilvl_elem.get(f'{{{self.NSMAP["w"]}}}val', 0)) if ilvl_elem is not None else 0
         num_id = numId_elem.get(f'{{{self.NSMAP["w"]}}}val') if numId_elem is not None else None
 
-        # Try to determine if ordered or unordered from numbering definitions
-        is_ordered = False
-        if num_id and self.doc:
-            try:
-                numbering_part = self.doc.part.numbering_part
-                if numbering_part:
-                    # Check the abstract numbering for this numId
-                    numbering_xml = numbering_part._element
-                    for num in numbering_xml.findall(f'.//{{{self.NSMAP["w"]}}}num'):
-                        if num.get(f'{{{self.NSMAP["w"]}}}numId') == num_id:
-                            abstract_id = num.find(f'{{{self.NSMAP["w"]}}}abstractNumId')
-                            if abstract_id is not None:
-                                abs_id = abstract_id.get(f'{{{self.NSMAP["w"]}}}val')
-                                for abstract in numbering_xml.findall(f'.//{{{self.NSMAP["w"]}}}abstractNum'):
-                                    if abstract.get(f'{{{self.NSMAP["w"]}}}abstractNumId') == abs_id:
-                                        for lvl in abstract.findall(f'{{{self.NSMAP["w"]}}}lvl'):
-                                            if lvl.get(f'{{{self.NSMAP["w"]}}}ilvl') == str(level):
-                                                numFmt = lvl.find(f'{{{self.NSMAP["w"]}}}numFmt')
-                                                if numFmt is not None:
-                                                    fmt = numFmt.get(f'{{{self.NSMAP["w"]}}}val', '')
-                                                    is_ordered = fmt in ('decimal', 'lowerLetter', 'upperLetter', 'lowerRoman', 'upperRoman')
-                                                break
-                                        break
-                            break
-            except Exception:
-                pass
+        # Ordered vs unordered comes from the numbering index built in convert()
+        is_ordered = False
+        if num_id:
+            if self._numbering_formats is None:
+                self._numbering_formats = self._build_numbering_index(self.doc) if self.doc else {}
+            fmt = self._numbering_formats.get((num_id, str(level)))
+            is_ordered = fmt in self.ORDERED_NUM_FORMATS
 
         return {'is_list': True, 'level': level, 'is_ordered': is_ordered, 'num_id': num_id}
 
@@ -1838,7 +4019,7 @@ class BionicHtmlConverter:
 
     def _get_paragraph_tag_and_class(self, paragraph):
         """Determine the appropriate HTML tag based on paragraph style."""
-        style_name = paragraph.style.name.lower() if paragraph.style else ''
+        style_name = self._get_style_name(paragraph)
 
         if 'heading 1' in style_name:
             return 'h1', 'doc-heading doc-h1'
@@ -1872,7 +4053,7 @@ class BionicHtmlConverter:
 
     def _process_paragraph(self, paragraph, skip_list_check=False):
         """Process a paragraph and return HTML."""
-        text = paragraph.text.strip()
+        text = self._paragraph_text(paragraph).strip()
         if not text:
             return '<p class="doc-paragraph">&nbsp;</p>'
 
@@ -1915,27 +4096,25 @@ class BionicHtmlConverter:
                     embed_id = blip.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
                     if embed_id:
                         try:
-                            image_part = doc.part.related_parts.get(embed_id)
-                            if image_part:
-                                image_bytes = image_part.blob
-                                content_type = image_part.content_type
+                            image = self._get_related_image(embed_id)
+                            if image:
+                                image_bytes, content_type = image
 
-                                # Generate image ID
-                                img_id = f"{self.doc_id}_{self.image_counter}"
+                                # Images are stored once by content hash, which is also their ID
+                                img_id = document_artifact_store.put(image_bytes, content_type)
                                 self.image_counter += 1
+                                if img_id not in self.image_hashes:
+                                    self.image_hashes.append(img_id)
 
-                                # Store image data
-                                image_store[img_id] = {
-                                    'data': base64.b64encode(image_bytes).decode('utf-8'),
-                                    'content_type': content_type
-                                }
-
-                                # Create base64 data URL for display
-                                data_url = f"data:{content_type};base64,{base64.b64encode(image_bytes).decode('utf-8')}"
+                                if self.inline_images:
+                                    image_url = f"data:{content_type};base64,{base64.b64encode(image_bytes).decode('ascii')}"
+                                else:
+                                    image_url = f"{self.image_url_base}/doc-image/{img_id}"
+                                lazy_attrs = ' loading="lazy" decoding="async"' if DOC_IMAGE_LAZY_LOADING else ''
 
                                 images_html.append(
                                     f'<div class="doc-image-container">'
-                                    f'<img src="{data_url}" class="doc-image" data-image-id="{img_id}" alt="Document image">'
+                                    f'<img src="{html.escape(image_url)}" class="doc-image" data-image-id="{img_id}" alt="Document image"{lazy_attrs}>'
                                     f'<div class="image-description" style="display:none;"></div>'
                                     f'</div>'
                                 )
@@ -1953,12 +4132,10 @@ class BionicHtmlConverter:
             for cell in row.cells:
                 cell_content = []
                 for paragraph in cell.paragraphs:
-                    if paragraph.text.strip():
+                    if self._paragraph_text(paragraph).strip():
                         # For table cells, we process inline without the paragraph wrapper
-                        parts = []
-                        for run in paragraph.runs:
-                            parts.append(self._process_run(run))
-                        cell_content.append(''.join(parts))
+                        pieces = [self._run_piece(run) for run in paragraph.runs]
+                        cell_content.append(self._render_run_pieces(pieces))
                     else:
                         cell_content.append('&nbsp;')
 
@@ -1970,8 +4147,36 @@ class BionicHtmlConverter:
 
     def convert(self, docx_file):
         """Convert a DOCX file to HTML with bionic reading formatting."""
+        return '\n'.join(self.iter_html(docx_file))
+
+    def iter_html(self, docx_file):
+        """Yield top-level HTML fragments for a DOCX file in document order."""
         doc = Document(docx_file)
         self.doc = doc  # Store reference for helper methods
+        self._numbering_formats = self._build_numbering_index(doc)
+        self._style_names = {}
+
+        # Identity maps from body XML elements to their python-docx proxies,
+        # built once so each body element is resolved in O(1) and the walk
+        # stays linear in document size.
+        paragraphs_by_element = {paragraph._p: paragraph for paragraph in doc.paragraphs}
+        tables_by_element = {table._tbl: table for table in doc.tables}
+
+        def blocks():
+            for element in doc.element.body:
+                if element.tag.endswith('p'):
+                    paragraph = paragraphs_by_element.get(element)
+                    if paragraph is not None:
+                        yield paragraph
+                elif element.tag.endswith('tbl'):
+                    table = tables_by_element.get(element)
+                    if table is not None:
+                        yield table
+
+        yield from self._render_blocks(blocks())
+
+    def _render_blocks(self, blocks):
+        """Render body paragraphs and tables, yielding each finished top-level fragment."""
         html_parts = []
 
         # Track list state for proper nested list handling
@@ -1979,21 +4184,6 @@ class BionicHtmlConverter:
         list_stack = []
         current_list_items = []
 
-        def close_lists_to_level(target_level):
-            """Close nested lists down to target level."""
-            nonlocal list_stack, current_list_items
-            while list_stack and list_stack[-1][1] >= target_level:
-                is_ordered, level = list_stack.pop()
-                tag = 'ol' if is_ordered else 'ul'
-                if current_list_items:
-                    list_html = f'<{tag} class="doc-list doc-list-level-{level}">{"".join(current_list_items)}</{tag}>'
-                    if list_stack:
-                        # Nest inside parent list item
-                        current_list_items = [list_html]
-                    else:
-                        html_parts.append(list_html)
-                        current_list_items = []
-
         def close_all_lists():
             """Close all open lists."""
             nonlocal list_stack, current_list_items
@@ -2008,269 +4198,1442 @@ class BionicHtmlConverter:
                         html_parts.append(list_html)
                         current_list_items = []
 
-        for element in doc.element.body:
-            # Check if it's a paragraph
-            if element.tag.endswith('p'):
-                for paragraph in doc.paragraphs:
-                    if paragraph._p == element:
-                        # Extract any images from this paragraph
-                        images = self._extract_images_from_paragraph(paragraph, doc)
-                        for img_html in images:
-                            close_all_lists()
-                            html_parts.append(img_html)
-
-                        # Check for list formatting
-                        list_info = self._get_list_info(paragraph)
-
-                        if list_info:
-                            level = list_info['level']
-                            is_ordered = list_info['is_ordered']
-
-                            # Handle list level changes
-                            if not list_stack:
-                                # Starting a new list
-                                list_stack.append((is_ordered, level))
-                                current_list_items = []
-                            elif level > list_stack[-1][1]:
-                                # Going deeper - start nested list
-                                list_stack.append((is_ordered, level))
-                            elif level < list_stack[-1][1]:
-                                # Going up - close nested lists
-                                while list_stack and list_stack[-1][1] > level:
-                                    old_ordered, old_level = list_stack.pop()
-                                    tag = 'ol' if old_ordered else 'ul'
-                                    if current_list_items:
-                                        nested_html = f'<{tag} class="doc-list doc-list-level-{old_level}">{"".join(current_list_items)}</{tag}>'
-                                        current_list_items = [f'<li class="doc-list-item">{nested_html}</li>']
-
-                                if not list_stack:
-                                    list_stack.append((is_ordered, level))
-
-                            # Process list item content using the hyperlink-aware method
-                            if paragraph.text.strip():
-                                content = self._process_paragraph_content(paragraph)
-                                indent = self._get_paragraph_indent(paragraph)
-                                style = f' style="margin-left: {indent}em"' if indent > 0 else ''
-                                current_list_items.append(f'<li class="doc-list-item"{style}>{content}</li>')
-                        else:
-                            # Not a list item - close any open lists
-                            close_all_lists()
-
-                            if paragraph.text.strip():
-                                para_html = self._process_paragraph(paragraph, skip_list_check=True)
-                                if para_html:
-                                    html_parts.append(para_html)
-                        break
-
-            # Check if it's a table
-            elif element.tag.endswith('tbl'):
-                close_all_lists()
+        for block in blocks:
+            if isinstance(block, Table):
+                close_all_lists()
+                html_parts.append(self._process_table(block))
+            else:
+                paragraph = block
+                # Extract any images from this paragraph
+                images = self._extract_images_from_paragraph(paragraph, self.doc)
+                for img_html in images:
+                    close_all_lists()
+                    html_parts.append(img_html)
+
+                # Check for list formatting
+                list_info = self._get_list_info(paragraph)
+
+                if list_info:
+                    level = list_info['level']
+                    is_ordered = list_info['is_ordered']
+
+                    # Handle list level changes
+                    if not list_stack:
+                        # Starting a new list
+                        list_stack.append((is_ordered, level))
+                        current_list_items = []
+                    elif level > list_stack[-1][1]:
+                        # Going deeper - start nested list
+                        list_stack.append((is_ordered, level))
+                    elif level < list_stack[-1][1]:
+                        # Going up - close nested lists
+                        while list_stack and list_stack[-1][1] > level:
+                            old_ordered, old_level = list_stack.pop()
+                            tag = 'ol' if old_ordered else 'ul'
+                            if current_list_items:
+                                nested_html = f'<{tag} class="doc-list doc-list-level-{old_level}">{"".join(current_list_items)}</{tag}>'
+                                current_list_items = [f'<li class="doc-list-item">{nested_html}</li>']
+
+                        if not list_stack:
+                            list_stack.append((is_ordered, level))
+
+                    # Process list item content using the hyperlink-aware method
+                    if self._paragraph_text(paragraph).strip():
+                        content = self._process_paragraph_content(paragraph)
+                        indent = self._get_paragraph_indent(paragraph)
+                        style = f' style="margin-left: {indent}em"' if indent > 0 else ''
+                        current_list_items.append(f'<li class="doc-list-item"{style}>{content}</li>')
+                else:
+                    # Not a list item - close any open lists
+                    close_all_lists()
+
+                    if self._paragraph_text(paragraph).strip():
+                        para_html = self._process_paragraph(paragraph, skip_list_check=True)
+                        if para_html:
+                            html_parts.append(para_html)
+
+            if html_parts:
+                html_parts[0] = self._take_css_rules() + html_parts[0]
+                yield from html_parts
+                html_parts.clear()
+
+        # Close any remaining open lists
+        close_all_lists()
+        if html_parts:
+            html_parts[0] = self._take_css_rules() + html_parts[0]
+            yield from html_parts
+
+
+W_RUN_TAG = qn('w:r')
+W_HYPERLINK_TAG = qn('w:hyperlink')
+W_RPR_TAG = qn('w:rPr')
+W_BOLD_TAG = qn('w:b')
+W_ITALIC_TAG = qn('w:i')
+W_UNDERLINE_TAG = qn('w:u')
+W_COLOR_TAG = qn('w:color')
+W_SIZE_TAG = qn('w:sz')
+W_FONTS_TAG = qn('w:rFonts')
+# Run children that python-docx's Run.text translates to text.
+W_RUN_TEXT_TAGS = frozenset(qn(tag) for tag in ('w:br', 'w:cr', 'w:noBreakHyphen', 'w:ptab', 'w:t', 'w:tab'))
+
+
+class StreamingBionicHtmlConverter(BionicHtmlConverter):
+    """Converter engine that streams word/document.xml straight out of the zip.
+
+    Content types, relationships, styles and numbering are indexed up front.
+    The body is parsed with lxml iterparse using python-docx's element classes,
+    so each paragraph and table is rendered by the same helpers as the
+    python-docx engine and then cleared from the tree. No Document object
+    model is built and image parts are only read when referenced.
+    """
+
+    PACKAGE_NSMAP = {
+        'ct': 'http://schemas.openxmlformats.org/package/2006/content-types',
+        'pr': 'http://schemas.openxmlformats.org/package/2006/relationships',
+    }
+    RT_PREFIX = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+    DOCUMENT_MAIN_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml'
+
+    def __init__(self, doc_id=None, image_url_base='', inline_images=False):
+        super().__init__(doc_id, image_url_base, inline_images)
+        self._zip = None
+        self._content_type_defaults = {}
+        self._content_type_overrides = {}
+        self._document_rels = {}
+        self._styles = None
+
+    def iter_html(self, docx_file):
+        """Yield top-level HTML fragments while parsing the document body."""
+        w = self.NSMAP['w']
+        body_tag, p_tag, tbl_tag = f'{{{w}}}body', f'{{{w}}}p', f'{{{w}}}tbl'
+        with zipfile.ZipFile(docx_file) as zf:
+            self._zip = zf
+            try:
+                document_partname = self._index_package(zf)
+                with zf.open(document_partname[1:]) as source:
+                    events = etree.iterparse(
+                        source,
+                        events=('start', 'end'),
+                        tag=(body_tag, p_tag, tbl_tag),
+                        remove_blank_text=True,
+                        resolve_entities=False,
+                    )
+                    events.set_element_class_lookup(docx_element_class_lookup)
+                    yield from self._render_blocks(self._iter_body_blocks(events, body_tag, tbl_tag))
+            finally:
+                self._zip = None
+
+    def _iter_body_blocks(self, events, body_tag, tbl_tag):
+        body = None
+        for event, element in events:
+            if event == 'start':
+                if body is None and element.tag == body_tag:
+                    body = element
+                continue
+            if body is None or element.getparent() is not body:
+                continue  # nested in a table; rendered with its table
+
+            if element.tag == tbl_tag:
+                yield Table(element, None)
+            else:
+                yield Paragraph(element, None)
+
+            # Rendered: free this block and any siblings skipped before it.
+            element.clear()
+            while element.getprevious() is not None:
+                del body[0]
+
+    def _index_package(self, zf):
+        """Index the package parts the converter needs; return the main document partname."""
+        types_xml = etree.fromstring(zf.read('[Content_Types].xml'))
+        self._content_type_defaults = {
+            item.get('Extension', '').lower(): item.get('ContentType')
+            for item in types_xml.iterfind('ct:Default', self.PACKAGE_NSMAP)
+        }
+        self._content_type_overrides = {
+            item.get('PartName', '').lower(): item.get('ContentType')
+            for item in types_xml.iterfind('ct:Override', self.PACKAGE_NSMAP)
+        }
+
+        package_rels = self._read_relationships(zf, '/')
+        document_partname = self._related_partname(package_rels, 'officeDocument')
+        if document_partname is None:
+            raise ValueError('file is not a Word file, no main document part')
+        content_type = self._get_content_type(document_partname)
+        if content_type != self.DOCUMENT_MAIN_CONTENT_TYPE:
+            raise ValueError(f"file is not a Word file, content type is '{content_type}'")
+
+        self._document_rels = self._read_relationships(zf, document_partname)
+
+        # python-docx falls back to its default styles when a package has none.
+        styles_partname = self._related_partname(self._document_rels, 'styles')
+        if styles_partname:
+            styles_xml = parse_docx_xml(zf.read(styles_partname[1:]))
+        else:
+            styles_xml = StylesPart.default(None).element
+        self._styles = Styles(styles_xml)
+        self._style_names = {}
+
+        numbering_partname = self._related_partname(self._document_rels, 'numbering')
+        if numbering_partname:
+            self._numbering_formats = self._index_numbering_xml(parse_docx_xml(zf.read(numbering_partname[1:])))
+        else:
+            self._numbering_formats = {}
+
+        return document_partname
+
+    def _read_relationships(self, zf, source_partname):
+        """Map rId -> (type, target_ref, partname or None for external targets)."""
+        base_uri = posixpath.dirname(source_partname)
+        rels_name = posixpath.join(base_uri, '_rels', posixpath.basename(source_partname) + '.rels').lstrip('/')
+        try:
+            rels_xml = etree.fromstring(zf.read(rels_name))
+        except KeyError:
+            return {}
+
+        rels = {}
+        for rel in rels_xml.iterfind('pr:Relationship', self.PACKAGE_NSMAP):
+            target = rel.get('Target', '')
+            if rel.get('TargetMode') == 'External':
+                rels[rel.get('Id')] = (rel.get('Type'), target, None)
+                continue
+            partname = posixpath.normpath(posixpath.join(base_uri, target))
+            target_ref = partname[1:] if base_uri == '/' else posixpath.relpath(partname, base_uri)
+            rels[rel.get('Id')] = (rel.get('Type'), target_ref, partname)
+        return rels
+
+    def _related_partname(self, rels, rel_type):
+        for rtype, _target_ref, partname in rels.values():
+            if rtype == self.RT_PREFIX + rel_type and partname:
+                return partname
+        return None
+
+    def _get_content_type(self, partname):
+        content_type = self._content_type_overrides.get(partname.lower())
+        if content_type is None:
+            content_type = self._content_type_defaults.get(posixpath.splitext(partname)[1][1:].lower())
+        if content_type is None:
+            raise KeyError(f'no content type for part {partname}')
+        return content_type
+
+    def _get_relationship_target(self, r_id):
+        rel = self._document_rels.get(r_id)
+        if rel and rel[1]:
+            return rel[1]
+        return None
+
+    def _get_related_image(self, embed_id):
+        rel = self._document_rels.get(embed_id)
+        if not rel or rel[2] is None:
+            return None
+        partname = rel[2]
+        return self._zip.read(partname[1:]), self._get_content_type(partname)
+
+    def _get_paragraph_style(self, paragraph):
+        return self._styles.get_by_id(paragraph._p.style, WD_STYLE_TYPE.PARAGRAPH)
+
+    # The readers below work on the parsed elements directly instead of going
+    # through python-docx's Run/Font proxies. Elements carry python-docx's
+    # element classes, so str() and .val give the same text and values.
+
+    def _paragraph_text(self, paragraph):
+        parts = []
+        for child in paragraph._p:
+            if child.tag == W_RUN_TAG:
+                parts.append(self._run_element_text(child))
+            elif child.tag == W_HYPERLINK_TAG:
+                parts.extend(self._run_element_text(r) for r in child if r.tag == W_RUN_TAG)
+        return ''.join(parts)
+
+    def _run_text(self, run):
+        return self._run_element_text(run._r)
+
+    @staticmethod
+    def _run_element_text(r_elem):
+        return ''.join(str(child) for child in r_elem if child.tag in W_RUN_TEXT_TAGS)
+
+    @staticmethod
+    def _run_properties(run):
+        """First occurrence of each direct <w:rPr> child, keyed by tag."""
+        props = {}
+        rPr = run._r.find(W_RPR_TAG)
+        if rPr is not None:
+            for child in rPr:
+                props.setdefault(child.tag, child)
+        return props
+
+    def _run_is_bold(self, run):
+        bold = self._run_properties(run).get(W_BOLD_TAG)
+        return bold is not None and bold.val is True
+
+    def _get_run_style(self, run):
+        props = self._run_properties(run)
+        if not props:
+            return None
+        styles = []
+
+        italic = props.get(W_ITALIC_TAG)
+        if italic is not None and italic.val:
+            styles.append('font-style: italic')
+        underline = props.get(W_UNDERLINE_TAG)
+        if underline is not None and underline.val:
+            styles.append('text-decoration: underline')
+        color = props.get(W_COLOR_TAG)
+        if color is not None and color.val != ST_HexColorAuto.AUTO:
+            styles.append(f'color: #{color.val}')
+        size = props.get(W_SIZE_TAG)
+        if size is not None and size.val:
+            styles.append(f'font-size: {size.val.pt}pt')
+        fonts = props.get(W_FONTS_TAG)
+        if fonts is not None and fonts.ascii:
+            styles.append(f'font-family: {_css_string(fonts.ascii)}, sans-serif')
+
+        return '; '.join(styles) if styles else None
+
+
+DOCX_CONVERTER_ENGINES = {
+    'python-docx': BionicHtmlConverter,
+    'streaming': StreamingBionicHtmlConverter,
+}
+
+
+def _create_docx_converter(doc_id, image_url_base='', inline_images=False):
+    converter_cls = DOCX_CONVERTER_ENGINES.get(DOCX_CONVERTER_ENGINE, StreamingBionicHtmlConverter)
+    return converter_cls(doc_id=doc_id, image_url_base=image_url_base, inline_images=inline_images)
+
+
+conversion_cache = DiskLruCache(
+    CONVERSION_CACHE_DIR,
+    max_entries=CONVERSION_CACHE_MAX_ENTRIES,
+    max_bytes=CONVERSION_CACHE_MAX_MB * 1024 * 1024,
+)
+conversion_memory_cache = OrderedDict()  # cache key -> serialised entry
+conversion_cache_lock = Lock()
+conversion_cache_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stale": 0, "memory_bytes": 0}
+
+cpu_pool = CpuWorkerPool(
+    workers=CPU_POOL_WORKERS,
+    max_jobs_per_worker=CPU_POOL_MAX_JOBS_PER_WORKER,
+    max_rss_bytes=CPU_POOL_MAX_RSS_MB * 1024 * 1024,
+    default_timeout=CPU_POOL_CONVERT_TIMEOUT_SECONDS,
+    # Workers import this module up front; as __main__ it is already loaded by spawn.
+    preload=(__name__,),
+)
+atexit.register(cpu_pool.close)
+
+
+def _convert_docx_job(docx_bytes, doc_id, image_url_base, inline_images=False):
+    """CPU pool job: convert a DOCX, returning (html, image_hashes, paragraphs, blocks)."""
+    converter = _create_docx_converter(doc_id, image_url_base, inline_images)
+    blocks = list(converter.iter_html(io.BytesIO(docx_bytes)))
+    html_content = '\n'.join(blocks)
+    return html_content, converter.image_hashes, _extract_document_paragraphs(html_content), len(blocks)
+
+
+def _convert_docx_stream_job(docx_bytes, doc_id, image_url_base):
+    """CPU pool job: yield ('chunk', html) as the DOCX converts, then ('done', (image_hashes, paragraphs, blocks)).
+
+    Chunks hold up to CONVERT_STREAM_CHUNK_BLOCKS top-level blocks, or whatever
+    is ready once CONVERT_STREAM_FLUSH_MS has passed.
+    """
+    converter = _create_docx_converter(doc_id, image_url_base)
+    html_parts = []
+    pending = []
+    pending_since = time.perf_counter()
+    for block_html in converter.iter_html(io.BytesIO(docx_bytes)):
+        html_parts.append(block_html)
+        pending.append(block_html)
+        now = time.perf_counter()
+        if len(pending) >= CONVERT_STREAM_CHUNK_BLOCKS or (now - pending_since) * 1000.0 >= CONVERT_STREAM_FLUSH_MS:
+            yield 'chunk', '\n'.join(pending)
+            pending.clear()
+            pending_since = time.perf_counter()
+    if pending:
+        yield 'chunk', '\n'.join(pending)
+    paragraphs = _extract_document_paragraphs('\n'.join(html_parts))
+    yield 'done', (converter.image_hashes, paragraphs, len(html_parts))
+
+
+def _doc_image_url_base():
+    """Absolute origin for /doc-image URLs, so the HTML also works inside the extension viewer."""
+    return DOC_IMAGE_URL_BASE or request.url_root.rstrip('/')
+
+
+@app.route('/')
+def index():
+    """Serve the main page."""
+    return render_template('index.html')
+
+
+def _read_docx_upload():
+    """Return (filename, bytes) for the uploaded DOCX, or (None, error response)."""
+    if 'file' not in request.files:
+        return None, (jsonify({'error': 'No file provided'}), 400)
+
+    file = request.files['file']
+
+    if file.filename == '':
+        return None, (jsonify({'error': 'No file selected'}), 400)
+
+    if not file.filename.lower().endswith('.docx'):
+        return None, (jsonify({'error': 'Only DOCX files are supported'}), 400)
+
+    return (secure_filename(file.filename), file.read()), None
+
+
+def _wants_inline_images():
+    # Set by clients that save the HTML (the popup stores it in chrome.storage);
+    # /doc-image blobs expire with the document, data: URLs do not.
+    return str(request.form.get('inlineImages', '')).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _wants_summary_precompute():
+    precompute_flag = str(request.form.get('precomputeSummaries', '')).strip().lower()
+    return precompute_flag in ('1', 'true', 'yes', 'on') or (SUMMARY_PRECOMPUTE_ENABLED and precompute_flag not in ('0', 'false', 'no', 'off'))
+
+
+def _finish_converted_document(doc_id, html_content, precompute, image_hashes, paragraphs=None):
+    paragraphs = _remember_document_paragraphs(doc_id, html_content, paragraphs)
+    document_artifact_store.register_document(doc_id, image_hashes)
+    if precompute:
+        asyncio.run_coroutine_threadsafe(_start_summary_precompute(doc_id), _get_async_loop())
+    return paragraphs
+
+
+def _conversion_cache_key(docx_bytes, image_url_base, inline_images=False):
+    """Key a conversion by the upload's SHA-256 plus everything else that shapes the HTML."""
+    upload_hash = hashlib.sha256(docx_bytes).hexdigest()
+    image_mode = "inline" if inline_images else image_url_base
+    return f"convert|{DOCX_CONVERTER_VERSION}|{int(DOC_IMAGE_LAZY_LOADING)}|{image_mode}|{upload_hash}"
+
+
+def _remember_conversion_locked(cache_key, raw):
+    previous = conversion_memory_cache.pop(cache_key, None)
+    if previous is not None:
+        conversion_cache_stats["memory_bytes"] -= len(previous)
+    if len(raw) > CONVERSION_CACHE_MEMORY_MB * 1024 * 1024:
+        return
+    conversion_memory_cache[cache_key] = raw
+    conversion_cache_stats["memory_bytes"] += len(raw)
+    while conversion_cache_stats["memory_bytes"] > CONVERSION_CACHE_MEMORY_MB * 1024 * 1024:
+        _key, evicted = conversion_memory_cache.popitem(last=False)
+        conversion_cache_stats["memory_bytes"] -= len(evicted)
+
+
+def _forget_cached_conversion(cache_key):
+    with conversion_cache_lock:
+        previous = conversion_memory_cache.pop(cache_key, None)
+        if previous is not None:
+            conversion_cache_stats["memory_bytes"] -= len(previous)
+    conversion_cache.delete(cache_key)
+
+
+def _read_cached_conversion(cache_key):
+    """Return `(entry, tier)` for a cached conversion, or `(None, "")` on a miss."""
+    with conversion_cache_lock:
+        raw = conversion_memory_cache.get(cache_key)
+        if raw is not None:
+            conversion_memory_cache.move_to_end(cache_key)
+    tier = "memory"
+    if raw is None:
+        raw = conversion_cache.get(cache_key)
+        tier = "disk"
+    if raw is None:
+        return None, ""
+    try:
+        entry = json.loads(raw)
+    except ValueError:
+        entry = None
+    if not isinstance(entry, dict) or not isinstance(entry.get("html"), str):
+        _forget_cached_conversion(cache_key)
+        return None, ""
+    if tier == "disk":
+        with conversion_cache_lock:
+            _remember_conversion_locked(cache_key, raw)
+    return entry, tier
+
+
+def _reuse_cached_conversion(cache_key, precompute):
+    """Open a previously converted upload under a fresh docId, or return None on a miss.
+
+    Only the conversion output is shared between uploads of the same file;
+    each upload gets its own document state, so closing one does not affect
+    the others.
+    """
+    if not CONVERSION_CACHE_ENABLED:
+        return None
+    entry, tier = _read_cached_conversion(cache_key)
+    if entry is None:
+        with conversion_cache_lock:
+            conversion_cache_stats["misses"] += 1
+        return None
+
+    doc_id = str(uuid.uuid4())[:8]
+    image_hashes = list(entry.get("imageHashes") or [])
+    # Registering first pins the images against artifact store GC before they are checked.
+    document_artifact_store.register_document(doc_id, image_hashes)
+    if not all(document_artifact_store.has(image_hash) for image_hash in image_hashes):
+        document_artifact_store.drop_document(doc_id)
+        _forget_cached_conversion(cache_key)
+        with conversion_cache_lock:
+            conversion_cache_stats["stale"] += 1
+            conversion_cache_stats["misses"] += 1
+        return None
+
+    _finish_converted_document(doc_id, entry["html"], precompute, image_hashes, entry.get("paragraphs"))
+    with conversion_cache_lock:
+        conversion_cache_stats[f"{tier}_hits"] += 1
+    return {**entry, "docId": doc_id}
+
+
+def _store_cached_conversion(cache_key, html_content, image_hashes, paragraphs, blocks):
+    if not CONVERSION_CACHE_ENABLED:
+        return
+    entry = {
+        "html": html_content,
+        "imageHashes": list(dict.fromkeys(image_hashes)),
+        "paragraphs": paragraphs,
+        "blocks": blocks,
+        "storedAt": time.time(),
+    }
+    raw = json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    with conversion_cache_lock:
+        _remember_conversion_locked(cache_key, raw)
+    conversion_cache.set(cache_key, raw)
+
+
+@app.route('/convert', methods=['POST'])
+def convert_docx():
+    """Handle DOCX file upload and conversion."""
+    upload, error_response = _read_docx_upload()
+    if error_response is not None:
+        return error_response
+    filename, docx_bytes = upload
+
+    try:
+        image_url_base = _doc_image_url_base()
+        inline_images = _wants_inline_images()
+        precompute = _wants_summary_precompute()
+        cache_key = _conversion_cache_key(docx_bytes, image_url_base, inline_images)
+        cached = _reuse_cached_conversion(cache_key, precompute)
+        if cached is not None:
+            return jsonify({
+                'success': True,
+                'html': cached['html'],
+                'filename': filename,
+                'docId': cached['docId'],
+                'summaryPrecompute': precompute,
+                'cached': True,
+            })
+
+        # Generate a unique document ID for image storage
+        doc_id = str(uuid.uuid4())[:8]
+
+        # Convert to HTML with bionic reading
+        html_content, image_hashes, paragraphs, blocks = cpu_pool.run(
+            _convert_docx_job, docx_bytes, doc_id, image_url_base, inline_images, timeout=CPU_POOL_CONVERT_TIMEOUT_SECONDS,
+        )
+
+        _finish_converted_document(doc_id, html_content, precompute, image_hashes, paragraphs)
+        _store_cached_conversion(cache_key, html_content, image_hashes, paragraphs, blocks)
+
+        return jsonify({
+            'success': True,
+            'html': html_content,
+            'filename': filename,
+            'docId': doc_id,
+            'summaryPrecompute': precompute,
+            'cached': False,
+        })
+
+    except CpuJobTimeout:
+        return jsonify({'error': 'Document conversion timed out'}), 504
+    except Exception as e:
+        return jsonify({'error': f'Failed to process document: {str(e)}'}), 500
+
+
+def _convert_stream_events(docx_bytes, filename, precompute, image_url_base):
+    """Yield /convert-stream events: start (with docId), html chunks, then done or error.
+
+    The conversion runs as a streaming CPU pool job, so the first screen is
+    sent as soon as it is rendered. Joining the chunk html with "\n" gives the
+    same document as /convert. A cached conversion is sent as a single chunk.
+    """
+    started = time.perf_counter()
+    cache_key = _conversion_cache_key(docx_bytes, image_url_base)
+    cached = _reuse_cached_conversion(cache_key, precompute)
+    if cached is not None:
+        yield {'type': 'start', 'docId': cached['docId'], 'filename': filename, 'cached': True}
+        yield {'type': 'chunk', 'index': 0, 'html': cached['html']}
+        yield {
+            'type': 'done',
+            'success': True,
+            'docId': cached['docId'],
+            'blocks': int(cached.get('blocks') or 0),
+            'chunks': 1,
+            'summaryPrecompute': precompute,
+            'cached': True,
+            'elapsedMs': round((time.perf_counter() - started) * 1000.0, 1),
+        }
+        return
+
+    doc_id = str(uuid.uuid4())[:8]
+    yield {'type': 'start', 'docId': doc_id, 'filename': filename, 'cached': False}
+
+    chunks = []
+    blocks = 0
+    try:
+        job = cpu_pool.iter(
+            _convert_docx_stream_job, docx_bytes, doc_id, image_url_base, timeout=CPU_POOL_CONVERT_TIMEOUT_SECONDS,
+        )
+        for kind, value in job:
+            if kind == 'chunk':
+                yield {'type': 'chunk', 'index': len(chunks), 'html': value}
+                chunks.append(value)
+            else:
+                image_hashes, paragraphs, blocks = value
+
+        html_content = '\n'.join(chunks)
+        _finish_converted_document(doc_id, html_content, precompute, image_hashes, paragraphs)
+        _store_cached_conversion(cache_key, html_content, image_hashes, paragraphs, blocks)
+    except CpuJobTimeout:
+        yield {'type': 'error', 'docId': doc_id, 'error': 'Document conversion timed out'}
+        return
+    except Exception as e:
+        yield {'type': 'error', 'docId': doc_id, 'error': f'Failed to process document: {str(e)}'}
+        return
+
+    yield {
+        'type': 'done',
+        'success': True,
+        'docId': doc_id,
+        'blocks': blocks,
+        'chunks': len(chunks),
+        'summaryPrecompute': precompute,
+        'cached': False,
+        'elapsedMs': round((time.perf_counter() - started) * 1000.0, 1),
+    }
+
+
+@app.route('/doc-image/<image_hash>', methods=['GET'])
+def get_doc_image(image_hash):
+    """Serve a document image by content hash; the URL never changes meaning, so it is cached as immutable."""
+    image = document_artifact_store.get(image_hash)
+    if image is None:
+        return jsonify({'error': 'Image not found'}), 404
+
+    content_type, image_bytes = image
+    headers = {'Cache-Control': DOC_IMAGE_CACHE_CONTROL, 'ETag': f'"{image_hash}"'}
+    if request.if_none_match.contains(image_hash):
+        return Response(status=304, headers=headers)
+    return Response(image_bytes, mimetype=content_type, headers=headers)
+
+
+@app.route('/convert-stream', methods=['POST'])
+def convert_docx_stream():
+    """Convert an uploaded DOCX progressively as Server-Sent Events (or NDJSON with ?format=ndjson)."""
+    upload, error_response = _read_docx_upload()
+    if error_response is not None:
+        return error_response
+    filename, docx_bytes = upload
+
+    stream_format = _requested_stream_format(request.args.get("format"), request.headers.get("Accept"))
+    events = _convert_stream_events(docx_bytes, filename, _wants_summary_precompute(), _doc_image_url_base())
+    return Response(
+        (_format_stream_event(event, stream_format) for event in events),
+        mimetype=STREAM_MIMETYPES[stream_format],
+        headers=STREAM_HEADERS,
+    )
+
+
+
+def _build_summary_prompt(text: str) -> str:
+    return f"""Summarize the following paragraph into concise bullet points.
+Return ONLY valid JSON in this exact format, nothing else:
+{{"bullets": ["point 1", "point 2", "point 3"]}}
+
+Paragraph:
+{text}"""
+
+
+def _build_rephrase_prompt(text: str, writing_sample: str = "", style_profile: str = "") -> str:
+    if style_profile:
+        return f"""You are a writing assistant. Rephrase the following paragraph to match the writing style described in the style profile below: its tone, vocabulary level, sentence structure and voice.
+
+STYLE PROFILE (match this style):
+{style_profile}
+
+PARAGRAPH TO REPHRASE:
+{text}
+
+Return ONLY valid JSON in this exact format, nothing else:
+{{
+  "rephrased": "the rephrased paragraph here",
+  "terms": [
+    {{"word": "difficult word", "definition": "simple definition"}},
+    {{"word": "another term", "definition": "its definition"}}
+  ]
+}}
+
+The "terms" array should contain any words or phrases in your rephrased text that might be unfamiliar or technical to a general reader. Keep definitions concise (under 15 words)."""
+    if writing_sample:
+        return f"""You are a writing assistant. Rephrase the following paragraph to match the writing style, vocabulary level, and tone of the provided writing sample.
+
+WRITING SAMPLE (match this style):
+{writing_sample}
+
+PARAGRAPH TO REPHRASE:
+{text}
+
+Return ONLY valid JSON in this exact format, nothing else:
+{{
+  "rephrased": "the rephrased paragraph here",
+  "terms": [
+    {{"word": "difficult word", "definition": "simple definition"}},
+    {{"word": "another term", "definition": "its definition"}}
+  ]
+}}
+
+The "terms" array should contain any words or phrases in your rephrased text that might be unfamiliar or technical to a general reader. Keep definitions concise (under 15 words)."""
+    return f"""You are a writing assistant. Rephrase the following paragraph to make it clearer and easier to understand while preserving the original meaning. Use simpler vocabulary where possible, but don't oversimplify technical concepts.
+
+PARAGRAPH TO REPHRASE:
+{text}
+
+Return ONLY valid JSON in this exact format, nothing else:
+{{
+  "rephrased": "the rephrased paragraph here",
+  "terms": [
+    {{"word": "difficult word", "definition": "simple definition"}},
+    {{"word": "another term", "definition": "its definition"}}
+  ]
+}}
+
+The "terms" array should contain any words or phrases in your rephrased text that might be unfamiliar or technical to a general reader. Keep definitions concise (under 15 words). If there are no difficult terms, return an empty array."""
+
+
+style_profile_store = DiskLruCache(
+    STYLE_PROFILE_DIR,
+    max_entries=STYLE_PROFILE_MAX_ENTRIES,
+    max_bytes=STYLE_PROFILE_MAX_ENTRIES * 64 * 1024,
+)
+
+
+def _style_id_for_sample(writing_sample: str) -> str:
+    return hashlib.sha256(_normalize_paragraph_text(writing_sample).encode("utf-8")).hexdigest()[:24]
+
+
+def _get_style_profile(style_id: str):
+    style_id = str(style_id or "").strip()
+    if not re.fullmatch(r"[0-9a-f]{24}", style_id):
+        return None
+    return _read_cached_json(style_profile_store, f"style|{style_id}")
+
+
+async def _distill_style_profile(writing_sample: str) -> str:
+    prompt = f"""Study the writing sample below and write a compact style profile that another writer could follow to imitate it.
+Cover tone, formality, vocabulary level, typical sentence length and structure, voice (person, active/passive), and any distinctive habits.
+Finish with two or three short phrases quoted from the sample that show the style. Keep the whole profile under 150 words.
+Return ONLY valid JSON in this exact format, nothing else:
+{{"profile": "the style profile"}}
+
+WRITING SAMPLE:
+{writing_sample}"""
+    result = await _generate_ai_json_async(
+        get_gemini_client(),
+        [types.Part.from_text(text=prompt)],
+        request_kind="style_profile",
+        log_context={"route": "/register-style", "writing_sample_chars": len(writing_sample), "prompt_chars": len(prompt)},
+        model_name=PARAGRAPH_AI_MODEL,
+        thinking_level="LOW",
+    )
+    return str(result.get("profile") or "").strip()
+
+
+async def _register_style_async(data):
+    """Store a writing sample once and return a `styleId` for /rephrase."""
+    data = data or {}
+    writing_sample = str(data.get("writingSample") or "").strip()
+    if not writing_sample:
+        return {'error': 'No writing sample provided'}, 400
+
+    style_id = _style_id_for_sample(writing_sample)
+    distill = STYLE_PROFILE_DISTILL if data.get("distill") is None else bool(data.get("distill"))
+    existing = await asyncio.to_thread(_get_style_profile, style_id)
+    if existing is not None and (existing.get("profile") or not distill):
+        return {
+            "styleId": style_id,
+            "distilled": bool(existing.get("profile")),
+            "profile": existing.get("profile", ""),
+            "registered": False,
+        }, 200
+
+    profile = ""
+    if distill:
+        try:
+            profile = await _distill_style_profile(writing_sample)
+        except Exception as e:
+            # Without a profile, rephrasing by styleId falls back to the stored sample.
+            _log_gemini_event("style_profile_error", error_type=type(e).__name__, error_message=str(e)[:240])
+
+    await asyncio.to_thread(
+        _write_cached_json,
+        style_profile_store,
+        f"style|{style_id}",
+        {"sample": writing_sample, "profile": profile, "created_at": time.time()},
+    )
+    return {
+        "styleId": style_id,
+        "distilled": bool(profile),
+        "profile": profile,
+        "sampleChars": len(writing_sample),
+        "registered": True,
+    }, 200
+
+
+@app.route('/register-style', methods=['POST', 'OPTIONS'])
+def register_style():
+    """Store a writing sample once and return a `styleId` for /rephrase."""
+    if request.method == 'OPTIONS':
+        return _set_cors_headers(jsonify({'ok': True}))
+
+    payload, status = _run_async(_register_style_async(request.get_json(silent=True)))
+    return jsonify(payload), status
+
+
+async def _prepare_paragraph_request(kind: str, data, *, route: str):
+    """Validate a summary/rephrase request body.
+
+    Returns `(paragraph_request, None)` or `(None, (error_payload, status))`.
+    """
+    if not data or 'text' not in data:
+        return None, ({'error': 'No text provided'}, 400)
+
+    text = str(data['text'] or '').strip()
+    if not text:
+        return None, ({'error': 'Empty text'}, 400)
+
+    if kind == "summary":
+        prompt = _build_summary_prompt(text)
+        cache_key = _paragraph_ai_cache_key("summary", SUMMARY_PROMPT_VERSION, PARAGRAPH_AI_MODEL, text)
+        log_context = {"route": route, "text_chars": len(text), "prompt_chars": len(prompt)}
+        request_kind = "paragraph_summary"
+    else:
+        style_id = str(data.get('styleId') or '').strip()
+        writing_sample = str(data.get('writingSample') or '').strip()
+        style_profile = ""
+        style_key = writing_sample
+        if style_id:
+            style = await asyncio.to_thread(_get_style_profile, style_id)
+            if style is None:
+                return None, ({'error': 'Style not found', 'styleExpired': True}, 404)
+            style_profile = style.get("profile", "")
+            writing_sample = "" if style_profile else style.get("sample", "")
+            style_key = f"style:{style_id}:{STYLE_PROFILE_PROMPT_VERSION if style_profile else 'sample'}"
+        prompt = _build_rephrase_prompt(text, writing_sample, style_profile)
+        cache_key = _paragraph_ai_cache_key("rephrase", REPHRASE_PROMPT_VERSION, PARAGRAPH_AI_MODEL, text, style_key)
+        log_context = {
+            "route": route,
+            "text_chars": len(text),
+            "style_id": style_id,
+            "writing_sample_chars": len(writing_sample),
+            "style_profile_chars": len(style_profile),
+            "prompt_chars": len(prompt),
+        }
+        request_kind = "paragraph_rephrase"
+
+    return {
+        "kind": kind,
+        "text": text,
+        "prompt": prompt,
+        "cache_key": cache_key,
+        "request_kind": request_kind,
+        "log_context": log_context,
+    }, None
+
+
+async def _run_paragraph_request(paragraph_request: dict, *, on_text=None) -> dict:
+    result = await _generate_ai_json_async(
+        get_gemini_client(),
+        [types.Part.from_text(text=paragraph_request["prompt"])],
+        request_kind=paragraph_request["request_kind"],
+        log_context=paragraph_request["log_context"],
+        model_name=PARAGRAPH_AI_MODEL,
+        thinking_level="LOW",
+        on_text=on_text,
+    )
+    await _set_cached_paragraph_ai_result(paragraph_request["cache_key"], result)
+    return result
+
+
+async def _paragraph_ai_async(kind: str, data, *, route: str):
+    started_at = time.perf_counter()
+    paragraph_request, error = await _prepare_paragraph_request(kind, data, route=route)
+    if error is not None:
+        return error
+
+    cache_key = paragraph_request["cache_key"]
+    cached_result, cache_tier = await _get_cached_paragraph_ai_result(cache_key)
+    if cached_result is not None:
+        return {**cached_result, "debug": _paragraph_ai_cache_debug(cache_key, cache_tier, started_at)}, 200
+
+    try:
+        result = await _run_paragraph_request(paragraph_request)
+        return {**result, "debug": _paragraph_ai_cache_debug(cache_key, "", started_at)}, 200
+    except json.JSONDecodeError:
+        return {'error': 'Failed to parse AI response'}, 500
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+
+async def _summarize_paragraph_async(data):
+    """Summarize a paragraph into bullet points using Gemini."""
+    _interactive_ai_started()
+    try:
+        return await _paragraph_ai_async("summary", data, route="/summarize")
+    finally:
+        _interactive_ai_finished()
+
+
+@app.route('/summarize', methods=['POST'])
+def summarize_paragraph():
+    """Summarize a paragraph into bullet points using Gemini."""
+    payload, status = _run_async(_summarize_paragraph_async(request.get_json()))
+    return jsonify(payload), status
+
+
+async def _rephrase_paragraph_async(data):
+    """Rephrase a paragraph using Gemini, optionally matching a writing style."""
+    _interactive_ai_started()
+    try:
+        return await _paragraph_ai_async("rephrase", data, route="/rephrase")
+    finally:
+        _interactive_ai_finished()
+
 
-                for table in doc.tables:
-                    if table._tbl == element:
-                        html_parts.append(self._process_table(table))
-                        break
+@app.route('/rephrase', methods=['POST'])
+def rephrase_paragraph():
+    """Rephrase a paragraph using Gemini, optionally matching a writing style."""
+    payload, status = _run_async(_rephrase_paragraph_async(request.get_json()))
+    return jsonify(payload), status
 
-        # Close any remaining open lists
-        close_all_lists()
 
-        return '\n'.join(html_parts)
+def _paragraph_stream_event(kind: str, path: tuple, value):
+    """Map a completed JSON value from the model reply to a client stream event, if it is one."""
+    if kind == "summary":
+        if len(path) == 2 and path[0] == "bullets" and isinstance(value, str):
+            return {"type": "bullet", "index": path[1], "text": value}
+        return None
+    if path == ("rephrased",) and isinstance(value, str):
+        return {"type": "rephrased", "text": value}
+    if len(path) == 2 and path[0] == "terms" and isinstance(value, dict):
+        return {"type": "term", "index": path[1], "word": value.get("word", ""), "definition": value.get("definition", "")}
+    return None
+
+
+def _paragraph_result_events(kind: str, result: dict):
+    """Replay a finished (e.g. cached) result as the same events a live stream would send."""
+    events = []
+    if kind == "summary":
+        for index, bullet in enumerate(result.get("bullets") or []):
+            events.append({"type": "bullet", "index": index, "text": bullet})
+        return events
+    if isinstance(result.get("rephrased"), str):
+        events.append({"type": "rephrased", "text": result["rephrased"]})
+    for index, term in enumerate(result.get("terms") or []):
+        if isinstance(term, dict):
+            events.append({"type": "term", "index": index, "word": term.get("word", ""), "definition": term.get("definition", "")})
+    return events
+
+
+async def _stream_paragraph_ai_events(kind: str, data, *, route: str):
+    """Yield stream events for a summary/rephrase as each bullet, text or term closes.
+
+    The last event is `done` (with the full result and debug block) or `error`.
+    """
+    started_at = time.perf_counter()
+    paragraph_request, error = await _prepare_paragraph_request(kind, data, route=route)
+    if error is not None:
+        payload, status = error
+        yield {"type": "error", "status": status, **payload}
+        return
 
+    cache_key = paragraph_request["cache_key"]
+    cached_result, cache_tier = await _get_cached_paragraph_ai_result(cache_key)
+    if cached_result is not None:
+        for event in _paragraph_result_events(kind, cached_result):
+            yield event
+        yield {"type": "done", "result": cached_result, "debug": _paragraph_ai_cache_debug(cache_key, cache_tier, started_at)}
+        return
 
-@app.route('/')
-def index():
-    """Serve the main page."""
-    return render_template('index.html')
+    events = asyncio.Queue()
+    finished = object()
 
+    def on_value(path, value):
+        event = _paragraph_stream_event(kind, path, value)
+        if event is not None:
+            events.put_nowait(event)
 
-@app.route('/convert', methods=['POST'])
-def convert_docx():
-    """Handle DOCX file upload and conversion."""
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file provided'}), 400
+    parser = IncrementalJsonParser(on_value)
+    _interactive_ai_started()
+    task = asyncio.ensure_future(_run_paragraph_request(paragraph_request, on_text=parser.feed))
+    task.add_done_callback(lambda _task: (_interactive_ai_finished(), events.put_nowait(finished)))
+    first_event_ms = None
+    try:
+        while True:
+            event = await events.get()
+            if event is finished:
+                break
+            if first_event_ms is None:
+                first_event_ms = round((time.perf_counter() - started_at) * 1000, 1)
+            yield event
 
-    file = request.files['file']
+        try:
+            result = task.result()
+        except json.JSONDecodeError:
+            yield {"type": "error", "status": 500, "error": "Failed to parse AI response"}
+            return
+        except Exception as e:
+            yield {"type": "error", "status": 500, "error": str(e)}
+            return
+        debug = _paragraph_ai_cache_debug(cache_key, "", started_at)
+        debug["firstEventMs"] = first_event_ms
+        yield {"type": "done", "result": result, "debug": debug}
+    finally:
+        if not task.done():
+            task.cancel()
 
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
 
-    if not file.filename.lower().endswith('.docx'):
-        return jsonify({'error': 'Only DOCX files are supported'}), 400
+def _format_stream_event(event: dict, stream_format: str) -> str:
+    if stream_format == "ndjson":
+        return json.dumps(event, ensure_ascii=True, separators=(",", ":")) + "\n"
+    return f"event: {event.get('type', 'message')}\ndata: {json.dumps(event, ensure_ascii=True, separators=(',', ':'))}\n\n"
 
-    try:
-        # Read file into memory
-        file_bytes = io.BytesIO(file.read())
 
-        # Generate a unique document ID for image storage
-        import uuid
-        doc_id = str(uuid.uuid4())[:8]
+def _requested_stream_format(format_arg: str, accept_header: str) -> str:
+    if str(format_arg or "").strip().lower() == "ndjson" or "application/x-ndjson" in str(accept_header or ""):
+        return "ndjson"
+    return "sse"
 
-        # Convert to HTML with bionic reading
-        converter = BionicHtmlConverter(doc_id=doc_id)
-        html_content = converter.convert(file_bytes)
 
-        return jsonify({
-            'success': True,
-            'html': html_content,
-            'filename': secure_filename(file.filename),
-            'docId': doc_id
-        })
+STREAM_MIMETYPES = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
 
-    except Exception as e:
-        return jsonify({'error': f'Failed to process document: {str(e)}'}), 500
 
+def _iter_async_generator(async_gen):
+    """Drive an async generator on the shared loop from a synchronous (WSGI) response iterator."""
+    items = thread_queue.Queue()
+    finished = object()
 
-@app.route('/summarize', methods=['POST'])
-def summarize_paragraph():
-    """Summarize a paragraph into bullet points using Gemini."""
-    data = request.get_json()
-    if not data or 'text' not in data:
-        return jsonify({'error': 'No text provided'}), 400
+    async def pump():
+        try:
+            async for item in async_gen:
+                items.put(item)
+        finally:
+            await async_gen.aclose()
+            items.put(finished)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), _get_async_loop())
+    try:
+        while True:
+            item = items.get()
+            if item is finished:
+                break
+            yield item
+        future.result()
+    finally:
+        # The client went away mid-stream: stop the upstream Gemini request too.
+        future.cancel()
+
+
+def _stream_response(events):
+    """Wrap an async generator of event dicts as an SSE (default) or NDJSON Flask response."""
+    stream_format = _requested_stream_format(request.args.get("format"), request.headers.get("Accept"))
+    return Response(
+        (_format_stream_event(event, stream_format) for event in _iter_async_generator(events)),
+        mimetype=STREAM_MIMETYPES[stream_format],
+        headers=STREAM_HEADERS,
+    )
 
-    text = data['text'].strip()
-    if not text:
-        return jsonify({'error': 'Empty text'}), 400
 
+@app.route('/summarize-stream', methods=['POST'])
+def summarize_paragraph_stream():
+    """Stream summary bullets as Server-Sent Events (or NDJSON with ?format=ndjson)."""
+    return _stream_response(_stream_paragraph_ai_events("summary", request.get_json(silent=True), route="/summarize-stream"))
+
+
+@app.route('/rephrase-stream', methods=['POST'])
+def rephrase_paragraph_stream():
+    """Stream the rephrased text and glossary terms as Server-Sent Events (or NDJSON)."""
+    return _stream_response(_stream_paragraph_ai_events("rephrase", request.get_json(silent=True), route="/rephrase-stream"))
+
+
+def _collect_batch_paragraphs(data):
+    """Resolve a /summarize-batch body to `[(paragraph_index, text), ...]` in reading order."""
+    if not isinstance(data, dict):
+        raise ValueError("No paragraphs provided")
+
+    doc_id = str(data.get("docId") or "").strip()
+    if doc_id:
+        paragraphs = _get_document_paragraphs(doc_id)
+        if paragraphs is None:
+            raise LookupError("Document not found")
+        ranges = data.get("ranges") or [[0, len(paragraphs)]]
+        selected = []
+        seen = set()
+        for item in ranges:
+            if not isinstance(item, (list, tuple)) or len(item) != 2:
+                raise ValueError("Each range must be [start, end]")
+            start, end = max(0, int(item[0])), min(len(paragraphs), int(item[1]))
+            for index in range(start, end):
+                if index not in seen:
+                    seen.add(index)
+                    selected.append(index)
+        items = [(index, paragraphs[index]) for index in sorted(selected)]
+    else:
+        raw = data.get("paragraphs")
+        if not isinstance(raw, list):
+            raise ValueError("No paragraphs provided")
+        items = list(enumerate(str(text or "") for text in raw))
+
+    items = [(index, text.strip()) for index, text in items if str(text or "").strip()]
+    if not items:
+        raise ValueError("No paragraphs provided")
+    if len(items) > SUMMARY_BATCH_MAX_ITEMS:
+        raise ValueError(f"Too many paragraphs (max {SUMMARY_BATCH_MAX_ITEMS})")
+    return items
+
+
+def _pack_summary_batches(items):
+    """Greedily group paragraphs, in order, into prompts that fit the batch token budget (~4 chars/token)."""
+    groups = []
+    current = []
+    current_tokens = 0
+    for item in items:
+        tokens = len(item[1]) // 4 + 1
+        if current and (current_tokens + tokens > SUMMARY_BATCH_TOKEN_BUDGET or len(current) >= SUMMARY_BATCH_MAX_PARAGRAPHS):
+            groups.append(current)
+            current = []
+            current_tokens = 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _build_summary_batch_prompt(group) -> str:
+    blocks = "\n\n".join(f"[{position}]\n{text}" for position, (_index, text) in enumerate(group))
+    return f"""Summarize each of the following numbered paragraphs separately into concise bullet points.
+Return ONLY valid JSON in this exact format, nothing else, with one entry per paragraph in the same order:
+{{"summaries": [{{"id": 0, "bullets": ["point 1", "point 2"]}}, {{"id": 1, "bullets": ["point 1"]}}]}}
+
+Paragraphs:
+{blocks}"""
+
+
+async def _summarize_batch_group(group, emit, semaphore, *, route: str, stats=None):
+    """Summarise one packed group with a single prompt, emitting each paragraph as its entry closes.
+
+    Paragraphs the model skipped or answered badly are retried one by one. A
+    failed batch prompt is logged and counted in `stats["batch_errors"]`.
+    """
+    emitted = set()
+
+    def on_value(path, value):
+        if len(path) != 2 or path[0] != "summaries" or not isinstance(value, dict):
+            return
+        try:
+            position = int(value.get("id", path[1]))
+        except (TypeError, ValueError):
+            return
+        bullets = value.get("bullets")
+        if position in emitted or not 0 <= position < len(group) or not isinstance(bullets, list):
+            return
+        emitted.add(position)
+        emit(group[position][0], {"bullets": [str(bullet) for bullet in bullets]}, text=group[position][1])
+
+    if len(group) > 1:
+        prompt = _build_summary_batch_prompt(group)
+        parser = IncrementalJsonParser(on_value)
+        try:
+            async with semaphore:
+                await _generate_ai_json_async(
+                    get_gemini_client(),
+                    [types.Part.from_text(text=prompt)],
+                    request_kind="paragraph_summary_batch",
+                    log_context={
+                        "route": route,
+                        "paragraphs": len(group),
+                        "text_chars": sum(len(text) for _index, text in group),
+                        "prompt_chars": len(prompt),
+                    },
+                    model_name=PARAGRAPH_AI_MODEL,
+                    thinking_level="LOW",
+                    on_text=parser.feed,
+                )
+        except Exception as e:
+            # Whatever closed before the failure was already emitted; the rest is retried below.
+            _log_gemini_event(
+                "summary_batch_error",
+                route=route,
+                paragraphs=len(group),
+                emitted=len(emitted),
+                error_type=type(e).__name__,
+                error_message=str(e)[:240],
+            )
+            if stats is not None:
+                stats["batch_errors"] += 1
+
+    for position, (index, text) in enumerate(group):
+        if position in emitted:
+            continue
+        async with semaphore:
+            payload, status = await _paragraph_ai_async("summary", {"text": text}, route=route)
+        if status == 200:
+            payload.pop("debug", None)
+            emit(index, payload)
+        else:
+            emit(index, None, error=payload.get("error", "Failed to summarize paragraph"))
+
+
+async def _stream_summary_batch_events(data, *, route: str = "/summarize-batch"):
+    """Yield `summary` events for a batch in paragraph order, then a `done` event."""
+    started_at = time.perf_counter()
     try:
-        client = get_gemini_client()
+        items = _collect_batch_paragraphs(data)
+    except LookupError as e:
+        yield {"type": "error", "status": 404, "error": str(e)}
+        return
+    except (TypeError, ValueError) as e:
+        yield {"type": "error", "status": 400, "error": str(e)}
+        return
 
-        prompt = f"""Summarize the following paragraph into concise bullet points.
-Return ONLY valid JSON in this exact format, nothing else:
-{{"bullets": ["point 1", "point 2", "point 3"]}}
+    results = {}
+    misses = []
+    cached_count = 0
+    for index, text in items:
+        cache_key = _paragraph_ai_cache_key("summary", SUMMARY_PROMPT_VERSION, PARAGRAPH_AI_MODEL, text)
+        cached_result, _tier = await _get_cached_paragraph_ai_result(cache_key)
+        if cached_result is not None:
+            results[index] = {"type": "summary", "index": index, "cached": True, **cached_result}
+            cached_count += 1
+        else:
+            misses.append((index, text))
+
+    completed = asyncio.Queue()
+
+    def emit(index, result, *, text=None, error=None):
+        if result is None:
+            completed.put_nowait({"type": "summary", "index": index, "error": error})
+            return
+        if text is not None:
+            # Batch answers are cached under the single-paragraph key so /summarize reuses them.
+            cache_key = _paragraph_ai_cache_key("summary", SUMMARY_PROMPT_VERSION, PARAGRAPH_AI_MODEL, text)
+            _spawn_paragraph_ai_cache_write(cache_key, result)
+        completed.put_nowait({"type": "summary", "index": index, "cached": False, **result})
+
+    groups = _pack_summary_batches(misses)
+    semaphore = asyncio.Semaphore(SUMMARY_BATCH_CONCURRENCY)
+    batch_stats = {"batch_errors": 0}
+    tasks = [
+        asyncio.ensure_future(_summarize_batch_group(group, emit, semaphore, route=route, stats=batch_stats))
+        for group in groups
+    ]
+    runner = asyncio.gather(*tasks, return_exceptions=True)
+    finished = object()
+    runner.add_done_callback(lambda _future: completed.put_nowait(finished))
 
-Paragraph:
-{text}"""
+    order = [index for index, _text in items]
+    next_position = 0
+    error_count = 0
+    try:
+        while next_position < len(order):
+            while next_position < len(order) and order[next_position] in results:
+                event = results.pop(order[next_position])
+                error_count += 1 if "error" in event else 0
+                next_position += 1
+                yield event
+            if next_position >= len(order):
+                break
+            event = await completed.get()
+            if event is finished:
+                # Every group has returned; anything still missing failed outright.
+                for index in order[next_position:]:
+                    results.setdefault(index, {"type": "summary", "index": index, "error": "Failed to summarize paragraph"})
+                continue
+            results.setdefault(event["index"], event)
+        yield {
+            "type": "done",
+            "count": len(order),
+            "debug": {
+                "cached": cached_count,
+                "prompts": len(groups),
+                "paragraphsPerPrompt": [len(group) for group in groups],
+                "errors": error_count,
+                "batchErrors": batch_stats["batch_errors"],
+                "concurrency": SUMMARY_BATCH_CONCURRENCY,
+                "durationMs": round((time.perf_counter() - started_at) * 1000, 1),
+            },
+        }
+    finally:
+        if not runner.done():
+            runner.cancel()
 
-        contents = [
-            types.Content(
-                role="user",
-                parts=[
-                    types.Part.from_text(text=prompt),
-                ],
-            ),
-        ]
 
-        generate_content_config = types.GenerateContentConfig(
-            thinking_config=types.ThinkingConfig(
-                thinking_level="LOW",
-            ),
-        )
+@app.route('/summarize-batch', methods=['POST'])
+def summarize_batch():
+    """Summarise many paragraphs (or a docId plus ranges), streaming results in order."""
+    return _stream_response(_stream_summary_batch_events(request.get_json(silent=True)))
 
-        response_text = ""
-        for chunk in client.models.generate_content_stream(
-            model="gemini-3-flash-preview",
-            contents=contents,
-            config=generate_content_config,
-        ):
-            if chunk.text:
-                response_text += chunk.text
 
-        response_text = response_text.strip()
+def _interactive_ai_started():
+    interactive_ai_state["inflight"] += 1
 
-        # Clean up response - remove markdown code blocks if present
-        if response_text.startswith("```"):
-            lines = response_text.split("\n")
-            response_text = "\n".join(lines[1:-1] if lines[-1] == "```" else lines[1:])
 
-        result = json.loads(response_text)
-        return jsonify(result)
+def _interactive_ai_finished():
+    interactive_ai_state["inflight"] = max(0, interactive_ai_state["inflight"] - 1)
 
-    except json.JSONDecodeError:
-        return jsonify({'error': 'Failed to parse AI response'}), 500
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
 
+async def _wait_for_interactive_idle():
+    """Hold background work back while a reader is waiting on a summary or rephrase."""
+    while interactive_ai_state["inflight"] > 0:
+        await asyncio.sleep(0.25)
 
-@app.route('/rephrase', methods=['POST'])
-def rephrase_paragraph():
-    """Rephrase a paragraph using Gemini, optionally matching a writing style."""
-    data = request.get_json()
-    if not data or 'text' not in data:
-        return jsonify({'error': 'No text provided'}), 400
 
-    text = data['text'].strip()
-    if not text:
-        return jsonify({'error': 'Empty text'}), 400
+def _store_document_summary(doc_id: str, index: int, result: dict):
+    with document_store_lock:
+        entry = document_store.get(doc_id)
+        if entry is not None:
+            entry.setdefault("summaries", {})[index] = result
 
-    writing_sample = data.get('writingSample', '').strip()
 
-    try:
-        client = get_gemini_client()
+def _get_document_summaries(doc_id: str):
+    with document_store_lock:
+        entry = document_store.get(str(doc_id or "").strip())
+        if entry is None:
+            return None
+        return dict(entry.get("summaries") or {})
 
-        if writing_sample:
-            prompt = f"""You are a writing assistant. Rephrase the following paragraph to match the writing style, vocabulary level, and tone of the provided writing sample.
 
-WRITING SAMPLE (match this style):
-{writing_sample}
+async def _precompute_document_summaries(doc_id: str):
+    """Summarise a converted document's paragraphs in reading order at low priority.
 
-PARAGRAPH TO REPHRASE:
-{text}
+    Results go into the paragraph summary cache (so `/summarize` hits) and into
+    the document store by paragraph index. Cancelled by `/close-document`.
+    """
+    global summary_precompute_semaphore
+    if summary_precompute_semaphore is None:
+        summary_precompute_semaphore = asyncio.Semaphore(SUMMARY_PRECOMPUTE_MAX_DOCUMENTS)
 
-Return ONLY valid JSON in this exact format, nothing else:
-{{
-  "rephrased": "the rephrased paragraph here",
-  "terms": [
-    {{"word": "difficult word", "definition": "simple definition"}},
-    {{"word": "another term", "definition": "its definition"}}
-  ]
-}}
+    started_at = time.perf_counter()
+    paragraphs = _get_document_paragraphs(doc_id) or []
+    items = [(index, text.strip()) for index, text in enumerate(paragraphs) if len(text.strip()) >= SUMMARY_PRECOMPUTE_MIN_CHARS]
+    stats = {"computed": 0, "cached": 0, "errors": 0, "batch_errors": 0}
+
+    def emit(index, result, *, text=None, error=None):
+        if result is None:
+            stats["errors"] += 1
+            return
+        if text is not None:
+            cache_key = _paragraph_ai_cache_key("summary", SUMMARY_PROMPT_VERSION, PARAGRAPH_AI_MODEL, text)
+            _spawn_paragraph_ai_cache_write(cache_key, result)
+        _store_document_summary(doc_id, index, result)
+        stats["computed"] += 1
+
+    outcome = "done"
+    try:
+        async with summary_precompute_semaphore:
+            pending = []
+            for index, text in items:
+                cache_key = _paragraph_ai_cache_key("summary", SUMMARY_PROMPT_VERSION, PARAGRAPH_AI_MODEL, text)
+                cached_result, _tier = await _get_cached_paragraph_ai_result(cache_key)
+                if cached_result is not None:
+                    _store_document_summary(doc_id, index, cached_result)
+                    stats["cached"] += 1
+                else:
+                    pending.append((index, text))
+
+            # One prompt at a time, and only while no interactive request is waiting.
+            semaphore = asyncio.Semaphore(1)
+            for group in _pack_summary_batches(pending):
+                await _wait_for_interactive_idle()
+                await _summarize_batch_group(group, emit, semaphore, route="precompute", stats=stats)
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    except Exception as e:
+        outcome = f"error: {type(e).__name__}"
+    finally:
+        summary_precompute_tasks.pop(doc_id, None)
+        _log_gemini_event(
+            "summary_precompute_finished",
+            doc_id=doc_id,
+            outcome=outcome,
+            paragraphs=len(items),
+            duration_ms=round((time.perf_counter() - started_at) * 1000, 1),
+            **stats,
+        )
 
-The "terms" array should contain any words or phrases in your rephrased text that might be unfamiliar or technical to a general reader. Keep definitions concise (under 15 words)."""
-        else:
-            prompt = f"""You are a writing assistant. Rephrase the following paragraph to make it clearer and easier to understand while preserving the original meaning. Use simpler vocabulary where possible, but don't oversimplify technical concepts.
 
-PARAGRAPH TO REPHRASE:
-{text}
+async def _start_summary_precompute(doc_id: str):
+    if doc_id in summary_precompute_tasks:
+        return
+    summary_precompute_tasks[doc_id] = asyncio.ensure_future(_precompute_document_summaries(doc_id))
 
-Return ONLY valid JSON in this exact format, nothing else:
-{{
-  "rephrased": "the rephrased paragraph here",
-  "terms": [
-    {{"word": "difficult word", "definition": "simple definition"}},
-    {{"word": "another term", "definition": "its definition"}}
-  ]
-}}
 
-The "terms" array should contain any words or phrases in your rephrased text that might be unfamiliar or technical to a general reader. Keep definitions concise (under 15 words). If there are no difficult terms, return an empty array."""
+async def _cancel_summary_precompute(doc_id: str) -> bool:
+    task = summary_precompute_tasks.pop(doc_id, None)
+    if task is None or task.done():
+        return False
+    task.cancel()
+    return True
 
-        contents = [
-            types.Content(
-                role="user",
-                parts=[
-                    types.Part.from_text(text=prompt),
-                ],
-            ),
-        ]
 
-        generate_content_config = types.GenerateContentConfig(
-            thinking_config=types.ThinkingConfig(
-                thinking_level="LOW",
-            ),
-        )
+@app.route('/close-document', methods=['POST', 'OPTIONS'])
+def close_document():
+    """Forget a converted document and cancel its background summary job."""
+    if request.method == 'OPTIONS':
+        return _set_cors_headers(jsonify({'ok': True}))
 
-        response_text = ""
-        for chunk in client.models.generate_content_stream(
-            model="gemini-3-flash-preview",
-            contents=contents,
-            config=generate_content_config,
-        ):
-            if chunk.text:
-                response_text += chunk.text
+    doc_id = str((request.get_json(silent=True) or {}).get('docId') or '').strip()
+    if not doc_id:
+        return jsonify({'error': 'No document ID provided'}), 400
+    cancelled = _run_async(_cancel_summary_precompute(doc_id))
+    with document_store_lock:
+        known = document_store.pop(doc_id, None) is not None
+    known = document_artifact_store.drop_document(doc_id) or known
+    return jsonify({'ok': True, 'known': known, 'precomputeCancelled': cancelled})
+
+
+@app.route('/document-summaries/<doc_id>', methods=['GET'])
+def document_summaries(doc_id):
+    """Return the summaries computed so far for a document, by paragraph index."""
+    summaries = _get_document_summaries(doc_id)
+    if summaries is None:
+        return jsonify({'error': 'Document not found'}), 404
+    return jsonify({
+        'docId': doc_id,
+        'summaries': {str(index): result for index, result in sorted(summaries.items())},
+        'running': doc_id in summary_precompute_tasks,
+    })
 
-        response_text = response_text.strip()
 
-        # Clean up response - remove markdown code blocks if present
-        if response_text.startswith("```"):
-            lines = response_text.split("\n")
-            response_text = "\n".join(lines[1:-1] if lines[-1] == "```" else lines[1:])
+def _extract_docx_text(docx_bytes):
+    """CPU pool job: the non-empty paragraph text of a DOCX, limited to ~2000 words."""
+    doc = Document(io.BytesIO(docx_bytes))
 
-        result = json.loads(response_text)
-        return jsonify(result)
+    text_parts = []
+    for paragraph in doc.paragraphs:
+        if paragraph.text.strip():
+            text_parts.append(paragraph.text.strip())
 
-    except json.JSONDecodeError:
-        return jsonify({'error': 'Failed to parse AI response'}), 500
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    # Limit to first ~2000 words for context
+    full_text = '\n\n'.join(text_parts)
+    words = full_text.split()
+    if len(words) > 2000:
+        full_text = ' '.join(words[:2000]) + '...'
+    return full_text
 
 
 @app.route('/extract-text', methods=['POST'])
@@ -2288,19 +5651,7 @@ def extract_text():
         return jsonify({'error': 'Only DOCX files are supported'}), 400
 
     try:
-        file_bytes = io.BytesIO(file.read())
-        doc = Document(file_bytes)
-
-        text_parts = []
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                text_parts.append(paragraph.text.strip())
-
-        # Limit to first ~2000 words for context
-        full_text = '\n\n'.join(text_parts)
-        words = full_text.split()
-        if len(words) > 2000:
-            full_text = ' '.join(words[:2000]) + '...'
+        full_text = cpu_pool.run(_extract_docx_text, file.read(), timeout=CPU_POOL_CONVERT_TIMEOUT_SECONDS)
 
         return jsonify({
             'success': True,
@@ -2308,26 +5659,44 @@ def extract_text():
             'filename': secure_filename(file.filename)
         })
 
+    except CpuJobTimeout:
+        return jsonify({'error': 'Text extraction timed out'}), 504
     except Exception as e:
         return jsonify({'error': f'Failed to extract text: {str(e)}'}), 500
 
 
-@app.route('/describe-image', methods=['POST'])
-def describe_image():
+async def _describe_image_async(data):
     """Generate an accessibility description for an image using Gemini."""
-    data = request.get_json()
     if not data or 'imageId' not in data:
-        return jsonify({'error': 'No image ID provided'}), 400
-
-    image_id = data['imageId']
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
-
-    image_data = image_store[image_id]
+        return {'error': 'No image ID provided'}, 400
+
+    image_id = str(data['imageId'] or '').strip().lower()
+    doc_id = str(data.get('docId') or '').strip()
+    if doc_id:
+        # Scoped lookup: the image must belong to a document that is still live.
+        doc_images = await asyncio.to_thread(document_artifact_store.document_images, doc_id)
+        if doc_images is None:
+            return {'error': 'Document not found', 'documentExpired': True}, 404
+        if image_id not in doc_images:
+            return {'error': 'Image not found'}, 404
+    image_data = await asyncio.to_thread(document_artifact_store.get, image_id)
+    if image_data is None:
+        return {'error': 'Image not found'}, 404
 
     try:
+        content_type, image_bytes = image_data
+        image_hash = image_id
+        cached_description = await _get_cached_image_description(image_hash, "doc")
+        if cached_description:
+            return {"description": cached_description, "debug": {"cacheHit": True, "cacheTier": "content"}}, 200
+
+        upload_bytes, upload_mime = await _prepare_image_for_gemini(
+            image_bytes,
+            content_type,
+            route="/describe-image",
+            image_hash=image_hash,
+        )
         client = get_gemini_client()
-        image_bytes = base64.b64decode(image_data['data'])
 
         prompt = """Describe this image for a visually impaired person. Provide a clear, detailed description that captures:
 1. The main subject or content of the image
@@ -2337,12 +5706,12 @@ def describe_image():
 Keep the description concise but informative (2-4 sentences). Return ONLY valid JSON in this exact format:
 {"description": "Your description here"}"""
 
-        result = _generate_ai_json(
+        result = await _generate_ai_json_async(
             client,
             [
                 types.Part.from_bytes(
-                    data=image_bytes,
-                    mime_type=image_data['content_type']
+                    data=upload_bytes,
+                    mime_type=upload_mime,
                 ),
                 types.Part.from_text(text=prompt),
             ],
@@ -2352,31 +5721,34 @@ Keep the description concise but informative (2-4 sentences). Return ONLY valid
                 "source": "bionic_doc",
                 "image_id": image_id,
                 "image_bytes": len(image_bytes),
-                "mime_type": image_data.get("content_type", ""),
+                "upload_bytes": len(upload_bytes),
+                "doc_id": doc_id,
+                "mime_type": content_type,
                 "prompt_chars": len(prompt),
             },
         )
-        return jsonify(result)
+        await _set_cached_image_description(image_hash, "doc", str(result.get("description") or "").strip())
+        return result, 200
 
     except json.JSONDecodeError:
-        return jsonify({'error': 'Failed to parse AI response'}), 500
+        return {'error': 'Failed to parse AI response'}, 500
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return {'error': str(e)}, 500
 
 
-@app.route('/describe-web-image', methods=['POST', 'OPTIONS'])
-def describe_web_image():
-    """Generate an accessibility description for an arbitrary webpage image."""
-    if request.method == 'OPTIONS':
-        return _set_cors_headers(jsonify({'ok': True}))
+@app.route('/describe-image', methods=['POST'])
+def describe_image():
+    """Generate an accessibility description for an image using Gemini."""
+    payload, status = _run_async(_describe_image_async(request.get_json()))
+    return jsonify(payload), status
 
-    data = request.get_json() or {}
+
+async def _describe_web_image_async(data):
+    """Generate an accessibility description for an arbitrary webpage image."""
+    data = data or {}
     raw_image_url = (data.get("imageUrl") or "").strip()
 
     try:
-        image_bytes, content_type = _load_web_image_payload(data)
-        client = get_gemini_client()
-
         if data.get("imageData"):
             input_mode = "base64"
         elif raw_image_url.startswith("data:"):
@@ -2409,12 +5781,44 @@ Keep the description concise but informative (2-4 sentences). Return ONLY valid
         if hint_block:
             prompt += f"\n\nOptional on-page hints (can be wrong): {hint_block}"
 
-        result = _generate_ai_json(
+        if input_mode == "remote_url":
+            known_hash = await _lookup_image_hash_by_url(raw_image_url)
+            cached_description = await _get_cached_image_description(known_hash, "web", hint_block)
+            if cached_description:
+                return {"description": cached_description, "debug": {"cacheHit": True, "cacheTier": "url"}}, 200
+
+        image_bytes, content_type, source_info = await _load_web_image_payload(data)
+        image_hash = hashlib.sha256(image_bytes).hexdigest()
+        if input_mode == "remote_url":
+            await _remember_image_url(raw_image_url, image_hash, source_info)
+        cached_description = await _get_cached_image_description(image_hash, "web", hint_block)
+        if cached_description:
+            upload_bytes, upload_mime = await _prepare_image_for_gemini(
+                image_bytes,
+                content_type,
+                route="/describe-web-image",
+                image_hash=image_hash,
+            )
+            image_session_id = _register_image_session(upload_bytes, upload_mime, image_hash=image_hash, description=cached_description)
+            return {
+                "description": cached_description,
+                "imageSessionId": image_session_id,
+                "debug": {"cacheHit": True, "cacheTier": "content"},
+            }, 200
+
+        upload_bytes, upload_mime = await _prepare_image_for_gemini(
+            image_bytes,
+            content_type,
+            route="/describe-web-image",
+            image_hash=image_hash,
+        )
+        client = get_gemini_client()
+        result = await _generate_ai_json_async(
             client,
             [
                 types.Part.from_bytes(
-                    data=image_bytes,
-                    mime_type=content_type,
+                    data=upload_bytes,
+                    mime_type=upload_mime,
                 ),
                 types.Part.from_text(text=prompt),
             ],
@@ -2426,6 +5830,7 @@ Keep the description concise but informative (2-4 sentences). Return ONLY valid
                 "image_host": _extract_host(raw_image_url),
                 "page_host": _extract_host(data.get("pageUrl", "")),
                 "image_bytes": len(image_bytes),
+                "upload_bytes": len(upload_bytes),
                 "mime_type": content_type,
                 "prompt_chars": len(prompt),
                 "hint_chars": len(hint_block),
@@ -2434,45 +5839,86 @@ Keep the description concise but informative (2-4 sentences). Return ONLY valid
         )
         description = (result.get("description") or "").strip()
         if not description:
-            return jsonify({'error': 'Failed to generate description'}), 500
-        return jsonify({"description": description})
+            return {'error': 'Failed to generate description'}, 500
+        await _set_cached_image_description(image_hash, "web", description, hint_block)
+        image_session_id = _register_image_session(upload_bytes, upload_mime, image_hash=image_hash, description=description)
+        return {
+            "description": description,
+            "imageSessionId": image_session_id,
+            "debug": {"cacheHit": False, "cacheTier": ""},
+        }, 200
 
     except httpx.HTTPStatusError as e:
-        return jsonify({'error': f'Failed to fetch image URL ({e.response.status_code})'}), 400
+        return {'error': f'Failed to fetch image URL ({e.response.status_code})'}, 400
     except ValueError as e:
-        return jsonify({'error': str(e)}), 400
+        return {'error': str(e)}, 400
     except json.JSONDecodeError:
-        return jsonify({'error': 'Failed to parse AI response'}), 500
+        return {'error': 'Failed to parse AI response'}, 500
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return {'error': str(e)}, 500
 
 
-@app.route('/ask-web-image', methods=['POST', 'OPTIONS'])
-def ask_web_image():
-    """Answer follow-up questions about a webpage image."""
+@app.route('/describe-web-image', methods=['POST', 'OPTIONS'])
+def describe_web_image():
+    """Generate an accessibility description for an arbitrary webpage image."""
     if request.method == 'OPTIONS':
         return _set_cors_headers(jsonify({'ok': True}))
 
-    data = request.get_json() or {}
+    payload, status = _run_async(_describe_web_image_async(request.get_json() or {}))
+    return jsonify(payload), status
+
+
+async def _ask_web_image_async(data):
+    """Answer follow-up questions about a webpage image.
+
+    Pass the `imageSessionId` from an earlier describe/ask response to reuse the
+    image held server-side; the image is only needed again once it expires.
+    """
+    data = data or {}
     raw_image_url = (data.get("imageUrl") or "").strip()
     question = (data.get("question") or "").strip()
     if not question:
-        return jsonify({'error': 'No follow-up question provided'}), 400
+        return {'error': 'No follow-up question provided'}, 400
 
     try:
-        image_bytes, content_type = _load_web_image_payload(data)
-        client = get_gemini_client()
-
-        if data.get("imageData"):
-            input_mode = "base64"
-        elif raw_image_url.startswith("data:"):
-            input_mode = "data_url"
-        elif raw_image_url:
-            input_mode = "remote_url"
+        image_session_id = str(data.get("imageSessionId") or "").strip()
+        session = _get_image_session(image_session_id)
+        if session is not None:
+            input_mode = "image_session"
         else:
-            input_mode = "unknown"
+            if image_session_id and not (data.get("imageData") or raw_image_url):
+                return {'error': 'Image session expired', 'imageSessionExpired': True}, 404
+            image_bytes, content_type, _source_info = await _load_web_image_payload(data)
+            image_hash = hashlib.sha256(image_bytes).hexdigest()
+            upload_bytes, upload_mime = await _prepare_image_for_gemini(
+                image_bytes,
+                content_type,
+                route="/ask-web-image",
+                image_hash=image_hash,
+            )
+            image_session_id = _register_image_session(upload_bytes, upload_mime, image_hash=image_hash)
+            # Images over the session byte budget are answered once and not kept.
+            session = _get_image_session(image_session_id) or {
+                "bytes": upload_bytes,
+                "mime_type": upload_mime,
+                "image_hash": image_hash,
+                "description": "",
+                "file_uri": "",
+                "file_uploaded_at": 0.0,
+            }
+            if data.get("imageData"):
+                input_mode = "base64"
+            elif raw_image_url.startswith("data:"):
+                input_mode = "data_url"
+            elif raw_image_url:
+                input_mode = "remote_url"
+            else:
+                input_mode = "unknown"
+
+        client = get_gemini_client()
+        image_part, image_part_mode = await _image_session_part(client, session)
 
-        base_description = (data.get("description") or "").strip()
+        base_description = (data.get("description") or "").strip() or session.get("description", "")
         history = data.get("history") or []
         history_lines = []
         for item in history[-8:]:
@@ -2501,13 +5947,10 @@ If the question cannot be answered from the image, say so briefly.
 Return ONLY valid JSON in this exact format:
 {{"answer": "your answer"}}"""
 
-        result = _generate_ai_json(
+        result = await _generate_ai_json_async(
             client,
             [
-                types.Part.from_bytes(
-                    data=image_bytes,
-                    mime_type=content_type,
-                ),
+                image_part,
                 types.Part.from_text(text=prompt),
             ],
             request_kind="web_image_followup",
@@ -2515,10 +5958,11 @@ Return ONLY valid JSON in this exact format:
                 "route": "/ask-web-image",
                 "source": "webpage",
                 "input_mode": input_mode,
+                "image_part_mode": image_part_mode,
                 "image_host": _extract_host(raw_image_url),
                 "page_host": _extract_host(data.get("pageUrl", "")),
-                "image_bytes": len(image_bytes),
-                "mime_type": content_type,
+                "upload_bytes": len(session["bytes"]) if image_part_mode == "inline" else 0,
+                "mime_type": session["mime_type"],
                 "prompt_chars": len(prompt),
                 "question_chars": len(question),
                 "history_items": len(history_lines),
@@ -2526,26 +5970,32 @@ Return ONLY valid JSON in this exact format:
         )
         answer = (result.get("answer") or "").strip()
         if not answer:
-            return jsonify({'error': 'Failed to generate answer'}), 500
-        return jsonify({"answer": answer})
+            return {'error': 'Failed to generate answer'}, 500
+        return {"answer": answer, "imageSessionId": image_session_id}, 200
 
     except httpx.HTTPStatusError as e:
-        return jsonify({'error': f'Failed to fetch image URL ({e.response.status_code})'}), 400
+        return {'error': f'Failed to fetch image URL ({e.response.status_code})'}, 400
     except ValueError as e:
-        return jsonify({'error': str(e)}), 400
+        return {'error': str(e)}, 400
     except json.JSONDecodeError:
-        return jsonify({'error': 'Failed to parse AI response'}), 500
+        return {'error': 'Failed to parse AI response'}, 500
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return {'error': str(e)}, 500
 
 
-@app.route('/gemini-live-query', methods=['POST', 'OPTIONS'])
-def gemini_live_query():
-    """Process spoken query + screenshot context using Gemini Live."""
+@app.route('/ask-web-image', methods=['POST', 'OPTIONS'])
+def ask_web_image():
+    """Answer follow-up questions about a webpage image."""
     if request.method == 'OPTIONS':
         return _set_cors_headers(jsonify({'ok': True}))
 
-    data = request.get_json() or {}
+    payload, status = _run_async(_ask_web_image_async(request.get_json() or {}))
+    return jsonify(payload), status
+
+
+async def _gemini_live_query_async(data):
+    """Process spoken query + screenshot context using Gemini Live."""
+    data = data or {}
     request_id = uuid.uuid4().hex[:10]
     started_at = time.perf_counter()
     page_url = (data.get("pageUrl") or "").strip()
@@ -2588,7 +6038,7 @@ def gemini_live_query():
             screenshot_sent=bool(send_screenshot),
         )
 
-        result = asyncio.run(_run_live_query_with_fallbacks(
+        result = await _run_live_query_with_fallbacks(
             client,
             audio_bytes=audio_bytes,
             audio_mime_type=audio_mime_type,
@@ -2597,7 +6047,7 @@ def gemini_live_query():
             page_url=page_url,
             resume_handle=resume_handle,
             send_screenshot=send_screenshot,
-        ))
+        )
         answer = (result.get("answer") or "").strip()
         transcript = (result.get("transcript") or "").strip()
         if not answer and not (result.get("audio_base64") or "").strip():
@@ -2627,9 +6077,11 @@ def gemini_live_query():
             connected_ms=float(result.get("connected_ms", 0.0) or 0.0),
             input_sent_ms=float(result.get("input_sent_ms", 0.0) or 0.0),
             first_response_ms=float(result.get("first_response_ms", 0.0) or 0.0),
+            session_pool_hit=bool(result.get("pool_hit")),
+            session_pool_hit_rate=_get_live_session_pool_hit_rate(),
         )
 
-        return jsonify({
+        return {
             "answer": answer,
             "transcript": transcript,
             "model": result.get("model", ""),
@@ -2641,8 +6093,12 @@ def gemini_live_query():
                 "connectedMs": float(result.get("connected_ms", 0.0) or 0.0),
                 "inputSentMs": float(result.get("input_sent_ms", 0.0) or 0.0),
                 "firstResponseMs": float(result.get("first_response_ms", 0.0) or 0.0),
+                "hedged": bool(result.get("hedged")),
+                "sessionPoolHit": bool(result.get("pool_hit")),
+                "sessionPoolHitRate": _get_live_session_pool_hit_rate(),
+                "sessionPoolStats": dict(live_session_pool_stats),
             },
-        })
+        }, 200
 
     except ValueError as e:
         duration_ms = round((time.perf_counter() - started_at) * 1000, 1)
@@ -2656,7 +6112,7 @@ def gemini_live_query():
             error_type=type(e).__name__,
             error_message=str(e)[:240],
         )
-        return jsonify({'error': str(e)}), 400
+        return {'error': str(e)}, 400
     except Exception as e:
         duration_ms = round((time.perf_counter() - started_at) * 1000, 1)
         _log_gemini_event(
@@ -2669,16 +6125,22 @@ def gemini_live_query():
             error_type=type(e).__name__,
             error_message=str(e)[:240],
         )
-        return jsonify({'error': str(e)}), 500
+        return {'error': str(e)}, 500
 
 
-@app.route('/reading-mode-plan', methods=['POST', 'OPTIONS'])
-def reading_mode_plan():
-    """Generate CSS keep/remove selectors for AI-assisted reading mode."""
+@app.route('/gemini-live-query', methods=['POST', 'OPTIONS'])
+def gemini_live_query():
+    """Process spoken query + screenshot context using Gemini Live."""
     if request.method == 'OPTIONS':
         return _set_cors_headers(jsonify({'ok': True}))
 
-    data = request.get_json(silent=True) or {}
+    payload, status = _run_async(_gemini_live_query_async(request.get_json() or {}))
+    return jsonify(payload), status
+
+
+async def _reading_mode_plan_async(data):
+    """Generate CSS keep/remove selectors for AI-assisted reading mode."""
+    data = data or {}
     page_url = str(data.get("pageUrl") or "").strip()
     page_title = str(data.get("pageTitle") or "").strip()
     source_html = str(data.get("htmlSource") or "")
@@ -2688,7 +6150,7 @@ def reading_mode_plan():
     ai_refinement_enabled = bool(force_ai_refinement or GEMINI_READING_MODE_ENABLE_AI_REFINEMENT)
 
     if not source_html:
-        return jsonify({'error': 'No page HTML provided'}), 400
+        return {'error': 'No page HTML provided'}, 400
 
     source_html = source_html.replace("\x00", "")
     truncated_input = False
@@ -2733,7 +6195,7 @@ def reading_mode_plan():
                 include_count=len(url_cached_payload.get("includeSelectors") or []),
                 exclude_count=len(url_cached_payload.get("excludeSelectors") or []),
             )
-            return jsonify(url_cached_payload)
+            return url_cached_payload, 200
 
     html_fingerprint = hashlib.sha1(source_html.encode("utf-8", errors="ignore")).hexdigest()
     cache_key_seed = (
@@ -2759,10 +6221,12 @@ def reading_mode_plan():
             include_count=len(cached_payload.get("includeSelectors") or []),
             exclude_count=len(cached_payload.get("excludeSelectors") or []),
         )
-        return jsonify(cached_payload)
+        return cached_payload, 200
 
     try:
-        heuristic_plan = _build_heuristic_reading_mode_plan(source_html)
+        heuristic_plan = await asyncio.to_thread(
+            cpu_pool.run, _build_heuristic_reading_mode_plan, source_html, timeout=CPU_POOL_PLAN_TIMEOUT_SECONDS,
+        )
         heuristic_include = _normalize_selector_list(
             heuristic_plan.get("include_selectors"),
             max_items=READING_MODE_MAX_INCLUDE_SELECTORS,
@@ -2818,7 +6282,7 @@ def reading_mode_plan():
                 model_error_count=0,
                 input_truncated=bool(truncated_input),
             )
-            return jsonify(response_payload)
+            return response_payload, 200
 
         selected_model = ""
         model_errors = []
@@ -2892,9 +6356,9 @@ Page source (HTML):
                 "input_truncated": bool(truncated_input),
             }
 
-            candidate_models = list(_iter_reading_mode_models())
+            candidate_models = _order_models_by_health(list(_iter_reading_mode_models()))
             if force_ai_refinement:
-                # Forced refinement should still be responsive; try primary model only.
+                # Forced refinement should still be responsive; try the healthiest model only.
                 primary_model = candidate_models[0] if candidate_models else _normalize_reading_mode_model_name(GEMINI_READING_MODE_MODEL)
                 candidate_models = [primary_model] if primary_model else []
 
@@ -2908,7 +6372,7 @@ Page source (HTML):
                         thinking_enabled=bool(use_thinking),
                         thinking_level=GEMINI_READING_MODE_THINKING_LEVEL if use_thinking else "",
                     )
-                    result = _generate_ai_json(
+                    result = await _generate_ai_json_async(
                         client,
                         [types.Part.from_text(text=prompt)],
                         request_kind="reading_mode_plan",
@@ -3007,7 +6471,7 @@ Page source (HTML):
         model_token_lower = str(model_token or "").lower()
         if model_token_lower.startswith("gemini"):
             _set_cached_reading_mode_plan_by_url(page_url, response_payload)
-        return jsonify(response_payload)
+        return response_payload, 200
 
     except Exception as e:
         _log_reading_mode_event(
@@ -3037,7 +6501,17 @@ Page source (HTML):
             },
         }
         _set_cached_reading_mode_plan(cache_key, response_payload)
-        return jsonify(response_payload)
+        return response_payload, 200
+
+
+@app.route('/reading-mode-plan', methods=['POST', 'OPTIONS'])
+def reading_mode_plan():
+    """Generate CSS keep/remove selectors for AI-assisted reading mode."""
+    if request.method == 'OPTIONS':
+        return _set_cors_headers(jsonify({'ok': True}))
+
+    payload, status = _run_async(_reading_mode_plan_async(request.get_json(silent=True) or {}))
+    return jsonify(payload), status
 
 
 @app.route('/ring-event/push', methods=['POST', 'OPTIONS'])
@@ -3095,23 +6569,22 @@ def ring_event_poll():
     })
 
 
-@app.route('/speak-text', methods=['POST', 'OPTIONS'])
-def speak_text():
-    """Convert selected text to speech using ElevenLabs."""
-    if request.method == 'OPTIONS':
-        return _set_cors_headers(jsonify({'ok': True}))
+async def _speak_text_async(data):
+    """Convert selected text to speech using ElevenLabs.
 
-    data = request.get_json() or {}
+    Returns raw MP3 bytes on success and an error payload otherwise.
+    """
+    data = data or {}
     text = (data.get("text") or "").strip()
     if not text:
-        return jsonify({'error': 'No text provided'}), 400
+        return {'error': 'No text provided'}, 400
 
     if not ELEVENLABS_API_KEY:
-        return jsonify({'error': 'ELEVENLABS_API_KEY is not configured. Set it in .env.'}), 500
+        return {'error': 'ELEVENLABS_API_KEY is not configured. Set it in .env.'}, 500
 
     voice_id = (data.get("voiceId") or ELEVENLABS_TTS_VOICE_ID or "").strip()
     if not voice_id:
-        return jsonify({'error': 'No ElevenLabs voice ID configured'}), 500
+        return {'error': 'No ElevenLabs voice ID configured'}, 500
 
     text = text[:2500]
     request_id = uuid.uuid4().hex[:10]
@@ -3137,7 +6610,12 @@ def speak_text():
     }
 
     try:
-        response = httpx.post(url, json=payload, headers=headers, timeout=45.0)
+        response = await _get_async_http_client().post(
+            url,
+            json=payload,
+            headers=headers,
+            timeout=httpx.Timeout(45.0, connect=HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS),
+        )
         if response.status_code >= 400:
             duration_ms = round((time.perf_counter() - started_at) * 1000, 1)
             _log_tts_event(
@@ -3148,7 +6626,7 @@ def speak_text():
                 status_code=response.status_code,
                 body_preview=(response.text or "")[:200],
             )
-            return jsonify({'error': f'ElevenLabs TTS failed ({response.status_code})'}), 502
+            return {'error': f'ElevenLabs TTS failed ({response.status_code})'}, 502
 
         audio_bytes = response.content
         duration_ms = round((time.perf_counter() - started_at) * 1000, 1)
@@ -3160,11 +6638,7 @@ def speak_text():
             status_code=response.status_code,
             audio_bytes=len(audio_bytes),
         )
-        return Response(
-            audio_bytes,
-            mimetype="audio/mpeg",
-            headers={"Cache-Control": "no-store"},
-        )
+        return audio_bytes, 200
 
     except httpx.RequestError as e:
         duration_ms = round((time.perf_counter() - started_at) * 1000, 1)
@@ -3176,7 +6650,7 @@ def speak_text():
             error_type=type(e).__name__,
             error_message=str(e)[:240],
         )
-        return jsonify({'error': 'Could not reach ElevenLabs TTS service'}), 502
+        return {'error': 'Could not reach ElevenLabs TTS service'}, 502
     except Exception as e:
         duration_ms = round((time.perf_counter() - started_at) * 1000, 1)
         _log_tts_event(
@@ -3187,8 +6661,80 @@ def speak_text():
             error_type=type(e).__name__,
             error_message=str(e)[:240],
         )
-        return jsonify({'error': str(e)}), 500
+        return {'error': str(e)}, 500
+
+
+@app.route('/speak-text', methods=['POST', 'OPTIONS'])
+def speak_text():
+    """Convert selected text to speech using ElevenLabs."""
+    if request.method == 'OPTIONS':
+        return _set_cors_headers(jsonify({'ok': True}))
+
+    payload, status = _run_async(_speak_text_async(request.get_json() or {}))
+    if isinstance(payload, bytes):
+        return Response(
+            payload,
+            mimetype="audio/mpeg",
+            headers={"Cache-Control": "no-store"},
+        )
+    return jsonify(payload), status
+
+
+@app.route('/debug/http-clients', methods=['GET'])
+def debug_http_clients():
+    """Report pooled HTTP client state and per-host connection stats."""
+    return jsonify(_get_http_client_stats())
+
+
+@app.route('/debug/image-description-cache', methods=['GET'])
+def debug_image_description_cache():
+    """Report the on-disk image description and image fetch cache sizes and hit counts."""
+    return jsonify({
+        "enabled": IMAGE_DESCRIPTION_CACHE_ENABLED,
+        **image_description_cache.stats(),
+        "fetchCache": {"enabled": IMAGE_FETCH_CACHE_ENABLED, **image_fetch_cache.stats(), **image_fetch_stats},
+    })
+
+
+@app.route('/debug/artifact-store', methods=['GET'])
+def debug_artifact_store():
+    """Report the document artifact store's memory and disk usage and hit counts."""
+    return jsonify(document_artifact_store.stats())
+
+
+@app.route('/debug/conversion-cache', methods=['GET'])
+def debug_conversion_cache():
+    """Report conversion cache hit counts and memory and disk usage."""
+    with conversion_cache_lock:
+        stats = dict(conversion_cache_stats)
+        memory_entries = len(conversion_memory_cache)
+    return jsonify({
+        "enabled": CONVERSION_CACHE_ENABLED,
+        "converterVersion": DOCX_CONVERTER_VERSION,
+        "memoryEntries": memory_entries,
+        "memoryBytes": stats["memory_bytes"],
+        "maxMemoryBytes": CONVERSION_CACHE_MEMORY_MB * 1024 * 1024,
+        "memoryHits": stats["memory_hits"],
+        "diskHits": stats["disk_hits"],
+        "misses": stats["misses"],
+        "staleImages": stats["stale"],
+        "disk": conversion_cache.stats(),
+    })
+
+
+@app.route('/debug/cpu-pool', methods=['GET'])
+def debug_cpu_pool():
+    """Report CPU worker pool queue depth, timings, timeouts and recycling."""
+    return jsonify(cpu_pool.stats())
+
+
+@app.route('/debug/model-router', methods=['GET'])
+def debug_model_router():
+    """Report per-model health scores and circuit breaker state."""
+    return jsonify(_get_model_router_snapshot())
 
 
 if __name__ == '__main__':
+    cpu_pool.start()
+    _run_async(_start_live_session_pool())
     app.run(debug=False, use_reloader=False, port=8080)
@@ -0,0 +1,140 @@
+"""ASGI serving mode for the bionic server.
+
+The I/O-bound routes (Gemini Live, image description, summaries, rephrasing,
+reading-mode refinement and TTS) are served natively on the uvicorn event loop
+by awaiting the same coroutines the Flask routes use. Every other route is
+served by the Flask app mounted as a WSGI fallback.
+
+    python3 servers/bionic/asgi.py
+    uvicorn servers.bionic.asgi:app --port 8080
+"""
+import asyncio
+import json
+import sys
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from a2wsgi import WSGIMiddleware
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from servers.bionic import app as bionic
+
+BIONIC_ASGI_HOST = str(bionic.get_env("BIONIC_ASGI_HOST", "127.0.0.1")).strip() or "127.0.0.1"
+BIONIC_ASGI_PORT = bionic._get_env_int("BIONIC_ASGI_PORT", 8080, minimum=1, maximum=65535)
+# Document images and ring events live in process memory, so more than one
+# worker is only safe for deployments that do not rely on them. Each worker
+# also runs its own CPU_POOL_WORKERS conversion processes.
+BIONIC_ASGI_WORKERS = bionic._get_env_int("BIONIC_ASGI_WORKERS", 1, minimum=1, maximum=64)
+BIONIC_ASGI_WSGI_THREADS = bionic._get_env_int("BIONIC_ASGI_WSGI_THREADS", 16, minimum=1, maximum=256)
+
+if bionic.SUPPRESS_RING_POLL_REQUEST_LOGS:
+    logging.getLogger("uvicorn.access").addFilter(bionic._SuppressRingPollAccessLogs())
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    # Flask routes mounted below submit their coroutines to this same loop.
+    bionic._bind_async_loop(asyncio.get_running_loop())
+    bionic.cpu_pool.start()
+    await bionic._start_live_session_pool()
+    try:
+        yield
+    finally:
+        await bionic._close_async_resources()
+        bionic.cpu_pool.close()
+        bionic._bind_async_loop(None)
+
+
+app = FastAPI(lifespan=lifespan, docs_url=None, redoc_url=None, openapi_url=None)
+
+
+@app.middleware("http")
+async def add_cors_headers(request: Request, call_next):
+    response = await call_next(request)
+    response.headers["Access-Control-Allow-Origin"] = request.headers.get("origin") or "*"
+    response.headers["Vary"] = "Origin"
+    response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
+    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+    if request.headers.get("access-control-request-private-network") == "true":
+        response.headers["Access-Control-Allow-Private-Network"] = "true"
+    return response
+
+
+async def _read_json_body(request: Request):
+    body = await request.body()
+    if len(body) > int(bionic.app.config["MAX_CONTENT_LENGTH"]):
+        return None, JSONResponse({"error": "Request body is too large"}, status_code=413)
+    if not body:
+        return {}, None
+    try:
+        return json.loads(body), None
+    except ValueError:
+        return None, JSONResponse({"error": "Invalid JSON"}, status_code=400)
+
+
+def _add_async_route(path: str, handler, *, allow_options: bool = True):
+    async def endpoint(request: Request):
+        if request.method == "OPTIONS":
+            return JSONResponse({"ok": True})
+        data, error_response = await _read_json_body(request)
+        if error_response is not None:
+            return error_response
+        payload, status = await handler(data)
+        if isinstance(payload, bytes):
+            return Response(payload, media_type="audio/mpeg", headers={"Cache-Control": "no-store"})
+        return JSONResponse(payload, status_code=status)
+
+    methods = ["POST", "OPTIONS"] if allow_options else ["POST"]
+    app.add_api_route(path, endpoint, methods=methods, include_in_schema=False)
+
+
+def _add_stream_route(path: str, events_for):
+    async def endpoint(request: Request):
+        data, error_response = await _read_json_body(request)
+        if error_response is not None:
+            return error_response
+        stream_format = bionic._requested_stream_format(request.query_params.get("format"), request.headers.get("accept"))
+        events = events_for(data)
+
+        async def body():
+            async for event in events:
+                yield bionic._format_stream_event(event, stream_format)
+
+        return StreamingResponse(body(), media_type=bionic.STREAM_MIMETYPES[stream_format], headers=bionic.STREAM_HEADERS)
+
+    app.add_api_route(path, endpoint, methods=["POST"], include_in_schema=False)
+
+
+_add_async_route("/summarize", bionic._summarize_paragraph_async, allow_options=False)
+_add_async_route("/rephrase", bionic._rephrase_paragraph_async, allow_options=False)
+_add_async_route("/describe-image", bionic._describe_image_async, allow_options=False)
+_add_async_route("/describe-web-image", bionic._describe_web_image_async)
+_add_async_route("/ask-web-image", bionic._ask_web_image_async)
+_add_async_route("/gemini-live-query", bionic._gemini_live_query_async)
+_add_async_route("/reading-mode-plan", bionic._reading_mode_plan_async)
+_add_async_route("/speak-text", bionic._speak_text_async)
+_add_async_route("/register-style", bionic._register_style_async)
+_add_stream_route("/summarize-stream", lambda data: bionic._stream_paragraph_ai_events("summary", data, route="/summarize-stream"))
+_add_stream_route("/rephrase-stream", lambda data: bionic._stream_paragraph_ai_events("rephrase", data, route="/rephrase-stream"))
+_add_stream_route("/summarize-batch", bionic._stream_summary_batch_events)
+
+# Everything else (/convert, /convert-stream, /extract-text, ring events, the index page) runs in
+# the Flask app on a bounded thread pool.
+app.mount("/", WSGIMiddleware(bionic.app, workers=BIONIC_ASGI_WSGI_THREADS))
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(
+        "servers.bionic.asgi:app",
+        app_dir=str(PROJECT_ROOT),
+        host=BIONIC_ASGI_HOST,
+        port=BIONIC_ASGI_PORT,
+        workers=BIONIC_ASGI_WORKERS,
+    )
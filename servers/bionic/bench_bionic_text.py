@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Bionic text transform microbenchmark.
+
+Times the per-word transform that used to live in both
+BionicHtmlConverter._apply_bionic_to_text and demotest.py's
+BionicDocxConverter._process_paragraph against the shared single-pass
+implementation in bionic_text.py, on synthetic paragraphs drawn from a
+fixed vocabulary. Outputs are checked to be identical before timing.
+
+    python3 servers/bionic/bench_bionic_text.py
+    python3 servers/bionic/bench_bionic_text.py --paragraphs 5000 --repeat 7
+"""
+
+import argparse
+import html
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from servers.bionic import bionic_text  # noqa: E402
+
+VOCABULARY = (
+    "the reading speed improves when eye has fixed points especially in long documents with dense "
+    "technical prose and a closing clause (see section 4.2) — résumé naïve co-operate e.g. "
+    "2026 100% <tags> & \"quoted\" it's well-known"
+).split()
+
+
+def build_paragraphs(count, seed=7):
+    """Return count paragraphs, each a list of (text, is_bold) runs."""
+    rng = random.Random(seed)
+    paragraphs = []
+    for _ in range(count):
+        runs = []
+        for _ in range(rng.randint(1, 6)):
+            text = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(1, 14)))
+            runs.append((text + rng.choice([" ", "  ", "\t", ""]), rng.random() < 0.1))
+        paragraphs.append(runs)
+    return paragraphs
+
+
+def _legacy_fixation_length(word):
+    clean_word = re.sub(r'\W+', '', word)
+    length = len(clean_word)
+    if length <= 1:
+        return 1
+    elif length <= 3:
+        return int(length * 0.6) + 1
+    else:
+        return int(length * 0.45) + 1
+
+
+def legacy_html(text, is_already_bold=False):
+    """The converter's transform before bionic_text.py."""
+    if is_already_bold:
+        return f'<strong>{html.escape(text)}</strong>'
+    result = []
+    for part in re.split(r'(\s+)', text):
+        if not part.strip() or not any(c.isalnum() for c in part):
+            result.append(html.escape(part))
+        else:
+            fixation = _legacy_fixation_length(part)
+            bold_segment = html.escape(part[:fixation])
+            normal_segment = html.escape(part[fixation:]) if len(part) > fixation else ''
+            result.append(f'<strong class="bionic">{bold_segment}</strong>{normal_segment}')
+    return ''.join(result)
+
+
+def legacy_segments(text):
+    """demotest.py's split of a non-bold run into (segment, bold) runs before bionic_text.py."""
+    segments = []
+    for part in re.split(r'(\s+)', text):
+        if not part.strip() or not any(c.isalnum() for c in part):
+            segments.append((part, None))
+        else:
+            fixation = _legacy_fixation_length(part)
+            segments.append((part[:fixation], True))
+            if len(part) > fixation:
+                segments.append((part[fixation:], False))
+    return segments
+
+
+def shared_segments(text):
+    """demotest.py's split of a non-bold run into (segment, bold) runs via bionic_text.py."""
+    segments = []
+    for part in bionic_text.iter_tokens(text):
+        split = bionic_text.split_word(part)
+        if split is None:
+            segments.append((part, None))
+        else:
+            bold_segment, norm_segment = split
+            segments.append((bold_segment, True))
+            if norm_segment:
+                segments.append((norm_segment, False))
+    return segments
+
+
+def html_per_run(paragraphs, transform):
+    return [[transform(text, is_bold) for text, is_bold in runs] for runs in paragraphs]
+
+
+def html_per_paragraph(paragraphs):
+    return [bionic_text.bionic_html_runs(runs) for runs in paragraphs]
+
+
+def docx_segments(paragraphs, split):
+    return [[split(text) for text, is_bold in runs if not is_bold] for runs in paragraphs]
+
+
+def time_call(fn, repeat):
+    """Return (best, median) wall time in seconds over repeat calls."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the bionic text transform, legacy vs shared.")
+    parser.add_argument("--paragraphs", type=int, default=2000, help="Synthetic paragraphs per pass")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes per case (best and median are reported)")
+    args = parser.parse_args()
+
+    paragraphs = build_paragraphs(args.paragraphs)
+    words = sum(len(text.split()) for runs in paragraphs for text, _ in runs)
+
+    legacy = html_per_run(paragraphs, legacy_html)
+    if legacy != html_per_run(paragraphs, bionic_text.bionic_html) or legacy != html_per_paragraph(paragraphs):
+        sys.exit("converter transforms produced different HTML")
+    # The legacy split also emitted empty runs at the edges of each run of text.
+    legacy_runs = [[[segment for segment in segments if segment[0]] for segments in paragraph]
+                   for paragraph in docx_segments(paragraphs, legacy_segments)]
+    if legacy_runs != docx_segments(paragraphs, shared_segments):
+        sys.exit("demotest transforms produced different runs")
+
+    repeat = max(1, args.repeat)
+    cases = [
+        ("converter legacy", lambda: html_per_run(paragraphs, legacy_html)),
+        ("converter per run", lambda: html_per_run(paragraphs, bionic_text.bionic_html)),
+        ("converter per para", lambda: html_per_paragraph(paragraphs)),
+        ("demotest legacy", lambda: docx_segments(paragraphs, legacy_segments)),
+        ("demotest shared", lambda: docx_segments(paragraphs, shared_segments)),
+    ]
+    print(f"{args.paragraphs} paragraphs, {words} words; memoised caches are warm after the equality check")
+    print(f"{'case':>20} {'best ms':>9} {'median ms':>10} {'ns/word':>8}")
+    for name, fn in cases:
+        best, median = time_call(fn, repeat)
+        print(f"{name:>20} {best * 1000:>9.1f} {median * 1000:>10.1f} {best * 1e9 / words:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
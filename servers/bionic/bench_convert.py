@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+DOCX conversion benchmark.
+
+Builds synthetic documents of increasing size (headings, mixed-format runs,
+Word-style fragmented runs, hyperlinks, nested lists and tables) and times
+each converter engine on them, so the scaling curve of a conversion is easy
+to eyeball. A linear converter keeps the per-paragraph cost flat as the
+document grows. Engines are also checked to produce identical HTML, and the
+HTML size is reported.
+
+    python3 servers/bionic/bench_convert.py
+    python3 servers/bionic/bench_convert.py --sizes 500 1000 2000 4000 --repeat 5
+    python3 servers/bionic/bench_convert.py --engine streaming
+"""
+
+import argparse
+import io
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Pt, RGBColor
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from servers.bionic.app import DOCX_CONVERTER_ENGINES  # noqa: E402
+
+HYPERLINK_RELTYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink"
+
+# Body paragraphs added per section by build_docx (tables not included).
+PARAGRAPHS_PER_SECTION = 7
+
+FRAGMENTED_TEXT = "Word splits one sentence into many runs when it was edited in several sessions. "
+
+
+def _add_hyperlink(paragraph, url, text):
+    r_id = paragraph.part.relate_to(url, HYPERLINK_RELTYPE, is_external=True)
+    hyperlink = OxmlElement("w:hyperlink")
+    hyperlink.set(qn("r:id"), r_id)
+    run = OxmlElement("w:r")
+    text_elem = OxmlElement("w:t")
+    text_elem.text = text
+    run.append(text_elem)
+    hyperlink.append(run)
+    paragraph._p.append(hyperlink)
+
+
+def build_docx(paragraph_count):
+    """Return DOCX bytes with roughly paragraph_count body paragraphs."""
+    doc = Document()
+    doc.add_heading("Benchmark document", 0)
+    for section in range(max(1, paragraph_count // PARAGRAPHS_PER_SECTION)):
+        doc.add_heading(f"Section {section}", 1 + section % 3)
+
+        paragraph = doc.add_paragraph("Reading speed improves when the eye has fixed points, ")
+        run = paragraph.add_run("especially in long documents ")
+        run.bold = True
+        run = paragraph.add_run("with dense technical prose ")
+        run.italic = True
+        run.font.color.rgb = RGBColor(0x33, 0x44, 0x55)
+        run.font.size = Pt(12)
+        _add_hyperlink(paragraph, f"https://example.com/{section}", "see the reference")
+        paragraph.add_run(" and a closing clause.")
+
+        # Same formatting throughout, but split into runs every few characters
+        # the way revision tracking ids leave a document edited over time.
+        paragraph = doc.add_paragraph()
+        for start in range(0, len(FRAGMENTED_TEXT), 7):
+            run = paragraph.add_run(FRAGMENTED_TEXT[start:start + 7])
+            run.font.name = "Calibri"
+            run.font.size = Pt(11)
+
+        doc.add_paragraph("First bullet point with several words", style="List Bullet")
+        doc.add_paragraph("Nested bullet point", style="List Bullet 2")
+        doc.add_paragraph("Numbered step to follow", style="List Number")
+        doc.add_paragraph("A plain closing paragraph for the section.")
+
+        if section % 5 == 0:
+            table = doc.add_table(rows=2, cols=3)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.text = "cell text"
+
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def time_conversion(converter_cls, docx_bytes, repeat):
+    """Return (best, median) wall time in seconds over repeat runs, and the HTML."""
+    timings = []
+    html_content = ""
+    for _ in range(repeat):
+        converter = converter_cls(doc_id="bench")
+        started = time.perf_counter()
+        html_content = converter.convert(io.BytesIO(docx_bytes))
+        timings.append(time.perf_counter() - started)
+    return min(timings), statistics.median(timings), html_content
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time DOCX to bionic HTML conversion across document sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 500, 1000, 2000, 4000],
+                        help="Approximate body paragraph counts to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Conversions per size (best and median are reported)")
+    parser.add_argument("--engine", choices=sorted(DOCX_CONVERTER_ENGINES) + ["all"], default="all",
+                        help="Converter engine to benchmark")
+    args = parser.parse_args()
+
+    engines = sorted(DOCX_CONVERTER_ENGINES) if args.engine == "all" else [args.engine]
+    print(f"{'engine':>12} {'paragraphs':>10} {'docx KiB':>9} {'html KiB':>9} {'best ms':>9} {'median ms':>10} "
+          f"{'us/para':>8} {'growth':>7}")
+    previous = {}
+    for size in sorted(args.sizes):
+        docx_bytes = build_docx(size)
+        outputs = set()
+        for engine in engines:
+            best, median, html_content = time_conversion(DOCX_CONVERTER_ENGINES[engine], docx_bytes, max(1, args.repeat))
+            outputs.add(html_content)
+            # Growth is the time ratio to the previous size divided by the size
+            # ratio: ~1.0 means linear, ~2.0 at each doubling means quadratic.
+            growth = ""
+            if engine in previous:
+                prev_size, prev_best = previous[engine]
+                growth = f"{(best / prev_best) / (size / prev_size):.2f}"
+            html_kib = len(html_content.encode("utf-8")) / 1024
+            print(f"{engine:>12} {size:>10} {len(docx_bytes) / 1024:>9.1f} {html_kib:>9.1f} {best * 1000:>9.1f} "
+                  f"{median * 1000:>10.1f} {best * 1e6 / size:>8.1f} {growth:>7}")
+            previous[engine] = (size, best)
+        if len(outputs) > 1:
+            print(f"{'':>12} WARNING: engines produced different HTML at {size} paragraphs")
+
+
+if __name__ == "__main__":
+    main()
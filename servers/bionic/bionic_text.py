@@ -0,0 +1,65 @@
+"""Bionic reading text transform shared by the HTML converter and demotest.py.
+
+Text is tokenized in one pass into whitespace and non-whitespace tokens.
+Each distinct word is split into its bold fixation prefix and the remainder
+once, then memoised, since documents repeat the same vocabulary heavily.
+"""
+
+import html
+import re
+from functools import lru_cache
+
+# Whitespace runs and everything between them, in order. Same tokens as
+# re.split(r'(\s+)', text) without the empty strings at the edges.
+TOKEN_RE = re.compile(r"\s+|\S+")
+NON_WORD_RE = re.compile(r"\W+")
+
+WORD_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=WORD_CACHE_SIZE)
+def fixation_length(word):
+    """Number of leading characters of `word` to bold."""
+    length = len(NON_WORD_RE.sub("", word))
+    if length <= 1:
+        return 1
+    elif length <= 3:
+        return int(length * 0.6) + 1
+    else:
+        return int(length * 0.45) + 1
+
+
+@lru_cache(maxsize=WORD_CACHE_SIZE)
+def split_word(token):
+    """Return (bold, rest) for a word token, or None when it has no letters or digits."""
+    if not any(c.isalnum() for c in token):
+        return None
+    fixation = fixation_length(token)
+    return token[:fixation], token[fixation:]
+
+
+@lru_cache(maxsize=WORD_CACHE_SIZE)
+def _token_html(token):
+    parts = split_word(token)
+    if parts is None:
+        return html.escape(token)
+    bold, rest = parts
+    return f'<strong class="bionic">{html.escape(bold)}</strong>{html.escape(rest)}'
+
+
+def iter_tokens(text):
+    """Whitespace and non-whitespace tokens of `text`, in order."""
+    return TOKEN_RE.findall(text)
+
+
+def bionic_html(text, is_bold=False):
+    """Bionic reading HTML for one run of text; already-bold runs are bolded whole."""
+    if is_bold:
+        return f'<strong>{html.escape(text)}</strong>'
+    # Whitespace has nothing to escape, so it is passed through as is.
+    return "".join([token if token[0].isspace() else _token_html(token) for token in TOKEN_RE.findall(text)])
+
+
+def bionic_html_runs(runs):
+    """bionic_html for a paragraph's worth of (text, is_bold) runs in one call."""
+    return [bionic_html(text, is_bold) for text, is_bold in runs]
@@ -0,0 +1,328 @@
+"""Process pool for CPU-bound request work in the bionic server.
+
+DOCX conversion, DOCX text extraction and heuristic reading-mode plans are
+pure Python and hold the GIL for their whole run, which stalls every other
+request thread in the process, ring-event polling included. CpuWorkerPool
+runs them in worker processes instead:
+
+- every job has a deadline; a worker that misses it is killed and replaced,
+- workers are recycled after a number of jobs or once their RSS passes a limit,
+- queue depth, wait and run times are kept for /debug/cpu-pool.
+
+Jobs are module-level functions, pickled by reference, with picklable
+arguments and results. A job that returns a generator is streamed back to
+the caller item by item. With no workers configured, or inside a worker,
+jobs run inline on the calling thread.
+"""
+
+import importlib
+import inspect
+import multiprocessing
+import os
+import pickle
+import signal
+import sys
+import time
+from collections import deque
+from threading import Condition, Lock, Thread
+
+SPAWN_CONTEXT = multiprocessing.get_context("spawn")
+
+_in_worker = False
+
+
+class CpuJobTimeout(TimeoutError):
+    """A job did not finish (or did not get a worker) before its deadline."""
+
+
+class CpuJobError(RuntimeError):
+    """A job failed in a way that could not be sent back as its own exception."""
+
+
+def _current_rss_bytes():
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    # Peak rather than current RSS, which is the best other platforms offer cheaply.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _picklable_error(exc):
+    try:
+        pickle.dumps(exc)
+    except Exception:
+        return CpuJobError(f"{type(exc).__name__}: {exc}")
+    return exc
+
+
+def _worker_main(conn, preload):
+    global _in_worker
+    _in_worker = True
+    # Ctrl-C reaches the whole process group; the parent decides when workers stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for module_name in preload:
+        importlib.import_module(module_name)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        except Exception as exc:
+            conn.send(("error", _picklable_error(exc), _current_rss_bytes()))
+            continue
+        if job is None:
+            return
+        fn, args, kwargs = job
+        try:
+            result = fn(*args, **kwargs)
+            if inspect.isgenerator(result):
+                for item in result:
+                    conn.send(("item", item))
+                result = None
+        except Exception as exc:
+            conn.send(("error", _picklable_error(exc), _current_rss_bytes()))
+        else:
+            conn.send(("result", result, _current_rss_bytes()))
+
+
+class _Worker:
+    def __init__(self, preload):
+        parent_conn, child_conn = SPAWN_CONTEXT.Pipe()
+        self.process = SPAWN_CONTEXT.Process(
+            target=_worker_main,
+            args=(child_conn, preload),
+            name="bionic-cpu-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.jobs = 0
+        self.rss_bytes = 0
+
+    def stop(self, kill=False):
+        if not kill:
+            try:
+                self.conn.send(None)
+            except OSError:
+                kill = True
+        if kill:
+            self.process.kill()
+        self.process.join(timeout=5.0)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=1.0)
+        self.conn.close()
+
+
+class CpuWorkerPool:
+    """Bounded pool of spawned worker processes for CPU-bound jobs. Safe to share between threads."""
+
+    def __init__(self, *, workers: int, max_jobs_per_worker: int, max_rss_bytes: int, default_timeout: float, preload=()):
+        self.workers = max(0, int(workers))
+        self.max_jobs_per_worker = max(1, int(max_jobs_per_worker))
+        self.max_rss_bytes = max(0, int(max_rss_bytes))
+        self.default_timeout = float(default_timeout)
+        self.preload = tuple(name for name in preload if name)
+        self._lock = Lock()
+        self._available = Condition(self._lock)
+        self._idle = []
+        self._live = 0
+        self._queued = 0
+        self._running = 0
+        self._closed = False
+        self._recent_wait_ms = deque(maxlen=256)
+        self._recent_run_ms = deque(maxlen=256)
+        self.max_queue_depth = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.crashed = 0
+        self.recycled = 0
+
+    @property
+    def enabled(self) -> bool:
+        # Daemonic processes may not start children of their own.
+        return self.workers > 0 and not _in_worker and not multiprocessing.current_process().daemon
+
+    def _spawn(self):
+        return _Worker(self.preload)
+
+    def start(self):
+        """Spawn the workers in the background so the first jobs do not pay for it."""
+        if not self.enabled:
+            return
+
+        def spawn_all():
+            while True:
+                with self._lock:
+                    if self._closed or self._live >= self.workers:
+                        return
+                    self._live += 1
+                try:
+                    worker = self._spawn()
+                except Exception:
+                    with self._available:
+                        self._live -= 1
+                        self._available.notify()
+                    return
+                self._release(worker)
+
+        Thread(target=spawn_all, name="bionic-cpu-pool-start", daemon=True).start()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+        for worker in idle:
+            worker.stop()
+
+    def _acquire(self, deadline):
+        with self._available:
+            self.submitted += 1
+            self._queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._queued)
+            try:
+                while not self._idle:
+                    if self._live < self.workers:
+                        self._live += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise CpuJobTimeout("No CPU worker became free before the job deadline")
+                    self._available.wait(remaining)
+                else:
+                    return self._idle.pop()
+            finally:
+                self._queued -= 1
+        try:
+            return self._spawn()
+        except Exception:
+            with self._available:
+                self._live -= 1
+                self._available.notify()
+            raise
+
+    def _release(self, worker, retire=False, kill=False):
+        with self._available:
+            keep = not (retire or kill or self._closed)
+            if keep:
+                self._idle.append(worker)
+            else:
+                self._live -= 1
+            self._available.notify()
+        if not keep:
+            worker.stop(kill=kill)
+
+    def _execute(self, fn, args, kwargs, timeout):
+        timeout = self.default_timeout if timeout is None else float(timeout)
+        submitted_at = time.monotonic()
+        deadline = submitted_at + timeout
+        worker = self._acquire(deadline)
+        started_at = time.monotonic()
+        with self._lock:
+            self._running += 1
+            self._recent_wait_ms.append((started_at - submitted_at) * 1000.0)
+
+        # Until the worker answers, it may be mid-job and must not be reused.
+        kill = True
+        retire = False
+        outcome = None
+        try:
+            worker.conn.send((fn, args, kwargs))
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not worker.conn.poll(remaining):
+                    with self._lock:
+                        self.timeouts += 1
+                    raise CpuJobTimeout(f"{fn.__name__} did not finish within {timeout:g}s")
+                message = worker.conn.recv()
+                if message[0] == "item":
+                    yield message[1]
+                    continue
+                outcome = message
+                break
+        except CpuJobTimeout:
+            raise
+        except (EOFError, OSError) as exc:
+            with self._lock:
+                self.crashed += 1
+            raise CpuJobError(f"CPU worker exited while running {fn.__name__}") from exc
+        finally:
+            if outcome is not None:
+                kill = False
+                _kind, _value, rss_bytes = outcome
+                worker.jobs += 1
+                worker.rss_bytes = rss_bytes
+                retire = worker.jobs >= self.max_jobs_per_worker or bool(self.max_rss_bytes and rss_bytes > self.max_rss_bytes)
+            with self._lock:
+                self._running -= 1
+                self._recent_run_ms.append((time.monotonic() - started_at) * 1000.0)
+                if retire:
+                    self.recycled += 1
+            self._release(worker, retire=retire, kill=kill)
+
+        kind, value, _rss_bytes = outcome
+        with self._lock:
+            if kind == "error":
+                self.failed += 1
+            else:
+                self.completed += 1
+        if kind == "error":
+            raise value
+        return value
+
+    def run(self, fn, *args, timeout=None, **kwargs):
+        """Run fn(*args, **kwargs) in a worker and return its result."""
+        if not self.enabled:
+            return fn(*args, **kwargs)
+        execution = self._execute(fn, args, kwargs, timeout)
+        while True:
+            try:
+                next(execution)
+            except StopIteration as stop:
+                return stop.value
+
+    def iter(self, fn, *args, timeout=None, **kwargs):
+        """Run a generator job in a worker, yielding its items as they arrive."""
+        if not self.enabled:
+            yield from fn(*args, **kwargs)
+            return
+        yield from self._execute(fn, args, kwargs, timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            wait_ms = sorted(self._recent_wait_ms)
+            run_ms = sorted(self._recent_run_ms)
+            return {
+                "enabled": self.enabled,
+                "workers": self.workers,
+                "liveWorkers": self._live,
+                "idleWorkers": len(self._idle),
+                "idleWorkerRssBytes": [worker.rss_bytes for worker in self._idle],
+                "queued": self._queued,
+                "running": self._running,
+                "maxQueueDepth": self.max_queue_depth,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timeouts": self.timeouts,
+                "crashed": self.crashed,
+                "recycled": self.recycled,
+                "maxJobsPerWorker": self.max_jobs_per_worker,
+                "maxRssBytes": self.max_rss_bytes,
+                "waitMsP50": round(wait_ms[len(wait_ms) // 2], 1) if wait_ms else 0.0,
+                "waitMsMax": round(wait_ms[-1], 1) if wait_ms else 0.0,
+                "runMsP50": round(run_ms[len(run_ms) // 2], 1) if run_ms else 0.0,
+                "runMsMax": round(run_ms[-1], 1) if run_ms else 0.0,
+            }
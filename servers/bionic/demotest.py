@@ -1,6 +1,13 @@
 from docx import Document
-import re
 import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from servers.bionic.bionic_text import fixation_length, iter_tokens, split_word
 
 class BionicDocxConverter:
     def __init__(self, input_path, output_path):
@@ -9,11 +16,7 @@ class BionicDocxConverter:
 
     def _get_fixation_length(self, word):
         """Calculates how many characters to bold."""
-        clean_word = re.sub(r'\W+', '', word)
-        length = len(clean_word)
-        if length <= 1: return 1
-        elif length <= 3: return int(length * 0.6) + 1
-        else: return int(length * 0.45) + 1
+        return fixation_length(word)
 
     def _copy_style(self, source_run, target_run):
         """Copies formatting from source to target run."""
@@ -47,28 +50,25 @@ class BionicDocxConverter:
                 continue
             
             # Apply bionic reading to non-bold runs
-            # Split by whitespace but keep the whitespace in the list
-            parts = re.split(r'(\s+)', run.text)
-            
-            for part in parts:
+            # Tokenize into words and the whitespace between them in one pass
+            for part in iter_tokens(run.text):
+                split = split_word(part)
                 # If it's just whitespace or purely punctuation, add it as a normal run
-                if not part.strip() or not any(c.isalnum() for c in part):
+                if split is None:
                     new_run = paragraph.add_run(part)
                     self._copy_style(run, new_run)
                     new_run.bold = run.bold # Maintain whatever it was (False/None)
                 else:
                     # Bionic logic for words
-                    fixation = self._get_fixation_length(part)
-                    
+                    bold_segment, norm_segment = split
+
                     # Bold part
-                    bold_segment = part[:fixation]
                     b_run = paragraph.add_run(bold_segment)
                     self._copy_style(run, b_run)
                     b_run.bold = True
-                    
+
                     # Normal part
-                    if len(part) > fixation:
-                        norm_segment = part[fixation:]
+                    if norm_segment:
                         n_run = paragraph.add_run(norm_segment)
                         self._copy_style(run, n_run)
                         n_run.bold = False
@@ -0,0 +1,91 @@
+import os
+
+from servers.bionic import app as bionic
+
+
+def _cache(directory, max_entries=100, max_bytes=1 << 20):
+    return bionic.DiskLruCache(directory, max_entries=max_entries, max_bytes=max_bytes)
+
+
+def _files(directory):
+    return sorted(path for path in directory.glob("*/*") if path.is_file())
+
+
+def test_set_get_and_overwrite(tmp_path):
+    cache = _cache(tmp_path)
+    assert cache.get("missing") is None
+    cache.set("k", b"one")
+    cache.set("k", b"three")
+    assert cache.get("k") == b"three"
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["hits"], stats["misses"]) == (1, 5, 1, 1)
+    assert len(_files(tmp_path)) == 1
+
+
+def test_evicts_least_recently_used_by_entries(tmp_path):
+    cache = _cache(tmp_path, max_entries=2)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a") == b"1"  # "b" is now the least recently used
+    cache.set("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.get("c") == b"3"
+    assert cache.stats()["evictions"] == 1
+    assert len(_files(tmp_path)) == 2
+
+
+def test_evicts_least_recently_used_by_bytes(tmp_path):
+    cache = _cache(tmp_path, max_bytes=10)
+    cache.set("a", b"x" * 4)
+    cache.set("b", b"y" * 4)
+    cache.get("a")
+    cache.set("c", b"z" * 4)
+    assert cache.get("b") is None
+    assert cache.get("a") == b"x" * 4
+    assert cache.stats()["bytes"] == 8
+    # A value larger than the whole budget does not survive either.
+    cache.set("big", b"w" * 11)
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] <= 10
+
+
+def test_delete(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("a", b"123")
+    cache.set("b", b"45")
+    cache.delete("a")
+    cache.delete("never-set")
+    assert cache.get("a") is None
+    assert cache.get("b") == b"45"
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] == 2
+    assert len(_files(tmp_path)) == 1
+
+
+def test_rebuilds_index_from_mtimes_on_restart(tmp_path):
+    cache = _cache(tmp_path)
+    for key in ("old", "middle", "new"):
+        cache.set(key, key.encode())
+    # Recency survives a restart through file mtimes; make it explicit and distinct.
+    for index, key in enumerate(["middle", "new", "old"]):
+        path = cache._path_for(cache._name_for(key))
+        os.utime(path, (1_000_000 + index, 1_000_000 + index))
+    (tmp_path / "ab").mkdir(exist_ok=True)
+    (tmp_path / "ab" / "leftover.1234.tmp").write_bytes(b"partial write")
+
+    # The index is rebuilt lazily, on first use.
+    restarted = _cache(tmp_path, max_entries=2)
+    assert restarted.get("middle") is None  # oldest mtime, evicted while loading
+    assert restarted.stats()["entries"] == 2
+    assert restarted.get("new") == b"new"
+    assert restarted.get("old") == b"old"
+    assert restarted.stats()["bytes"] == len(b"new") + len(b"old")
+
+
+def test_missing_file_is_a_miss(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("a", b"123")
+    cache._path_for(cache._name_for("a")).unlink()
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 0
@@ -0,0 +1,82 @@
+import io
+
+import pytest
+from docx import Document
+from docx.shared import Inches
+from PIL import Image
+
+from servers.bionic import app as bionic
+from servers.bionic.bench_convert import build_docx
+
+
+def _png(color, size=(24, 16)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _build_docx_with_images(paragraph_count):
+    """bench_convert's synthetic document (headings, runs, hyperlinks, lists, tables) plus images."""
+    doc = Document(io.BytesIO(build_docx(paragraph_count)))
+    red, blue = _png((200, 20, 20)), _png((20, 20, 200), (40, 30))
+    doc.add_picture(io.BytesIO(red), width=Inches(1))
+    paragraph = doc.add_paragraph("Text before an inline image ")
+    paragraph.add_run().add_picture(io.BytesIO(blue), width=Inches(0.5))
+    paragraph.add_run(" and after it.")
+    # The same image again is stored once and referenced twice.
+    doc.add_picture(io.BytesIO(red), width=Inches(1))
+    table = doc.add_table(rows=1, cols=2)
+    table.rows[0].cells[0].text = "image in a table"
+    table.rows[0].cells[1].paragraphs[0].add_run().add_picture(io.BytesIO(blue), width=Inches(0.5))
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def artifact_store(tmp_path, monkeypatch):
+    store = bionic.DocumentArtifactStore(tmp_path, memory_bytes=1 << 20, disk_bytes=1 << 26, ttl_seconds=600.0)
+    monkeypatch.setattr(bionic, "document_artifact_store", store)
+    return store
+
+
+def _convert_with_each_engine(docx_bytes, **kwargs):
+    return {
+        name: converter_cls(doc_id="test", **kwargs).convert(io.BytesIO(docx_bytes))
+        for name, converter_cls in bionic.DOCX_CONVERTER_ENGINES.items()
+    }
+
+
+@pytest.mark.parametrize("paragraph_count", [50, 200])
+@pytest.mark.parametrize("kwargs", [
+    {"image_url_base": "http://localhost:5000"},
+    {"inline_images": True},
+], ids=["image-urls", "inline-images"])
+def test_engines_produce_identical_html(artifact_store, paragraph_count, kwargs):
+    outputs = _convert_with_each_engine(_build_docx_with_images(paragraph_count), **kwargs)
+    assert set(outputs) == {"python-docx", "streaming"}
+    html_content = outputs["python-docx"]
+    assert outputs["streaming"] == html_content
+
+    # The document really exercises the features being compared.
+    assert "<table" in html_content
+    assert "<li" in html_content
+    assert 'href="https://example.com/0"' in html_content
+    assert 'class="bionic"' in html_content
+    # Table cells render their text only, so the image in the table is not emitted.
+    if kwargs.get("inline_images"):
+        assert html_content.count("data:image/png;base64,") == 3
+    else:
+        assert html_content.count("http://localhost:5000/doc-image/") == 3
+
+
+def test_engines_store_the_same_images(artifact_store):
+    docx_bytes = _build_docx_with_images(20)
+    hashes = {}
+    for name, converter_cls in bionic.DOCX_CONVERTER_ENGINES.items():
+        converter = converter_cls(doc_id="test", image_url_base="http://localhost:5000")
+        converter.convert(io.BytesIO(docx_bytes))
+        hashes[name] = list(converter.image_hashes)
+    assert hashes["streaming"] == hashes["python-docx"]
+    assert len(set(hashes["python-docx"])) == 2
+    assert all(artifact_store.has(image_hash) for image_hash in hashes["python-docx"])
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from servers.bionic import app as bionic
+
+
+def _chunks(text, size):
+    return [text[index:index + size] for index in range(0, len(text), size)]
+
+
+def _parse(chunks, max_depth=2):
+    values = []
+    parser = bionic.IncrementalJsonParser(lambda path, value: values.append((path, value)), max_depth=max_depth)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser, values
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": "x } { y"}', {"a": "x } { y"}),
+    ('{"a": "say \\"}\\" now", "b": 1}', {"a": 'say "}" now', "b": 1}),
+    ('{"a": "back\\\\", "b": {"c": "}"}}', {"a": "back\\", "b": {"c": "}"}}),
+])
+def test_scanner_ignores_braces_and_escaped_quotes_in_strings(text, expected):
+    assert json.loads(bionic._extract_first_json_object_text(text)) == expected
+
+
+@pytest.mark.parametrize("text", [
+    '```json\n{"summary": "ok"}\n```',
+    'Here is the JSON you asked for:\n{"summary": "ok"}\nHope that helps {not json}',
+    '```\n{"summary": "ok"}',
+])
+def test_scanner_skips_fences_and_prefixes(text):
+    assert json.loads(bionic._extract_first_json_object_text(text)) == {"summary": "ok"}
+
+
+def test_scanner_incomplete_object_has_no_text():
+    scanner = bionic._JsonObjectScanner()
+    assert scanner.feed('prefix {"a": [1, 2') is False
+    assert scanner.object_text == ""
+    assert scanner.feed(']} trailing') is True
+    assert json.loads(scanner.object_text) == {"a": [1, 2]}
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_scanner_matches_across_chunk_boundaries(size):
+    text = 'ok: {"a": "\\"}{", "b": [{"c": 1}]} tail'
+    scanner = bionic._JsonObjectScanner()
+    done = [scanner.feed(chunk) for chunk in _chunks(text, size)]
+    assert done[-1] is True
+    assert json.loads(scanner.object_text) == {"a": '"}{', "b": [{"c": 1}]}
+
+
+def test_parser_reports_top_level_values():
+    parser, values = _parse(['```json\n{"rephrased": "Hi {there}", "confidence": 0.5, "ok": true}\n```'])
+    assert parser.complete
+    assert values == [(("rephrased",), "Hi {there}"), (("confidence",), 0.5), (("ok",), True)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 11])
+def test_parser_value_split_across_chunks(size):
+    text = 'Sure! {"bullets": ["first \\"one\\"", "second, with a comma"], "count": 12}'
+    parser, values = _parse(_chunks(text, size))
+    assert parser.complete
+    assert values == [
+        (("bullets", 0), 'first "one"'),
+        (("bullets", 1), "second, with a comma"),
+        (("bullets",), ['first "one"', "second, with a comma"]),
+        (("count",), 12),
+    ]
+
+
+def test_parser_paths_for_nested_arrays():
+    text = '{"groups": [[1, [2, 3]], [{"k": "v"}]], "terms": [{"word": "a", "definition": "b"}]}'
+    _parser, values = _parse([text], max_depth=3)
+    assert values == [
+        (("groups", 0, 0), 1),
+        (("groups", 0, 1), [2, 3]),
+        (("groups", 0), [1, [2, 3]]),
+        (("groups", 1, 0), {"k": "v"}),
+        (("groups", 1), [{"k": "v"}]),
+        (("groups",), [[1, [2, 3]], [{"k": "v"}]]),
+        (("terms", 0, "word"), "a"),
+        (("terms", 0, "definition"), "b"),
+        (("terms", 0), {"word": "a", "definition": "b"}),
+        (("terms",), [{"word": "a", "definition": "b"}]),
+    ]
+
+
+def test_parser_respects_max_depth_and_ignores_trailing_text():
+    parser, values = _parse(['{"bullets": [{"text": "x"}]} {"bullets": ["ignored"]}'])
+    assert parser.complete
+    assert values == [(("bullets", 0), {"text": "x"}), (("bullets",), [{"text": "x"}])]
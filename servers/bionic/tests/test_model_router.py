@@ -0,0 +1,125 @@
+import pytest
+
+from servers.bionic import app as bionic
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(bionic.time, "time", clock)
+    monkeypatch.setattr(bionic, "model_router_state", {})
+    monkeypatch.setattr(bionic, "GEMINI_ROUTER_FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(bionic, "GEMINI_ROUTER_MIN_SAMPLES", 100)
+    monkeypatch.setattr(bionic, "GEMINI_ROUTER_OPEN_SECONDS", 30.0)
+    monkeypatch.setattr(bionic, "GEMINI_ROUTER_MAX_OPEN_SECONDS", 100.0)
+    monkeypatch.setattr(bionic, "GEMINI_ROUTER_ORDER_BIAS_MS", 1500.0)
+    monkeypatch.setattr(bionic, "_log_gemini_event", lambda *args, **kwargs: None)
+    return clock
+
+
+def _state(model_name):
+    return bionic._get_model_router_snapshot()["models"][model_name]["state"]
+
+
+def _fail(model_name, times=1, error=None):
+    for _ in range(times):
+        bionic._record_model_outcome(model_name, ok=False, error=error or RuntimeError("boom"))
+
+
+def _open(model_name):
+    _fail(model_name, bionic.GEMINI_ROUTER_FAILURE_THRESHOLD)
+    assert _state(model_name) == "open"
+
+
+def test_opens_after_consecutive_failure_threshold(clock):
+    _fail("a", 2)
+    assert _state("a") == "closed"
+    bionic._record_model_outcome("a", ok=True, latency_ms=100.0)
+    _fail("a", 2)
+    assert _state("a") == "closed"
+    _fail("a")
+    assert _state("a") == "open"
+    assert bionic.model_router_state["a"]["opened_at"] == clock.now
+
+
+def test_half_open_after_open_seconds(clock):
+    _open("a")
+    clock.now += 29.0
+    assert _state("a") == "open"
+    clock.now += 1.0
+    assert _state("a") == "half_open"
+
+
+def test_half_open_offers_a_single_probe(clock):
+    _open("a")
+    clock.now += 30.0
+    handed_out = []
+    for _ in range(3):
+        before = bionic.model_router_state["a"]["probe_started_at"]
+        assert bionic._order_models_by_health(["a", "b"]) == ["b", "a"]
+        handed_out.append(bionic.model_router_state["a"]["probe_started_at"] != before)
+        clock.now += 1.0
+    assert handed_out == [True, False, False]
+    # A probe that never reports back is handed out again after a minute.
+    clock.now += 60.0
+    bionic._order_models_by_health(["a"])
+    assert bionic.model_router_state["a"]["probe_started_at"] == clock.now
+
+
+def test_successful_probe_closes_and_resets_open_seconds(clock):
+    _open("a")
+    clock.now += 30.0
+    bionic._order_models_by_health(["a"])
+    bionic._record_model_outcome("a", ok=True, latency_ms=200.0)
+    entry = bionic.model_router_state["a"]
+    assert _state("a") == "closed"
+    assert entry["open_seconds"] == 30.0
+    assert entry["probe_started_at"] == 0.0
+
+
+def test_failed_probe_doubles_open_seconds_up_to_max(clock):
+    _open("a")
+    expected = [60.0, 100.0, 100.0]
+    for open_seconds in expected:
+        clock.now += bionic.model_router_state["a"]["open_seconds"]
+        assert _state("a") == "half_open"
+        _fail("a")
+        entry = bionic.model_router_state["a"]
+        assert entry["state"] == "open"
+        assert entry["opened_at"] == clock.now
+        assert entry["open_seconds"] == open_seconds
+
+
+def test_rate_limit_penalty_lasts_open_seconds(clock):
+    for model_name in ("a", "b"):
+        bionic._record_model_outcome(model_name, ok=True, latency_ms=100.0)
+    assert bionic._order_models_by_health(["a", "b"]) == ["a", "b"]
+
+    # Same error rate for both; only the 429 outweighs the configured-order bias.
+    _fail("a", error=RateLimited("429 RESOURCE_EXHAUSTED"))
+    _fail("b")
+    assert bionic.model_router_state["a"]["rate_limited"] == 1
+    assert bionic._order_models_by_health(["a", "b"]) == ["b", "a"]
+
+    clock.now += 30.0
+    assert bionic._order_models_by_health(["a", "b"]) == ["a", "b"]
+
+
+def test_blocked_models_are_ordered_last_soonest_reopen_first(clock):
+    _open("a")
+    clock.now += 10.0
+    _open("b")
+    bionic._record_model_outcome("c", ok=True, latency_ms=5000.0)
+    assert bionic._order_models_by_health(["b", "a", "c", "d"]) == ["d", "c", "a", "b"]